@@ -7,7 +7,8 @@ from .models import (
     Role, Player, Title, PlayerTitle, TournamentActive, TournamentParticipant,
     Match, MatchHistory, PlayerPreference, TournamentSetting,
     Notification, Achievement, PlayerAchievement, TournamentRegistration,
-    TournamentRound, MatchPairing, PrizeDistribution, PlayerStatsHistory, AdminLog
+    TournamentRound, MatchPairing, PrizeDistribution, PlayerStatsHistory, AdminLog,
+    AuthToken
 )
 
 
@@ -112,6 +113,17 @@ class TournamentRoundAdmin(admin.ModelAdmin):
     list_filter = ('round_status',)
 
 
+@admin.register(AuthToken)
+class AuthTokenAdmin(admin.ModelAdmin):
+    """Sessions can be inspected and revoked (deleted), never read back"""
+    list_display = ('player', 'device_label', 'created_at', 'expires_at', 'last_used_at')
+    search_fields = ('player__username', 'device_label')
+    readonly_fields = ('player', 'token_hash', 'device_label', 'created_at', 'expires_at', 'last_used_at')
+    
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(AdminLog)
 class AdminLogAdmin(admin.ModelAdmin):
     list_display = ('admin', 'action_type', 'target_player', 'created_at')
@@ -2,7 +2,6 @@
 REST API Views for COTISA
 All endpoints return JSON - NO template rendering!
 """
-from django.http import JsonResponse
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST, require_GET, require_http_methods
@@ -10,23 +9,28 @@ from django.views.decorators.csrf import csrf_protect, csrf_exempt
 from django.contrib import messages
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 import json
 import random
-import secrets
 import logging
 from functools import wraps
 
 logger = logging.getLogger(__name__)
 
+from .json_encoding import JsonResponse
 from .models import (
     Player, Role, TournamentActive, Match, Notification,
     TournamentRegistration, TournamentParticipant, PlayerTitle, Title, Achievement
 )
 from .helpers import admin_required, permission_required
+from .decorators import (
+    token_required, authenticate_token, issue_token, revoke_token, revoke_player_tokens,
+    rotate_token, device_label
+)
 
 
 def get_player_profile_picture(player):
@@ -42,28 +46,6 @@ def get_player_profile_picture(player):
     return None
 
 
-# Token-based authentication decorator
-def token_required(view_func):
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        # Get token from X-Auth-Token header
-        auth_token = request.headers.get('X-Auth-Token')
-        
-        if not auth_token:
-            return JsonResponse({'error': 'Authentication required - no token provided'}, status=401)
-        
-        try:
-            # Find user by token
-            player = Player.objects.get(auth_token=auth_token, is_active=True)
-            # Attach player to request
-            request.user = player
-            return view_func(request, *args, **kwargs)
-        except Player.DoesNotExist:
-            return JsonResponse({'error': 'Invalid or expired token'}, status=401)
-    
-    return wrapper
-
-
 # Custom authentication decorator for API that returns JSON instead of redirect
 def api_login_required(view_func):
     @wraps(view_func)
@@ -138,11 +120,11 @@ def api_register(request):
         if full_name:
             user.full_name = full_name
         
-        # Generate auth token for auto-login
-        auth_token = secrets.token_urlsafe(32)
-        user.auth_token = auth_token
         user.save()
         
+        # Generate auth token for auto-login
+        auth_token = issue_token(user, device_label(request))
+        
         # Send welcome email (async - don't block registration)
         try:
             from .email_service import send_welcome_email
@@ -221,9 +203,7 @@ def api_login(request):
         
         if user is not None:
             # Generate authentication token
-            auth_token = secrets.token_urlsafe(32)
-            user.auth_token = auth_token
-            user.save(update_fields=['auth_token'])
+            auth_token = issue_token(user, device_label(request))
             
             # Still use session-based auth as fallback
             login(request, user)
@@ -258,8 +238,8 @@ def api_login(request):
                         'icon': user.active_title.icon_class,
                         'color': user.active_title.color_code
                     } if user.active_title else None,
-                    'date_joined': user.date_joined.isoformat(),
-                    'created_at': user.date_joined.isoformat()  # Alias for frontend
+                    'date_joined': user.date_joined,
+                    'created_at': user.date_joined  # Alias for frontend
                 }
             })
         else:
@@ -275,21 +255,34 @@ def api_login(request):
 def api_logout(request):
     """
     POST /api/logout/
-    Logout current user and clear their auth token
+    Logout current user and revoke their auth token
+    (this session only; a session-cookie logout revokes every token)
     """
-    # Clear token if user is authenticated
-    if hasattr(request, 'user') and request.user.is_authenticated:
-        try:
-            player = Player.objects.get(player_id=request.user.player_id)
-            player.auth_token = None
-            player.save(update_fields=['auth_token'])
-        except Player.DoesNotExist:
-            pass
+    auth_token = request.headers.get('X-Auth-Token')
+    if auth_token:
+        revoke_token(auth_token)
+    elif hasattr(request, 'user') and request.user.is_authenticated:
+        revoke_player_tokens(request.user.player_id)
     
     logout(request)
     return JsonResponse({'success': True, 'message': 'Logged out successfully'})
 
 
+@require_POST
+@csrf_exempt
+@token_required
+def api_refresh_token(request):
+    """
+    POST /api/token/refresh/
+    Exchange the current auth token for a new one with a fresh expiry.
+    The old token stops working immediately.
+    """
+    auth_token = rotate_token(request.headers.get('X-Auth-Token'))
+    if auth_token is None:
+        return JsonResponse({'error': 'Nevažeći token'}, status=401)
+    return JsonResponse({'success': True, 'auth_token': auth_token})
+
+
 @csrf_exempt
 def api_delete_account(request):
     """
@@ -309,9 +302,8 @@ def api_delete_account(request):
         if not auth_token:
             return JsonResponse({'error': 'Niste prijavljeni'}, status=401)
         
-        try:
-            user = Player.objects.get(auth_token=auth_token)
-        except Player.DoesNotExist:
+        user = authenticate_token(auth_token)
+        if user is None:
             return JsonResponse({'error': 'Nevažeći token'}, status=401)
         
         # Parse request body
@@ -376,9 +368,7 @@ def api_google_login(request):
         user, created = get_or_create_google_user(google_info)
         
         # Generate auth token
-        auth_token = secrets.token_urlsafe(32)
-        user.auth_token = auth_token
-        user.save(update_fields=['auth_token'])
+        auth_token = issue_token(user, device_label(request))
         
         # Login user
         login(request, user)
@@ -875,7 +865,7 @@ def api_all_tournaments(request):
     """
     GET /api/tournaments/
     Get all active PUBLIC tournaments (no auth required)
-    Supports pagination: ?page=1&per_page=20
+    Supports pagination: ?page=1&per_page=20 or ?cursor=&per_page=20
     """
     tournaments = TournamentActive.objects.filter(
         tournament_status__in=['registration', 'active', 'upcoming'],
@@ -884,7 +874,7 @@ def api_all_tournaments(request):
     
     # Check if pagination is requested
     page = request.GET.get('page')
-    if page:
+    if page or 'cursor' in request.GET:
         from .pagination import paginate_queryset, serialize_tournament
         return paginate_queryset(
             tournaments, request, 
@@ -893,7 +883,8 @@ def api_all_tournaments(request):
             data_key='tournaments'
         )
     
-    data = [{
+    from .streaming import stream_json_response
+    return stream_json_response(tournaments, lambda t: {
         'id': t.tournament_id,
         'code': t.tournament_code,
         'tournament_code': t.tournament_code,
@@ -906,13 +897,11 @@ def api_all_tournaments(request):
         'participants': t.current_participants,
         'max_players': t.max_participants,
         'max_participants': t.max_participants,
-        'start_date': t.start_date.isoformat() if t.start_date else None,
-        'created_at': t.created_at.isoformat(),
+        'start_date': t.start_date,
+        'created_at': t.created_at,
         'created_by': t.created_by.username,
         'is_public': t.is_public
-    } for t in tournaments]
-    
-    return JsonResponse({'success': True, 'tournaments': data})
+    }, data_key='tournaments')
 
 
 @require_GET
@@ -922,11 +911,13 @@ def api_my_tournaments(request):
     GET /api/tournaments/my/
     Get tournaments created by current user
     """
+    from .streaming import stream_json_response
+    
     tournaments = TournamentActive.objects.filter(
         created_by=request.user
     ).order_by('-created_at')
     
-    data = [{
+    return stream_json_response(tournaments, lambda t: {
         'id': t.tournament_id,
         'code': t.tournament_code,
         'tournament_code': t.tournament_code,
@@ -939,11 +930,9 @@ def api_my_tournaments(request):
         'participants': t.current_participants,
         'max_players': t.max_participants,
         'max_participants': t.max_participants,
-        'start_date': t.start_date.isoformat() if t.start_date else None,
-        'created_at': t.created_at.isoformat()
-    } for t in tournaments]
-    
-    return JsonResponse({'success': True, 'tournaments': data})
+        'start_date': t.start_date,
+        'created_at': t.created_at
+    }, data_key='tournaments')
 
 
 @require_GET
@@ -983,8 +972,8 @@ def api_tournament_detail(request, tournament_id):
             'tournament_status': tournament.tournament_status,
             'current_participants': tournament.current_participants,
             'max_participants': tournament.max_participants,
-            'start_date': tournament.start_date.isoformat() if tournament.start_date else None,
-            'created_at': tournament.created_at.isoformat() if tournament.created_at else None,
+            'start_date': tournament.start_date,
+            'created_at': tournament.created_at,
             'created_by': tournament.created_by.username,
             'creator_id': tournament.created_by.player_id
         },
@@ -1009,11 +998,48 @@ def api_tournament_detail(request, tournament_id):
             'player2_is_provisional': m.black_player.is_provisional if m.black_player else False,
             'winner_id': m.winner.player_id if m.winner else None,
             'status': m.match_status,
-            'scheduled_time': m.match_date.isoformat() if m.match_date else None
+            'scheduled_time': m.match_date
         } for m in matches]
     })
 
 
+@require_GET
+@token_required
+def api_tournament_standings(request, tournament_id):
+    """
+    GET /api/tournaments/<id>/standings/
+    Get live tournament standings with FIDE tiebreaks
+    """
+    from .tiebreaks import tournament_tiebreaks
+    
+    tournament = get_object_or_404(TournamentActive, tournament_id=tournament_id)
+    
+    rows = tournament_tiebreaks(tournament)
+    
+    return JsonResponse({
+        'success': True,
+        'tournament_id': tournament.tournament_id,
+        'current_round': tournament.current_round,
+        'standings': [{
+            'rank': row['rank'],
+            'id': row['participant'].player.player_id,
+            'username': row['participant'].player.username,
+            'elo_rating': row['participant'].player.elo_rating,
+            'points': row['points'],
+            'games_played': row['participant'].games_played,
+            'wins': row['wins'],
+            'buchholz': row['buchholz'],
+            'median_buchholz': row['median_buchholz'],
+            'sonneborn_berger': row['sonneborn_berger'],
+            'progressive': row['progressive'],
+            'color_history': row['participant'].color_history,
+            'had_bye': row['participant'].had_bye,
+            'is_eliminated': row['participant'].is_eliminated,
+            'placement': row['participant'].placement
+        } for row in rows]
+    })
+
+
 @require_GET
 @csrf_exempt
 def api_tournament_by_code(request, tournament_code):
@@ -1039,7 +1065,7 @@ def api_tournament_by_code(request, tournament_code):
             'status': tournament.tournament_status,
             'current_participants': tournament.current_participants,
             'max_players': tournament.max_participants,
-            'start_date': tournament.start_date.isoformat() if tournament.start_date else None,
+            'start_date': tournament.start_date,
             'entry_fee': float(tournament.entry_fee) if tournament.entry_fee else 0,
             'created_by': tournament.created_by.username if tournament.created_by else 'N/A'
         },
@@ -1049,7 +1075,7 @@ def api_tournament_by_code(request, tournament_code):
             'elo_rating': p.player.elo_rating,
             'seed': p.seed_number,
             'is_eliminated': p.is_eliminated,
-            'joined_date': p.registration_date.isoformat() if hasattr(p, 'registration_date') and p.registration_date else 'N/A'
+            'joined_date': p.registration_date if hasattr(p, 'registration_date') and p.registration_date else 'N/A'
         } for p in participants]
     })
 
@@ -1107,7 +1133,7 @@ def api_start_tournament_by_id(request, tournament_id):
     POST /api/tournaments/<id>/start/
     Start a tournament by ID (changes status to 'in_progress' and generates matches + games)
     """
-    from .models import Game
+    from .tournament_helpers import create_round_matches, generate_round_robin_schedule
     
     try:
         tournament = get_object_or_404(TournamentActive, tournament_id=tournament_id)
@@ -1137,97 +1163,54 @@ def api_start_tournament_by_id(request, tournament_id):
             random.shuffle(participants)
         # manual and swiss use default order
         
-        # Get time control from tournament
-        time_control_minutes = tournament.time_control_minutes or 10
-        time_increment_seconds = tournament.time_increment_seconds or 0
-        
-        # Generate matches and games based on tournament type
-        matches_created = []
-        games_created = []
-        
-        def create_match_and_game(white_participant, black_participant, round_number=1):
-            """Helper to create match and game together"""
-            match = Match.objects.create(
-                tournament=tournament,
-                white_player=white_participant.player,
-                black_player=black_participant.player,
-                match_status='scheduled',
-                round_number=round_number,
-                time_control=f"{time_control_minutes}+{time_increment_seconds}",
-                white_elo_before=white_participant.player.elo_rating,
-                black_elo_before=black_participant.player.elo_rating
-            )
-            
-            # Create game for this match
-            game = Game.objects.create(
-                tournament=tournament,
-                match=match,
-                white_player=white_participant.player,
-                black_player=black_participant.player,
-                status='waiting',
-                time_control_minutes=time_control_minutes,
-                time_increment_seconds=time_increment_seconds,
-                white_time_remaining=time_control_minutes * 60,
-                black_time_remaining=time_control_minutes * 60
-            )
-            
-            # Send notifications to both players with game link
-            opponent_name_white = black_participant.player.username
-            opponent_name_black = white_participant.player.username
-            
-            Notification.objects.create(
-                player=white_participant.player,
-                notification_type='pairing_update',
-                title='🎮 Turnir je započeo!',
-                message=f'Tvoj protivnik je {opponent_name_white}. Igraš bijelim figurama! Klikni za početak igre.',
-                related_tournament=tournament,
-                related_match=match
-            )
-            
-            Notification.objects.create(
-                player=black_participant.player,
-                notification_type='pairing_update',
-                title='🎮 Turnir je započeo!',
-                message=f'Tvoj protivnik je {opponent_name_black}. Igraš crnim figurama! Klikni za početak igre.',
-                related_tournament=tournament,
-                related_match=match
-            )
-            
-            return match, game
+        # Build all pairings in memory, then write them with bulk inserts
+        pairings = []
         
         if tournament.tournament_type == 'round_robin':
-            # Round-robin: everyone plays everyone
-            for i, p1 in enumerate(participants):
-                for p2 in participants[i+1:]:
-                    match, game = create_match_and_game(p1, p2, round_number=1)
-                    matches_created.append(match)
-                    games_created.append(game)
+            # Round-robin: only round 1 of the Berger schedule is created now,
+            # later rounds are generated from the seed order as rounds finish
+            for i, participant in enumerate(participants):
+                participant.seed_number = i + 1
+            
+            schedule = generate_round_robin_schedule([p.player for p in participants])
+            for white, black in schedule[0]:
+                if black is not None:
+                    pairings.append((white, black, 1))
         
         elif tournament.tournament_type in ['knockout', 'elimination']:
             # Knockout/Elimination: pair players for first round
-            for i in range(0, len(participants), 2):
-                if i + 1 < len(participants):
-                    match, game = create_match_and_game(participants[i], participants[i+1], round_number=1)
-                    matches_created.append(match)
-                    games_created.append(game)
-                else:
-                    # Odd player gets a bye (auto-advance)
-                    participants[i].is_eliminated = False
-                    participants[i].save()
+            # Odd player gets a bye (auto-advance)
+            for i in range(0, len(participants) - 1, 2):
+                pairings.append((participants[i].player, participants[i+1].player, 1))
         
         elif tournament.tournament_type == 'swiss':
             # Swiss: first round pairs top vs bottom half
             half = len(participants) // 2
             for i in range(half):
-                if i + half < len(participants):
-                    match, game = create_match_and_game(participants[i], participants[i + half], round_number=1)
-                    matches_created.append(match)
-                    games_created.append(game)
+                pairings.append((participants[i].player, participants[i + half].player, 1))
         
-        # Update tournament status
-        tournament.tournament_status = 'in_progress'
-        tournament.start_date = timezone.now()
-        tournament.save()
+        with transaction.atomic():
+            if tournament.tournament_type == 'round_robin':
+                # Written with the matches so a failed start leaves the old seeds
+                TournamentParticipant.objects.bulk_update(participants, ['seed_number'])
+            matches_created, games_created = create_round_matches(tournament, pairings)
+            
+            if tournament.tournament_type == 'swiss' and len(participants) % 2 == 1:
+                # Odd player out gets the first-round bye
+                from .standings import record_bye
+                record_bye(tournament, participants[-1].player)
+            
+            # Update tournament status
+            tournament.tournament_status = 'in_progress'
+            tournament.start_date = timezone.now()
+            tournament.save()
+            
+            from .notifications import announce_round
+            announce_round(
+                tournament, 1, [tp.player_id for tp in participants],
+                'Turnir je započeo!', matches=matches_created,
+                user_message=f'Turnir {tournament.tournament_name} je započeo!'
+            )
         
         return JsonResponse({
             'success': True,
@@ -1311,7 +1294,7 @@ def api_profile(request):
             'draws': user.draws,
             'total_matches': user.total_matches,
             'role': user.role.role_name,
-            'date_joined': user.date_joined.isoformat(),
+            'date_joined': user.date_joined,
             'profile_picture': get_player_profile_picture(user)
         }
     })
@@ -1371,9 +1354,9 @@ def api_profile_history(request):
             'id': tournament.tournament_id,
             'name': tournament.tournament_name,
             'status': tournament.tournament_status,
-            'created_at': tournament.created_at.isoformat(),
-            'started_at': tournament.start_date.isoformat() if tournament.start_date else None,
-            'ended_at': tournament.end_date.isoformat() if tournament.end_date else None,
+            'created_at': tournament.created_at,
+            'started_at': tournament.start_date,
+            'ended_at': tournament.end_date,
             'total_players': tournament.current_participants,
             'your_position': participation.placement,
             'your_points': 0  # Points field doesn't exist in model
@@ -1390,53 +1373,100 @@ def api_leaderboard(request):
     """
     GET /api/leaderboard/
     Get top players by ELO with pagination support
-    ?page=1&per_page=50
+    ?page=1&per_page=50&type=overall|bullet|blitz|rapid|daily
+    or ?cursor=&per_page=50 (pages stay put while ratings above them change)
+    
+    Served from the precomputed rank index (chess/leaderboard.py),
+    never by sorting the player table.
     """
-    limit = int(request.GET.get('limit', 50))
+    from .leaderboard import leaderboard_page, offset_after
+    from .pagination import decode_cursor, encode_cursor
+    from .middleware import ValidationError
+    
+    rating_type = request.GET.get('type', 'overall')
     page = request.GET.get('page')
+    cursor = request.GET.get('cursor')
+    try:
+        limit = int(request.GET.get('limit', 50))
+        per_page = min(max(int(request.GET.get('per_page', limit)), 1), 100)
+        page_number = max(int(page or 1), 1)
+    except ValueError:
+        return JsonResponse({'error': 'Neispravan broj stranice'}, status=400)
     
-    players = Player.objects.filter(
-        is_active=True
-    ).select_related('role', 'active_title').order_by('-elo_rating')
+    try:
+        if cursor is not None:
+            offset = 0
+            if cursor:
+                rating, player_id = decode_cursor(cursor, 2)
+                offset = offset_after(rating_type, int(rating), int(player_id))
+            rows, total = leaderboard_page(rating_type, offset, per_page)
+            has_next = offset + len(rows) < total
+            return JsonResponse({
+                'success': True,
+                'leaderboard': rows,
+                'type': rating_type,
+                'pagination': {
+                    'per_page': per_page,
+                    'has_next': has_next,
+                    'next_cursor': encode_cursor([rows[-1]['rating'], rows[-1]['id']]) if has_next and rows else None,
+                    'total_items': total,
+                    'total_is_estimate': False,
+                }
+            })
+        # If pagination requested
+        if page:
+            rows, total = leaderboard_page(rating_type, (page_number - 1) * per_page, per_page)
+        else:
+            # Without pagination (legacy support)
+            rows, total = leaderboard_page(rating_type, 0, max(limit, 0))
+    except ValidationError as e:
+        return e.to_response()
+    except (TypeError, ValueError):
+        return JsonResponse({'error': f'Nepoznata vrsta rejtinga: {rating_type}'}, status=400)
     
-    # If pagination requested
-    if page:
-        from .pagination import paginate_queryset
-        return paginate_queryset(
-            players, request,
-            per_page=limit,
-            serializer_func=lambda p: {
-                'rank': None,  # Will be calculated client-side with pagination
-                'id': p.player_id,
-                'username': p.username,
-                'full_name': p.full_name,
-                'elo_rating': p.elo_rating,
-                'wins': p.wins,
-                'losses': p.losses,
-                'draws': p.draws,
-                'total_matches': p.total_matches,
-                'is_provisional': p.is_provisional,
-                'active_title': p.active_title.title_name if p.active_title else None
-            },
-            data_key='leaderboard'
-        )
+    if not page:
+        return JsonResponse({'leaderboard': rows, 'type': rating_type})
+    
+    total_pages = max(1, -(-total // per_page))
+    return JsonResponse({
+        'success': True,
+        'leaderboard': rows,
+        'type': rating_type,
+        'pagination': {
+            'current_page': page_number,
+            'total_pages': total_pages,
+            'total_items': total,
+            'per_page': per_page,
+            'has_next': page_number < total_pages,
+            'has_previous': page_number > 1,
+            'next_page': page_number + 1 if page_number < total_pages else None,
+            'previous_page': page_number - 1 if page_number > 1 else None,
+        }
+    })
+
+
+@require_GET
+@token_required
+def api_leaderboard_my_rank(request):
+    """
+    GET /api/leaderboard/me/
+    Current user's exact rank and the players around them
+    ?type=overall|bullet|blitz|rapid|daily&neighbors=5
+    """
+    from .leaderboard import rank_window
     
-    # Without pagination (legacy support)
-    players = players[:limit]
+    rating_type = request.GET.get('type', 'overall')
+    try:
+        neighbors = min(max(int(request.GET.get('neighbors', 5)), 0), 50)
+    except ValueError:
+        return JsonResponse({'error': 'Neispravan broj susjeda'}, status=400)
     
-    data = [{
-        'rank': idx + 1,
-        'id': p.player_id,
-        'username': p.username,
-        'elo_rating': p.elo_rating,
-        'wins': p.wins,
-        'losses': p.losses,
-        'draws': p.draws,
-        'is_provisional': p.is_provisional,
-        'active_title': p.active_title.title_name if p.active_title else None
-    } for idx, p in enumerate(players)]
+    try:
+        window = rank_window(rating_type, request.user.player_id, neighbors)
+    except ValueError:
+        return JsonResponse({'error': f'Nepoznata vrsta rejtinga: {rating_type}'}, status=400)
     
-    return JsonResponse({'leaderboard': data})
+    return JsonResponse({'success': True, 'type': rating_type, **window})
 
 
 # ============================================
@@ -1449,7 +1479,7 @@ def api_my_matches(request):
     """
     GET /api/matches/my/
     Get current user's match history with optimized queries
-    Supports pagination: ?page=1&per_page=20
+    Supports pagination: ?page=1&per_page=20 or ?cursor=&per_page=20
     """
     matches = Match.objects.filter(
         Q(white_player=request.user) | Q(black_player=request.user)
@@ -1459,7 +1489,7 @@ def api_my_matches(request):
     
     # Check for pagination
     page = request.GET.get('page')
-    if page:
+    if page or 'cursor' in request.GET:
         from .pagination import paginate_queryset, serialize_match
         return paginate_queryset(
             matches, request,
@@ -1477,7 +1507,7 @@ def api_my_matches(request):
         'black_player': m.black_player.username,
         'result': m.result,
         'status': m.match_status,
-        'date': m.match_date.isoformat(),
+        'date': m.match_date,
         'tournament_name': m.tournament.tournament_name if m.tournament else None
     } for m in matches]
     
@@ -1524,9 +1554,11 @@ def api_admin_players(request):
     if not (request.user.role and (request.user.role.role_name == 'admin' or request.user.role.role_name == 'Administrator')):
         return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
     
+    from .streaming import stream_json_response
+    
     players = Player.objects.select_related('role').all().order_by('-date_joined')
     
-    data = [{
+    return stream_json_response(players, lambda p: {
         'id': p.player_id,
         'username': p.username,
         'email': p.email,
@@ -1536,10 +1568,8 @@ def api_admin_players(request):
         'losses': p.losses,
         'draws': p.draws,
         'role': p.role.role_name if p.role else 'player',
-        'created_at': p.date_joined.isoformat() if p.date_joined else None
-    } for p in players]
-    
-    return JsonResponse({'success': True, 'players': data})
+        'created_at': p.date_joined
+    }, data_key='players')
 
 
 @require_POST
@@ -1666,7 +1696,7 @@ def api_player_profile(request, player_id):
                     'icon': player.active_title.icon_class,
                     'color': player.active_title.color_code
                 } if player.active_title else None,
-                'created_at': player.date_joined.isoformat() if player.date_joined else None
+                'created_at': player.date_joined
             }
         })
     except Exception as e:
@@ -1866,26 +1896,34 @@ def api_admin_matches(request):
     """
     GET /api/admin/matches/
     Get all matches for admin management
+    ?limit=100 (last N matches; 0 exports every match)
     """
+    from .streaming import stream_json_response
+    
     # Check if user is admin
     if not (request.user.role and (request.user.role.role_name == 'admin' or request.user.role.role_name == 'Administrator')):
         return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
     
+    try:
+        limit = max(int(request.GET.get('limit', 100)), 0)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit must be an integer'}, status=400)
+    
     matches = Match.objects.select_related(
-        'player_white', 'player_black', 'tournament'
-    ).all().order_by('-match_date')[:100]  # Last 100 matches
+        'white_player', 'black_player', 'tournament'
+    ).all().order_by('-match_date')
+    if limit:
+        matches = list(matches[:limit])
     
-    data = [{
+    return stream_json_response(matches, lambda m: {
         'id': m.match_id,
-        'white_player': m.player_white.username if m.player_white else 'N/A',
-        'black_player': m.player_black.username if m.player_black else 'N/A',
+        'white_player': m.white_player.username if m.white_player else 'N/A',
+        'black_player': m.black_player.username if m.black_player else 'N/A',
         'result': m.result,
         'tournament': m.tournament.tournament_name if m.tournament else 'Casual',
-        'match_date': m.match_date.isoformat() if m.match_date else None,
+        'match_date': m.match_date,
         'round_number': m.round_number
-    } for m in matches]
-    
-    return JsonResponse({'success': True, 'matches': data})
+    }, data_key='matches')
 
 
 # ============================================
@@ -2144,7 +2182,7 @@ def api_player_titles(request, player_id=None):
             'description': pt.title.description,
             'icon': pt.title.icon_class,
             'color': pt.title.color_code,
-            'awarded_date': pt.awarded_date.isoformat() if pt.awarded_date else None,
+            'awarded_date': pt.awarded_date,
             'is_active': player.active_title_id == pt.title.title_id if player.active_title else False
         } for pt in player_titles]
         
@@ -2328,7 +2366,7 @@ def api_get_notifications(request):
             'id': n.notification_id,
             'type': n.notification_type,
             'message': n.message,
-            'created_at': n.created_at.isoformat(),
+            'created_at': n.created_at,
             'related_match_id': n.related_match_id
         } for n in notifications]
         
@@ -2446,7 +2484,7 @@ def api_get_friends(request):
                 'elo_rating': friend.elo_rating,
                 'profile_picture': get_player_profile_picture(friend),
                 'is_provisional': friend.is_provisional,
-                'friendship_since': f.updated_at.isoformat()
+                'friendship_since': f.updated_at
             })
         
         return JsonResponse({
@@ -2486,7 +2524,7 @@ def api_get_friend_requests(request):
                 'elo_rating': f.from_player.elo_rating,
                 'profile_picture': get_player_profile_picture(f.from_player)
             },
-            'created_at': f.created_at.isoformat()
+            'created_at': f.created_at
         } for f in received]
         
         sent_list = [{
@@ -2497,7 +2535,7 @@ def api_get_friend_requests(request):
                 'elo_rating': f.to_player.elo_rating,
                 'profile_picture': get_player_profile_picture(f.to_player)
             },
-            'created_at': f.created_at.isoformat()
+            'created_at': f.created_at
         } for f in sent]
         
         return JsonResponse({
@@ -2773,9 +2811,10 @@ def api_reset_password(request):
         if not default_token_generator.check_token(player, token):
             return JsonResponse({'error': 'Link za resetiranje je istekao. Zatražite novi.'}, status=400)
         
-        # Set new password
+        # Set new password and log out every session
         player.set_password(password)
         player.save()
+        revoke_player_tokens(player.player_id)
         
         return JsonResponse({
             'success': True,
@@ -2802,9 +2841,8 @@ def api_change_password(request):
     if not auth_token:
         return JsonResponse({'error': 'Autentifikacija je obavezna'}, status=401)
     
-    try:
-        player = Player.objects.get(auth_token=auth_token, is_active=True)
-    except Player.DoesNotExist:
+    player = authenticate_token(auth_token)
+    if player is None:
         return JsonResponse({'error': 'Nevažeći token'}, status=401)
     
     try:
@@ -2829,9 +2867,10 @@ def api_change_password(request):
         if current_password == new_password:
             return JsonResponse({'error': 'Nova lozinka mora biti različita od trenutne'}, status=400)
         
-        # Set new password
+        # Set new password; other sessions are logged out
         player.set_password(new_password)
         player.save()
+        revoke_player_tokens(player.player_id, keep=auth_token)
         
         return JsonResponse({
             'success': True,
@@ -11,4 +11,4 @@ class ChessConfig(AppConfig):
     
     def ready(self):
         """Import signals if any"""
-        pass
+        from . import signals  # noqa: F401
@@ -0,0 +1,704 @@
+"""
+Chess Move Engine
+Bitboard move generator and validator used to make the server
+authoritative over game state: legal moves, FEN, SAN and terminal
+positions (checkmate, stalemate, repetition, 50-move rule, insufficient
+material).
+
+Squares are numbered a1=0 .. h8=63. Attack tables for knights, kings and
+pawns and the sliding rays are precomputed at import time. Moves are
+plain ints: from | to << 6 | promotion << 12.
+"""
+
+WHITE = 0
+BLACK = 1
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_SYMBOLS = 'pnbrqk'
+EMPTY = -1
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+SQUARE_NAMES = [f + r for r in '12345678' for f in 'abcdefgh']
+SQUARES = {name: index for index, name in enumerate(SQUARE_NAMES)}
+
+RANK_3 = 0xFF << 16
+RANK_6 = 0xFF << 40
+LIGHT_SQUARES = 0x55AA55AA55AA55AA
+
+# Castling right bits
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+CASTLING_SYMBOLS = (('K', WHITE_KINGSIDE), ('Q', WHITE_QUEENSIDE), ('k', BLACK_KINGSIDE), ('q', BLACK_QUEENSIDE))
+
+# Rights kept when a piece moves from or to a square
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[SQUARES['a1']] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[SQUARES['e1']] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[SQUARES['h1']] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[SQUARES['a8']] = 15 & ~BLACK_QUEENSIDE
+CASTLING_MASK[SQUARES['e8']] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[SQUARES['h8']] = 15 & ~BLACK_KINGSIDE
+
+
+# ============================================
+# PRECOMPUTED ATTACK TABLES
+# ============================================
+
+def _step_attacks(offsets):
+    table = []
+    for square in range(64):
+        rank, file = divmod(square, 8)
+        bb = 0
+        for dr, df in offsets:
+            r, f = rank + dr, file + df
+            if 0 <= r < 8 and 0 <= f < 8:
+                bb |= 1 << (r * 8 + f)
+        table.append(bb)
+    return table
+
+
+def _ray(square, dr, df):
+    rank, file = divmod(square, 8)
+    bb = 0
+    r, f = rank + dr, file + df
+    while 0 <= r < 8 and 0 <= f < 8:
+        bb |= 1 << (r * 8 + f)
+        r, f = r + dr, f + df
+    return bb
+
+
+KNIGHT_ATTACKS = _step_attacks([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _step_attacks([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+PAWN_ATTACKS = (
+    _step_attacks([(1, -1), (1, 1)]),
+    _step_attacks([(-1, -1), (-1, 1)]),
+)
+
+# Rays towards higher square numbers: the nearest blocker is the lowest set bit
+RAY_N = [_ray(sq, 1, 0) for sq in range(64)]
+RAY_E = [_ray(sq, 0, 1) for sq in range(64)]
+RAY_NE = [_ray(sq, 1, 1) for sq in range(64)]
+RAY_NW = [_ray(sq, 1, -1) for sq in range(64)]
+# Rays towards lower square numbers: the nearest blocker is the highest set bit
+RAY_S = [_ray(sq, -1, 0) for sq in range(64)]
+RAY_W = [_ray(sq, 0, -1) for sq in range(64)]
+RAY_SE = [_ray(sq, -1, 1) for sq in range(64)]
+RAY_SW = [_ray(sq, -1, -1) for sq in range(64)]
+
+
+def _positive_ray(rays, square, occupied):
+    attacks = rays[square]
+    blockers = attacks & occupied
+    if blockers:
+        attacks ^= rays[(blockers & -blockers).bit_length() - 1]
+    return attacks
+
+
+def _negative_ray(rays, square, occupied):
+    attacks = rays[square]
+    blockers = attacks & occupied
+    if blockers:
+        attacks ^= rays[blockers.bit_length() - 1]
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    """Squares a rook on square attacks given the occupancy"""
+    return (_positive_ray(RAY_N, square, occupied) | _positive_ray(RAY_E, square, occupied) |
+            _negative_ray(RAY_S, square, occupied) | _negative_ray(RAY_W, square, occupied))
+
+
+def bishop_attacks(square, occupied):
+    """Squares a bishop on square attacks given the occupancy"""
+    return (_positive_ray(RAY_NE, square, occupied) | _positive_ray(RAY_NW, square, occupied) |
+            _negative_ray(RAY_SE, square, occupied) | _negative_ray(RAY_SW, square, occupied))
+
+
+def _squares(bb):
+    """Yield the square index of every set bit"""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def encode_move(from_square, to_square, promotion=0):
+    return from_square | to_square << 6 | promotion << 12
+
+
+def move_to_uci(move):
+    """Convert an encoded move to UCI notation, e.g. 'e7e8q'"""
+    promotion = move >> 12
+    uci = SQUARE_NAMES[move & 63] + SQUARE_NAMES[(move >> 6) & 63]
+    return uci + PIECE_SYMBOLS[promotion] if promotion else uci
+
+
+# ============================================
+# BOARD
+# ============================================
+
+class Board:
+    """
+    Chess position with legal move generation
+
+    Args:
+        fen: Position in Forsyth-Edwards Notation (default: starting position)
+
+    Raises:
+        ValueError: If the FEN cannot be parsed
+    """
+
+    def __init__(self, fen=STARTING_FEN):
+        self.set_fen(fen)
+
+    # ------------------------------------------
+    # FEN
+    # ------------------------------------------
+
+    def set_fen(self, fen):
+        parts = fen.split()
+        if len(parts) < 4:
+            raise ValueError(f'Invalid FEN: {fen}')
+        placement, turn, castling, ep = parts[:4]
+        halfmove = parts[4] if len(parts) > 4 else '0'
+        fullmove = parts[5] if len(parts) > 5 else '1'
+
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied_co = [0, 0]
+        self.squares = [EMPTY] * 64
+
+        rows = placement.split('/')
+        if len(rows) != 8:
+            raise ValueError(f'Invalid FEN placement: {placement}')
+        for row_index, row in enumerate(rows):
+            rank = 7 - row_index
+            file = 0
+            for char in row:
+                if char.isdigit():
+                    file += int(char)
+                    continue
+                ptype = PIECE_SYMBOLS.find(char.lower())
+                if ptype < 0 or file > 7:
+                    raise ValueError(f'Invalid FEN placement: {placement}')
+                color = WHITE if char.isupper() else BLACK
+                square = rank * 8 + file
+                self.pieces[color][ptype] |= 1 << square
+                self.occupied_co[color] |= 1 << square
+                self.squares[square] = color << 3 | ptype
+                file += 1
+            if file != 8:
+                raise ValueError(f'Invalid FEN placement: {placement}')
+
+        if turn not in ('w', 'b'):
+            raise ValueError(f'Invalid FEN side to move: {turn}')
+        if bin(self.pieces[WHITE][KING]).count('1') != 1 or bin(self.pieces[BLACK][KING]).count('1') != 1:
+            raise ValueError('FEN must contain exactly one king per side')
+        self.turn = WHITE if turn == 'w' else BLACK
+
+        self.castling = 0
+        if castling != '-':
+            for symbol, right in CASTLING_SYMBOLS:
+                if symbol in castling:
+                    self.castling |= right
+
+        if ep == '-':
+            self.ep_square = EMPTY
+        elif ep in SQUARES:
+            self.ep_square = SQUARES[ep]
+        else:
+            raise ValueError(f'Invalid FEN en passant square: {ep}')
+
+        try:
+            self.halfmove_clock = int(halfmove)
+            self.fullmove_number = int(fullmove)
+        except ValueError:
+            raise ValueError(f'Invalid FEN move counters: {fen}')
+
+        self.occupied = self.occupied_co[WHITE] | self.occupied_co[BLACK]
+        if self.is_attacked(self.king_square(self.turn ^ 1), self.turn):
+            raise ValueError('FEN has the side not to move in check')
+        self._stack = []
+        self._keys = [self.position_key()]
+
+    def fen(self):
+        """Current position in Forsyth-Edwards Notation"""
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ''
+            empty = 0
+            for file in range(8):
+                code = self.squares[rank * 8 + file]
+                if code == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                symbol = PIECE_SYMBOLS[code & 7]
+                row += symbol.upper() if code >> 3 == WHITE else symbol
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = ''.join(symbol for symbol, right in CASTLING_SYMBOLS if self.castling & right) or '-'
+        ep = SQUARE_NAMES[self.ep_square] if self.ep_square != EMPTY else '-'
+        return (f"{'/'.join(rows)} {'w' if self.turn == WHITE else 'b'} {castling} {ep} "
+                f"{self.halfmove_clock} {self.fullmove_number}")
+
+    def position_key(self):
+        """
+        Hashable identity of the position for repetition detection
+
+        The en passant square only counts when a capture onto it is
+        actually available, as in the FIDE repetition rule.
+        """
+        ep = self.ep_square
+        if ep != EMPTY and not PAWN_ATTACKS[self.turn ^ 1][ep] & self.pieces[self.turn][PAWN]:
+            ep = EMPTY
+        return (tuple(self.pieces[WHITE]), tuple(self.pieces[BLACK]), self.turn, self.castling, ep)
+
+    def repetition_history(self):
+        """position_key() of the earlier positions since the last irreversible move, oldest first"""
+        return self._keys[-(self.halfmove_clock + 1):-1]
+
+    def set_repetition_history(self, keys):
+        """
+        Seed the repetition history of a board set from a FEN, so
+        repetition_count() sees positions from before the FEN
+
+        Args:
+            keys: Earlier position keys, as returned by repetition_history()
+        """
+        self._keys = list(keys) + [self.position_key()]
+
+    # ------------------------------------------
+    # Attacks
+    # ------------------------------------------
+
+    def is_attacked(self, square, by_color):
+        """True if any piece of by_color attacks square"""
+        pieces = self.pieces[by_color]
+        if KNIGHT_ATTACKS[square] & pieces[KNIGHT]:
+            return True
+        if KING_ATTACKS[square] & pieces[KING]:
+            return True
+        if PAWN_ATTACKS[by_color ^ 1][square] & pieces[PAWN]:
+            return True
+        diagonal = pieces[BISHOP] | pieces[QUEEN]
+        if diagonal and bishop_attacks(square, self.occupied) & diagonal:
+            return True
+        straight = pieces[ROOK] | pieces[QUEEN]
+        if straight and rook_attacks(square, self.occupied) & straight:
+            return True
+        return False
+
+    def _attackers_of_type(self, square, ptype):
+        """Pieces of the side to move and of ptype that attack square"""
+        pieces = self.pieces[self.turn][ptype]
+        if ptype == KNIGHT:
+            return KNIGHT_ATTACKS[square] & pieces
+        if ptype == BISHOP:
+            return bishop_attacks(square, self.occupied) & pieces
+        if ptype == ROOK:
+            return rook_attacks(square, self.occupied) & pieces
+        if ptype == QUEEN:
+            return (bishop_attacks(square, self.occupied) | rook_attacks(square, self.occupied)) & pieces
+        return KING_ATTACKS[square] & pieces
+
+    def king_square(self, color):
+        return self.pieces[color][KING].bit_length() - 1
+
+    def is_check(self):
+        """True if the side to move is in check"""
+        return self.is_attacked(self.king_square(self.turn), self.turn ^ 1)
+
+    # ------------------------------------------
+    # Move generation
+    # ------------------------------------------
+
+    def pseudo_legal_moves(self):
+        """Moves that obey piece movement but may leave the king in check"""
+        us = self.turn
+        them = us ^ 1
+        pieces = self.pieces[us]
+        own = self.occupied_co[us]
+        enemy = self.occupied_co[them]
+        occupied = self.occupied
+        empty = ~occupied & 0xFFFFFFFFFFFFFFFF
+        moves = []
+        append = moves.append
+
+        # Pawns
+        pawns = pieces[PAWN]
+        if us == WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+            forward = -8
+            promotion_rank = 7
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+            forward = 8
+            promotion_rank = 0
+        for to in _squares(single):
+            frm = to + forward
+            if to >> 3 == promotion_rank:
+                for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                    append(frm | to << 6 | promotion << 12)
+            else:
+                append(frm | to << 6)
+        for to in _squares(double):
+            append((to + 2 * forward) | to << 6)
+
+        targets = enemy
+        if self.ep_square != EMPTY:
+            targets |= 1 << self.ep_square
+        pawn_attacks = PAWN_ATTACKS[us]
+        for frm in _squares(pawns):
+            for to in _squares(pawn_attacks[frm] & targets):
+                if to >> 3 == promotion_rank:
+                    for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                        append(frm | to << 6 | promotion << 12)
+                else:
+                    append(frm | to << 6)
+
+        # Pieces
+        not_own = ~own
+        for frm in _squares(pieces[KNIGHT]):
+            for to in _squares(KNIGHT_ATTACKS[frm] & not_own):
+                append(frm | to << 6)
+        for frm in _squares(pieces[BISHOP]):
+            for to in _squares(bishop_attacks(frm, occupied) & not_own):
+                append(frm | to << 6)
+        for frm in _squares(pieces[ROOK]):
+            for to in _squares(rook_attacks(frm, occupied) & not_own):
+                append(frm | to << 6)
+        for frm in _squares(pieces[QUEEN]):
+            for to in _squares((rook_attacks(frm, occupied) | bishop_attacks(frm, occupied)) & not_own):
+                append(frm | to << 6)
+        king = self.king_square(us)
+        for to in _squares(KING_ATTACKS[king] & not_own):
+            append(king | to << 6)
+
+        # Castling: path empty, king not in check and not passing an attacked square
+        if self.castling:
+            if us == WHITE:
+                if (self.castling & WHITE_KINGSIDE and not occupied & 0x60 and pieces[ROOK] & 0x80
+                        and not self.is_attacked(4, them) and not self.is_attacked(5, them)):
+                    append(4 | 6 << 6)
+                if (self.castling & WHITE_QUEENSIDE and not occupied & 0x0E and pieces[ROOK] & 0x01
+                        and not self.is_attacked(4, them) and not self.is_attacked(3, them)):
+                    append(4 | 2 << 6)
+            else:
+                if (self.castling & BLACK_KINGSIDE and not occupied & (0x60 << 56) and pieces[ROOK] & (0x80 << 56)
+                        and not self.is_attacked(60, them) and not self.is_attacked(61, them)):
+                    append(60 | 62 << 6)
+                if (self.castling & BLACK_QUEENSIDE and not occupied & (0x0E << 56) and pieces[ROOK] & (0x01 << 56)
+                        and not self.is_attacked(60, them) and not self.is_attacked(59, them)):
+                    append(60 | 58 << 6)
+
+        return moves
+
+    def legal_moves(self):
+        """All legal moves for the side to move"""
+        us = self.turn
+        them = us ^ 1
+        legal = []
+        for move in self.pseudo_legal_moves():
+            self._make(move)
+            if not self.is_attacked(self.pieces[us][KING].bit_length() - 1, them):
+                legal.append(move)
+            self._unmake()
+        return legal
+
+    def has_legal_move(self):
+        """True if the side to move has at least one legal move (stops at the first)"""
+        us = self.turn
+        them = us ^ 1
+        for move in self.pseudo_legal_moves():
+            self._make(move)
+            legal = not self.is_attacked(self.pieces[us][KING].bit_length() - 1, them)
+            self._unmake()
+            if legal:
+                return True
+        return False
+
+    def is_legal(self, move):
+        """True if an encoded move is legal in this position"""
+        if move not in self.pseudo_legal_moves():
+            return False
+        us = self.turn
+        self._make(move)
+        legal = not self.is_attacked(self.pieces[us][KING].bit_length() - 1, us ^ 1)
+        self._unmake()
+        return legal
+
+    def parse_uci(self, uci):
+        """
+        Find the legal move matching UCI notation
+
+        Returns:
+            int: The encoded move, or None if it is not legal here
+        """
+        uci = (uci or '').strip().lower()
+        if len(uci) not in (4, 5) or uci[:2] not in SQUARES or uci[2:4] not in SQUARES:
+            return None
+        promotion = PIECE_SYMBOLS.find(uci[4]) if len(uci) == 5 else 0
+        if promotion < 0:
+            return None
+        move = encode_move(SQUARES[uci[:2]], SQUARES[uci[2:4]], promotion)
+        return move if self.is_legal(move) else None
+
+    # ------------------------------------------
+    # Make / unmake
+    # ------------------------------------------
+
+    def _make(self, move):
+        frm = move & 63
+        to = (move >> 6) & 63
+        promotion = move >> 12
+        us = self.turn
+        them = us ^ 1
+        squares = self.squares
+        pieces = self.pieces[us]
+        code = squares[frm]
+        ptype = code & 7
+        captured = squares[to]
+
+        self._stack.append((move, captured, self.castling, self.ep_square, self.halfmove_clock, self.fullmove_number))
+
+        from_bb = 1 << frm
+        to_bb = 1 << to
+        if captured != EMPTY:
+            self.pieces[them][captured & 7] ^= to_bb
+            self.occupied_co[them] ^= to_bb
+        pieces[ptype] ^= from_bb | to_bb
+        self.occupied_co[us] ^= from_bb | to_bb
+        squares[frm] = EMPTY
+        squares[to] = code
+
+        ep_square = EMPTY
+        if ptype == PAWN:
+            self.halfmove_clock = 0
+            if to == self.ep_square:
+                captured_square = to - 8 if us == WHITE else to + 8
+                self.pieces[them][PAWN] ^= 1 << captured_square
+                self.occupied_co[them] ^= 1 << captured_square
+                squares[captured_square] = EMPTY
+            elif to - frm == 16 or frm - to == 16:
+                ep_square = (frm + to) >> 1
+            if promotion:
+                pieces[PAWN] ^= to_bb
+                pieces[promotion] ^= to_bb
+                squares[to] = us << 3 | promotion
+        else:
+            self.halfmove_clock = 0 if captured != EMPTY else self.halfmove_clock + 1
+            if ptype == KING and (to - frm == 2 or frm - to == 2):
+                rook_from, rook_to = (frm + 3, frm + 1) if to > frm else (frm - 4, frm - 1)
+                rook_bb = 1 << rook_from | 1 << rook_to
+                pieces[ROOK] ^= rook_bb
+                self.occupied_co[us] ^= rook_bb
+                squares[rook_to] = squares[rook_from]
+                squares[rook_from] = EMPTY
+
+        self.castling &= CASTLING_MASK[frm] & CASTLING_MASK[to]
+        self.ep_square = ep_square
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.turn = them
+        self.occupied = self.occupied_co[WHITE] | self.occupied_co[BLACK]
+
+    def _unmake(self):
+        move, captured, castling, ep_square, halfmove_clock, fullmove_number = self._stack.pop()
+        frm = move & 63
+        to = (move >> 6) & 63
+        promotion = move >> 12
+        them = self.turn
+        us = them ^ 1
+        squares = self.squares
+        pieces = self.pieces[us]
+        from_bb = 1 << frm
+        to_bb = 1 << to
+
+        code = squares[to]
+        if promotion:
+            pieces[promotion] ^= to_bb
+            pieces[PAWN] ^= to_bb
+            code = us << 3 | PAWN
+        ptype = code & 7
+
+        pieces[ptype] ^= from_bb | to_bb
+        self.occupied_co[us] ^= from_bb | to_bb
+        squares[frm] = code
+        squares[to] = captured
+        if captured != EMPTY:
+            self.pieces[them][captured & 7] ^= to_bb
+            self.occupied_co[them] ^= to_bb
+
+        if ptype == PAWN and to == ep_square:
+            captured_square = to - 8 if us == WHITE else to + 8
+            self.pieces[them][PAWN] ^= 1 << captured_square
+            self.occupied_co[them] ^= 1 << captured_square
+            squares[captured_square] = them << 3 | PAWN
+        elif ptype == KING and (to - frm == 2 or frm - to == 2):
+            rook_from, rook_to = (frm + 3, frm + 1) if to > frm else (frm - 4, frm - 1)
+            rook_bb = 1 << rook_from | 1 << rook_to
+            pieces[ROOK] ^= rook_bb
+            self.occupied_co[us] ^= rook_bb
+            squares[rook_from] = squares[rook_to]
+            squares[rook_to] = EMPTY
+
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.turn = us
+        self.occupied = self.occupied_co[WHITE] | self.occupied_co[BLACK]
+
+    def push(self, move):
+        """Play a legal move and record the position for repetition checks"""
+        self._make(move)
+        self._keys.append(self.position_key())
+
+    def push_uci(self, uci):
+        """
+        Validate and play a move given in UCI notation
+
+        Returns:
+            str: The move in SAN
+
+        Raises:
+            ValueError: If the move is not legal in this position
+        """
+        move = self.parse_uci(uci)
+        if move is None:
+            raise ValueError(f'Illegal move: {uci}')
+        san = self.san(move)
+        self.push(move)
+        return san
+
+    # ------------------------------------------
+    # Notation
+    # ------------------------------------------
+
+    def san(self, move):
+        """Standard Algebraic Notation for a legal move in this position"""
+        frm = move & 63
+        to = (move >> 6) & 63
+        promotion = move >> 12
+        ptype = self.squares[frm] & 7
+
+        if ptype == KING and (to - frm == 2 or frm - to == 2):
+            san = 'O-O' if to > frm else 'O-O-O'
+        else:
+            capture = self.squares[to] != EMPTY or (ptype == PAWN and to == self.ep_square)
+            if ptype == PAWN:
+                san = SQUARE_NAMES[frm][0] + 'x' if capture else ''
+                san += SQUARE_NAMES[to]
+                if promotion:
+                    san += '=' + PIECE_SYMBOLS[promotion].upper()
+            else:
+                san = PIECE_SYMBOLS[ptype].upper()
+                rivals = []
+                # Only generate legal moves when another piece of this type reaches the square
+                if self._attackers_of_type(to, ptype) & ~(1 << frm):
+                    rivals = [
+                        other & 63 for other in self.legal_moves()
+                        if (other >> 6) & 63 == to and other & 63 != frm and self.squares[other & 63] & 7 == ptype
+                    ]
+                if rivals:
+                    if all(square & 7 != frm & 7 for square in rivals):
+                        san += SQUARE_NAMES[frm][0]
+                    elif all(square >> 3 != frm >> 3 for square in rivals):
+                        san += SQUARE_NAMES[frm][1]
+                    else:
+                        san += SQUARE_NAMES[frm]
+                if capture:
+                    san += 'x'
+                san += SQUARE_NAMES[to]
+
+        self._make(move)
+        if self.is_check():
+            san += '+' if self.has_legal_move() else '#'
+        self._unmake()
+        return san
+
+    # ------------------------------------------
+    # Game state
+    # ------------------------------------------
+
+    def is_insufficient_material(self):
+        """True if neither side can possibly checkmate"""
+        white, black = self.pieces
+        if white[PAWN] | black[PAWN] | white[ROOK] | black[ROOK] | white[QUEEN] | black[QUEEN]:
+            return False
+        knights = white[KNIGHT] | black[KNIGHT]
+        bishops = white[BISHOP] | black[BISHOP]
+        minors = bin(knights | bishops).count('1')
+        if minors <= 1:
+            return True
+        # Only bishops, all on squares of one colour
+        return not knights and (not bishops & LIGHT_SQUARES or not bishops & ~LIGHT_SQUARES)
+
+    def repetition_count(self):
+        """How many times the current position has occurred since the last irreversible move"""
+        key = self._keys[-1]
+        recent = self._keys[-(self.halfmove_clock + 1):]
+        return recent.count(key)
+
+    def outcome(self):
+        """
+        Terminal state of the position, if any
+
+        Returns:
+            dict: {'termination', 'winner', 'result'} where result is a
+                Game.RESULT value, or None while the game goes on
+        """
+        if not self.has_legal_move():
+            if self.is_check():
+                winner = 'black' if self.turn == WHITE else 'white'
+                return {'termination': 'checkmate', 'winner': winner, 'result': f'{winner}_win'}
+            return {'termination': 'stalemate', 'winner': None, 'result': 'stalemate'}
+        if self.is_insufficient_material():
+            return {'termination': 'insufficient_material', 'winner': None, 'result': 'draw'}
+        if self.halfmove_clock >= 100:
+            return {'termination': 'fifty_moves', 'winner': None, 'result': 'draw'}
+        if self.repetition_count() >= 3:
+            return {'termination': 'threefold_repetition', 'winner': None, 'result': 'draw'}
+        return None
+
+    def perft(self, depth):
+        """Count leaf nodes of the legal move tree to the given depth"""
+        if depth == 0:
+            return 1
+        moves = self.legal_moves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self._make(move)
+            nodes += self.perft(depth - 1)
+            self._unmake()
+        return nodes
+
+
+def replay(uci_moves, fen=STARTING_FEN):
+    """
+    Play a sequence of UCI moves from a position
+
+    Returns:
+        Board: The resulting board, with repetition history
+
+    Raises:
+        ValueError: If any move is illegal
+    """
+    board = Board(fen)
+    for uci in uci_moves:
+        move = board.parse_uci(uci)
+        if move is None:
+            raise ValueError(f'Illegal move: {uci}')
+        board.push(move)
+    return board
@@ -0,0 +1,283 @@
+"""
+Clock Scheduler
+Hashed timer wheel running on the ASGI event loop that ends games on
+flag-fall, so nobody has to wait for a client to report a timeout.
+
+Every move reschedules the game's timer; a fired timer calls
+game_clock.flag_game, which re-checks the clock and ends the game with a
+conditional UPDATE. A timer that fires before the flag has fallen (the
+deadline moved, or was read from another process) is armed again.
+
+Server processes (asgi.py and wsgi.py) start the wheel on a daemon thread
+with its own event loop when they load (settings.FLAG_SCHEDULER_ON_STARTUP);
+an ASGI process with that turned off runs it on its own loop once a
+WebSocket connects. Nothing else starts it, so management commands and
+test runs never get a timer thread.
+"""
+import asyncio
+import logging
+import math
+import threading
+
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWheel:
+    """
+    Timer wheel with one timer per key
+
+    Args:
+        callback: Coroutine function called with the key when its timer fires
+        tick: Wheel resolution in seconds
+        slots: Number of buckets; delays longer than tick * slots wrap around
+    """
+
+    def __init__(self, callback, tick=0.1, slots=600):
+        self.callback = callback
+        self.tick = tick
+        self.slots = slots
+        self._wheel = [{} for _ in range(slots)]
+        self._slot_of = {}
+        self._cursor = 0
+        self._loop = None
+        self._task = None
+
+    @property
+    def running(self):
+        return (self._task is not None and not self._task.done()
+                and self._loop is not None and not self._loop.is_closed())
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    def __contains__(self, key):
+        return key in self._slot_of
+
+    def start(self):
+        """Start ticking on the running event loop"""
+        if self.running:
+            return False
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+        return True
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._task = None
+        self._loop = None
+
+    def schedule(self, key, delay):
+        """Fire key after delay seconds, replacing any earlier timer for it"""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % self.slots
+        # Full turns of the wheel to skip before the timer is due
+        self._wheel[slot][key] = (ticks - 1) // self.slots
+        self._slot_of[key] = slot
+
+    def cancel(self, key):
+        slot = self._slot_of.pop(key, None)
+        if slot is not None:
+            self._wheel[slot].pop(key, None)
+
+    def call_threadsafe(self, method, *args):
+        """
+        Run schedule/cancel from any thread (sync views run in worker threads)
+
+        Returns:
+            bool: False if the wheel is not running in this process
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            method(*args)
+        else:
+            loop.call_soon_threadsafe(method, *args)
+        return True
+
+    def advance(self):
+        """Move to the next slot and return the keys that are due"""
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        due = []
+        for key, rounds in list(bucket.items()):
+            if rounds:
+                bucket[key] = rounds - 1
+            else:
+                del bucket[key]
+                del self._slot_of[key]
+                due.append(key)
+        return due
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.tick
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+            for key in self.advance():
+                loop.create_task(self._fire(key))
+
+    async def _fire(self, key):
+        try:
+            await self.callback(key)
+        except Exception as e:
+            logger.error(f"[CLOCK] Timer for {key} failed: {e}", exc_info=True)
+
+
+def _pending_deadline(game_id):
+    from .game_clock import flag_deadline
+    from .models import Game
+
+    game = Game.objects.filter(game_id=game_id).first()
+    return flag_deadline(game) if game else None
+
+
+async def _flag(game_id):
+    from channels.db import database_sync_to_async
+    from .game_clock import flag_game
+
+    if await database_sync_to_async(flag_game)(game_id) is not None:
+        return
+    # Fired early: arm again from the stored deadline, unless a move already did
+    deadline = await database_sync_to_async(_pending_deadline)(game_id)
+    scheduler = get_flag_scheduler()
+    if deadline is None or game_id in scheduler:
+        return
+    delay = (deadline - timezone.now()).total_seconds()
+    if delay > 0:
+        scheduler.schedule(game_id, delay)
+
+
+# Seconds between attempts to load the running clocks, doubled up to the cap
+LOAD_RETRY_DELAY = 5
+LOAD_RETRY_MAX_DELAY = 60
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+_thread_lock = threading.Lock()
+_load_task = None
+
+
+def get_flag_scheduler():
+    """Return the process-wide flag-fall timer wheel"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = TimerWheel(_flag)
+    return _scheduler
+
+
+async def load_running_clocks(scheduler):
+    """
+    Arm a timer for every game already running (e.g. after a restart)
+
+    Returns:
+        bool: False if the deadlines could not be read
+    """
+    from channels.db import database_sync_to_async
+    from .game_clock import running_deadlines
+
+    try:
+        deadlines = await database_sync_to_async(running_deadlines)()
+    except Exception as e:
+        logger.error(f"[CLOCK] Could not load running clocks: {e}", exc_info=True)
+        return False
+    now = timezone.now()
+    for game_id, deadline in deadlines:
+        # Timers armed by moves since the wheel started are newer than this read
+        if game_id not in scheduler:
+            scheduler.schedule(game_id, (deadline - now).total_seconds())
+    logger.info(f"[CLOCK] Flag scheduler started with {len(deadlines)} running clocks")
+    return True
+
+
+async def _retry_load(scheduler):
+    delay = LOAD_RETRY_DELAY
+    while scheduler.running:
+        await asyncio.sleep(delay)
+        if await load_running_clocks(scheduler):
+            return
+        delay = min(delay * 2, LOAD_RETRY_MAX_DELAY)
+
+
+async def ensure_flag_scheduler(started=None):
+    """
+    Start the timer wheel on the current event loop and load the deadlines
+    of games already running; a failed load is retried in the background
+
+    Args:
+        started: threading.Event set as soon as the wheel accepts timers
+    """
+    global _load_task
+
+    scheduler = get_flag_scheduler()
+    if not scheduler.start():
+        return
+    if started is not None:
+        started.set()
+    if not await load_running_clocks(scheduler):
+        _load_task = asyncio.get_running_loop().create_task(_retry_load(scheduler))
+
+
+def start_flag_scheduler_thread(timeout=5):
+    """
+    Run the timer wheel on a daemon thread with its own event loop
+
+    Returns:
+        bool: True once the wheel is running in this process
+    """
+    scheduler = get_flag_scheduler()
+    with _thread_lock:
+        if scheduler.running:
+            return True
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.create_task(ensure_flag_scheduler(started))
+            loop.run_forever()
+
+        threading.Thread(target=run, name='flag-scheduler', daemon=True).start()
+        if not started.wait(timeout):
+            logger.error("[CLOCK] Flag scheduler thread did not start")
+            return False
+    return True
+
+
+def start_in_background():
+    """Start the timer wheel thread when a server process loads, if enabled"""
+    from django.conf import settings
+
+    if not settings.FLAG_SCHEDULER_ON_STARTUP:
+        return
+    start_flag_scheduler_thread()
+
+
+def schedule_flag(game):
+    """
+    Arm (or disarm) the game's flag timer after its clock changed
+
+    Without a running wheel (e.g. management commands) nothing is armed;
+    the wheel's startup load picks the game up once a server runs it.
+    """
+    from .game_clock import flag_deadline
+
+    scheduler = get_flag_scheduler()
+    deadline = flag_deadline(game)
+    if deadline is None:
+        scheduler.call_threadsafe(scheduler.cancel, game.game_id)
+        return
+    delay = (deadline - timezone.now()).total_seconds()
+    if not scheduler.call_threadsafe(scheduler.schedule, game.game_id, delay):
+        logger.debug(f"[CLOCK] No flag timer for game {game.game_id}: scheduler not running here")
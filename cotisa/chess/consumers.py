@@ -5,6 +5,57 @@ import json
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from asgiref.sync import sync_to_async
+import logging
+
+from .json_encoding import dumps_text
+
+logger = logging.getLogger(__name__)
+
+
+@database_sync_to_async
+def get_player_id_for_token(token):
+    """Resolve an auth token to an active player's ID"""
+    from .decorators import authenticate_token
+    player = authenticate_token(token)
+    return player.player_id if player else None
+
+
+@database_sync_to_async
+def get_clock_snapshot(game_id):
+    """Current authoritative clock of a game, or None if it does not exist"""
+    from .models import Game
+    from .game_clock import clock_snapshot
+    game = Game.objects.filter(game_id=game_id).first()
+    return clock_snapshot(game) if game else None
+
+
+@database_sync_to_async
+def can_view_game(game_id, player_id):
+    """Same access as GET /api/game/<game_id>/spectate/"""
+    from .game_state import get_state
+    from .game_views import spectate_denied
+    state = get_state(game_id)
+    return state is not None and spectate_denied(state, player_id) is None
+
+
+@database_sync_to_async
+def can_view_tournament(tournament_id, player_id):
+    """Same access as GET /api/tournaments/<tournament_id>/games/"""
+    from .models import TournamentActive
+    from .game_views import is_tournament_member
+    creator_id = TournamentActive.objects.filter(
+        tournament_id=tournament_id
+    ).values_list('created_by_id', flat=True).first()
+    if creator_id is None:
+        return False
+    return is_tournament_member(tournament_id, creator_id, player_id)
+
+
+@database_sync_to_async
+def get_tournament_boards(tournament_id):
+    """Running boards of a tournament for a new spectator"""
+    from .game_state import tournament_boards
+    return tournament_boards(tournament_id)
 
 
 class GameConsumer(AsyncWebsocketConsumer):
@@ -15,6 +66,7 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def connect(self):
         self.user_id = self.scope['url_route']['kwargs'].get('user_id')
+        self.player_id = None  # Set once the client sends a valid 'authenticate' message
         self.user_group = f'user_{self.user_id}'
         
         # Join user's personal group for notifications
@@ -31,8 +83,12 @@ class GameConsumer(AsyncWebsocketConsumer):
         
         await self.accept()
         
+        # Flag-fall timers run on this process's event loop
+        from .clock_scheduler import ensure_flag_scheduler
+        await ensure_flag_scheduler()
+        
         # Send connection confirmation
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'connection_established',
             'message': 'Connected to COTISA real-time server',
             'user_id': self.user_id
@@ -56,21 +112,31 @@ class GameConsumer(AsyncWebsocketConsumer):
             message_type = data.get('type')
             
             if message_type == 'ping':
-                await self.send(text_data=json.dumps({
+                await self.send(text_data=dumps_text({
                     'type': 'pong'
                 }))
             
+            elif message_type == 'authenticate':
+                await self.authenticate(data.get('token'))
+            
+            elif message_type == 'make_move':
+                await self.make_move(data)
+            
             elif message_type == 'join_game':
                 game_id = data.get('game_id')
-                if game_id:
+                if game_id and await self.may_join('game', game_id, can_view_game):
                     await self.channel_layer.group_add(
                         f'game_{game_id}',
                         self.channel_name
                     )
-                    await self.send(text_data=json.dumps({
+                    await self.send(text_data=dumps_text({
                         'type': 'joined_game',
                         'game_id': game_id
                     }))
+                    # Clients sync to the server clock instead of polling for it
+                    snapshot = await get_clock_snapshot(game_id)
+                    if snapshot:
+                        await self.clock_update(snapshot)
             
             elif message_type == 'leave_game':
                 game_id = data.get('game_id')
@@ -82,15 +148,21 @@ class GameConsumer(AsyncWebsocketConsumer):
             
             elif message_type == 'join_tournament':
                 tournament_id = data.get('tournament_id')
-                if tournament_id:
+                if tournament_id and await self.may_join('tournament', tournament_id, can_view_tournament):
                     await self.channel_layer.group_add(
                         f'tournament_{tournament_id}',
                         self.channel_name
                     )
-                    await self.send(text_data=json.dumps({
+                    await self.send(text_data=dumps_text({
                         'type': 'joined_tournament',
                         'tournament_id': tournament_id
                     }))
+                    # One snapshot of every board; board_update deltas follow
+                    await self.send(text_data=dumps_text({
+                        'type': 'tournament_boards',
+                        'tournament_id': tournament_id,
+                        'boards': await get_tournament_boards(tournament_id)
+                    }))
             
             elif message_type == 'leave_tournament':
                 tournament_id = data.get('tournament_id')
@@ -103,11 +175,104 @@ class GameConsumer(AsyncWebsocketConsumer):
         except json.JSONDecodeError:
             pass
     
+    async def authenticate(self, token):
+        """Bind the socket to the player owning the auth token"""
+        player_id = await get_player_id_for_token(token) if token else None
+        if player_id is None or str(player_id) != str(self.user_id):
+            self.player_id = None
+            await self.send(text_data=dumps_text({
+                'type': 'authentication_failed',
+                'error': 'Invalid or expired token'
+            }))
+            return
+        
+        self.player_id = player_id
+        await self.send(text_data=dumps_text({
+            'type': 'authenticated',
+            'user_id': player_id
+        }))
+    
+    async def may_join(self, kind, object_id, check):
+        """
+        Whether this socket may subscribe to a game or tournament group;
+        refusals are answered with join_refused
+        
+        Args:
+            kind: 'game' or 'tournament'
+            object_id: ID sent by the client
+            check: can_view_game or can_view_tournament
+        """
+        if not self.player_id:
+            error = 'Authentication required'
+        else:
+            try:
+                allowed = await check(int(object_id), self.player_id)
+            except (TypeError, ValueError):
+                allowed = False
+            if allowed:
+                return True
+            error = 'Nemaš pristup'
+        
+        await self.send(text_data=dumps_text({
+            'type': 'join_refused',
+            f'{kind}_id': object_id,
+            'error': error
+        }))
+        return False
+    
+    async def make_move(self, data):
+        """
+        Validate and persist a move, then push it to the game group
+        Body: {type: 'make_move', game_id, move: {from, to, promotion}, move_id}
+        """
+        from .game_moves import apply_move, game_messages
+        from .middleware import APIException
+        from .publisher import get_publisher
+        
+        game_id = data.get('game_id')
+        move_id = data.get('move_id')
+        
+        if not self.player_id:
+            await self.send_move_rejected(game_id, move_id, 'Authentication required', 401)
+            return
+        if not game_id:
+            await self.send_move_rejected(game_id, move_id, 'game_id is required', 400)
+            return
+        
+        try:
+            event = await database_sync_to_async(apply_move)(
+                game_id, self.player_id, data.get('move') or {}, broadcast=False
+            )
+        except APIException as e:
+            await self.send_move_rejected(game_id, move_id, e.message, e.status_code)
+            return
+        except Exception as e:
+            logger.exception(f"Error making move in game {game_id}: {str(e)}")
+            await self.send_move_rejected(game_id, move_id, 'Greška pri spremanju poteza', 500)
+            return
+        
+        await self.send(text_data=dumps_text({
+            'type': 'move_accepted',
+            'move_id': move_id,
+            **event
+        }))
+        await get_publisher().apublish_many(game_messages(event))
+    
+    async def send_move_rejected(self, game_id, move_id, error, status):
+        """Tell the sender their move was not applied"""
+        await self.send(text_data=dumps_text({
+            'type': 'move_rejected',
+            'game_id': game_id,
+            'move_id': move_id,
+            'error': error,
+            'status': status
+        }))
+    
     # Event handlers for group messages
     
     async def game_update(self, event):
         """Send game update to WebSocket"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'game_update',
             'game_id': event.get('game_id'),
             'data': event.get('data')
@@ -115,26 +280,49 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def game_move(self, event):
         """Send game move to WebSocket"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'game_move',
             'game_id': event.get('game_id'),
             'move': event.get('move'),
             'fen': event.get('fen'),
-            'player': event.get('player')
+            'player': event.get('player'),
+            'current_turn': event.get('current_turn'),
+            'move_count': event.get('move_count'),
+            'white_time_remaining': event.get('white_time_remaining'),
+            'black_time_remaining': event.get('black_time_remaining'),
+            'outcome': event.get('outcome'),
+            'clock': event.get('clock')
+        }))
+    
+    async def clock_update(self, event):
+        """Send authoritative clock state (milliseconds left, measured at server_time)"""
+        await self.send(text_data=dumps_text({
+            'type': 'clock_update',
+            'game_id': event.get('game_id'),
+            'white_ms': event.get('white_ms'),
+            'black_ms': event.get('black_ms'),
+            'turn': event.get('turn'),
+            'running': event.get('running'),
+            'server_time': event.get('server_time')
         }))
     
     async def game_end(self, event):
         """Send game end notification"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'game_end',
             'game_id': event.get('game_id'),
             'result': event.get('result'),
-            'winner': event.get('winner')
+            'winner': event.get('winner'),
+            'termination': event.get('termination')
         }))
     
+    async def board_update(self, event):
+        """Send a compact board delta (move, clock or result) from the tournament stream"""
+        await self.send(text_data=dumps_text(event))
+    
     async def tournament_update(self, event):
         """Send tournament update to WebSocket"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'tournament_update',
             'tournament_id': event.get('tournament_id'),
             'data': event.get('data')
@@ -142,14 +330,14 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def notification(self, event):
         """Send notification to user"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'notification',
             'notification': event.get('notification')
         }))
     
     async def match_update(self, event):
         """Send match update"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'match_update',
             'match_id': event.get('match_id'),
             'data': event.get('data')
@@ -157,7 +345,7 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def tournament_round_update(self, event):
         """Send tournament round update (new round created)"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'tournament_round_update',
             'tournament_id': event.get('tournament_id'),
             'round_number': event.get('round_number'),
@@ -167,7 +355,7 @@ class GameConsumer(AsyncWebsocketConsumer):
     
     async def new_round(self, event):
         """Send new round notification"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps_text({
             'type': 'new_round',
             'tournament_id': event.get('tournament_id'),
             'round_number': event.get('round_number'),
@@ -178,18 +366,37 @@ class GameConsumer(AsyncWebsocketConsumer):
 # Helper function to send WebSocket messages from Django views
 def send_websocket_message(group_name, message_type, data):
     """
-    Send a message to a WebSocket group from a synchronous context
+    Publish a message to a WebSocket group from a synchronous context
     Usage: send_websocket_message('game_123', 'game_move', {'move': 'e2e4'})
+    
+    Goes through the WebSocket publisher, so in background mode the view
+    only enqueues and never waits on the channel layer.
+    """
+    from .publisher import get_publisher
+    
+    return get_publisher().publish(group_name, message_type, data)
+
+
+def send_websocket_messages(messages):
+    """
+    Send many WebSocket messages from a synchronous context in one flush
+    Usage: send_websocket_messages([('user_1', 'new_round', {...}), ('user_2', 'new_round', {...})])
+    
+    All groups are sent inside a single async_to_sync call instead of one
+    event loop hop per message; each group's messages keep their order.
+    
+    Returns:
+        int: Number of messages sent
     """
     from channels.layers import get_channel_layer
     from asgiref.sync import async_to_sync
+    from .publisher import group_send_ordered
     
     channel_layer = get_channel_layer()
-    if channel_layer:
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': message_type.replace('-', '_'),
-                **data
-            }
-        )
+    if not channel_layer or not messages:
+        return 0
+    
+    errors = async_to_sync(group_send_ordered)(channel_layer, messages)
+    if errors:
+        logger.error(f"[PUBLISH] {len(errors)} of {len(messages)} WebSocket messages failed: {errors[0]}")
+    return len(messages) - len(errors)
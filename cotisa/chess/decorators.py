@@ -5,12 +5,260 @@ This module contains shared decorators used across the application.
 Import from here instead of duplicating code.
 """
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from datetime import timedelta
 from functools import wraps
+import hashlib
+import hmac
 import logging
+import secrets
+import threading
+import time
+from .json_encoding import JsonResponse
 
 logger = logging.getLogger(__name__)
 
+AUTH_CACHE_ALIAS = 'auth'
+
+_auth_metrics = {'hits': 0, 'misses': 0, 'invalid': 0, 'invalidations': 0}
+_auth_metrics_lock = threading.Lock()
+
+# token_id -> last time it was seen, written to auth_tokens in batches
+_last_used = {}
+_last_used_lock = threading.Lock()
+_last_used_flushed = time.monotonic()
+
+
+def _count(metric):
+    with _auth_metrics_lock:
+        _auth_metrics[metric] += 1
+
+
+def get_auth_metrics():
+    """Token cache counters for this process"""
+    with _auth_metrics_lock:
+        metrics = dict(_auth_metrics)
+    lookups = metrics['hits'] + metrics['misses']
+    metrics['hit_rate'] = metrics['hits'] / lookups if lookups else 0.0
+    return metrics
+
+
+def hash_token(token):
+    """Keyed hash stored in auth_tokens.token_hash; tokens never reach the database or cache in the clear"""
+    return hmac.new(settings.AUTH_TOKEN_HASH_KEY.encode(), token.encode(), hashlib.sha256).hexdigest()
+
+
+def device_label(request):
+    """Short description of the client a token is issued to"""
+    return request.headers.get('User-Agent', '')[:100]
+
+
+def _auth_cache():
+    return caches[AUTH_CACHE_ALIAS]
+
+
+def _generation():
+    # Bumped on role changes so every cached player is dropped at once
+    return _auth_cache().get('auth:generation', 0)
+
+
+def _token_key(token_hash):
+    return f'auth:{_generation()}:token:{token_hash}'
+
+
+def _player_key(player_id):
+    return f'auth:player:{player_id}'
+
+
+def issue_token(player, device_label='', token=None):
+    """
+    Create a new session token for a player
+
+    Older sessions beyond AUTH_TOKEN_MAX_SESSIONS are revoked.
+
+    Args:
+        player: Player the token is issued to
+        device_label: Client description shown in the session list
+        token: Token to store (generated if omitted)
+
+    Returns:
+        str: The plaintext token - the only time it is available
+    """
+    from .models import AuthToken  # Import here to avoid circular imports
+
+    token = token or secrets.token_urlsafe(32)
+    now = timezone.now()
+    AuthToken.objects.create(
+        player=player,
+        token_hash=hash_token(token),
+        device_label=device_label[:100],
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.AUTH_TOKEN_TTL),
+    )
+
+    stale = list(AuthToken.objects.filter(player=player).order_by('-created_at', '-token_id').values_list(
+        'token_id', flat=True
+    )[settings.AUTH_TOKEN_MAX_SESSIONS:])
+    if stale:
+        AuthToken.objects.filter(token_id__in=stale).delete()
+    return token
+
+
+def rotate_token(token, device_label=None):
+    """
+    Replace a valid token with a fresh one (new expiry, old token revoked)
+
+    Returns:
+        str: The new token, or None if the old one is invalid or expired
+    """
+    from .models import AuthToken  # Import here to avoid circular imports
+
+    current = AuthToken.objects.select_related('player').filter(
+        token_hash=hash_token(token), expires_at__gt=timezone.now(), player__is_active=True
+    ).first()
+    if current is None:
+        return None
+    new_token = issue_token(current.player, current.device_label if device_label is None else device_label)
+    current.delete()
+    return new_token
+
+
+def revoke_token(token):
+    """Log out one session"""
+    from .models import AuthToken  # Import here to avoid circular imports
+
+    AuthToken.objects.filter(token_hash=hash_token(token)).delete()
+
+
+def revoke_player_tokens(player_id, keep=None):
+    """
+    Log out every session of a player (password change or reset)
+
+    Args:
+        player_id: Player whose sessions are revoked
+        keep: Plaintext token of the session that stays logged in
+    """
+    from .models import AuthToken  # Import here to avoid circular imports
+
+    tokens = AuthToken.objects.filter(player_id=player_id)
+    if keep:
+        tokens = tokens.exclude(token_hash=hash_token(keep))
+    tokens.delete()
+
+
+def authenticate_token(token):
+    """
+    Resolve an auth token to its active Player (with role loaded)
+
+    A miss is a single query on the unique token_hash index; hits are
+    served from the 'auth' cache for up to AUTH_CACHE_TIMEOUT seconds, never
+    past the token's expiry. Entries are dropped whenever the token or the
+    player row changes (see signals.py).
+
+    Returns:
+        Player or None
+    """
+    from .models import AuthToken  # Import here to avoid circular imports
+
+    if not token:
+        return None
+    token_hash = hash_token(token)
+    key = _token_key(token_hash)
+    cache = _auth_cache()
+    now = timezone.now()
+    entry = cache.get(key)
+    if entry is not None and entry['expires_at'] > now:
+        _count('hits')
+        touch_token(entry['token_id'], now)
+        return entry['player']
+
+    _count('misses')
+    auth = AuthToken.objects.select_related('player__role').filter(
+        token_hash=token_hash, expires_at__gt=now, player__is_active=True
+    ).first()
+    if auth is None:
+        _count('invalid')
+        return None
+
+    player = auth.player
+    player_key = _player_key(player.player_id)
+    token_hashes = cache.get(player_key) or []
+    if token_hash not in token_hashes:
+        token_hashes = token_hashes + [token_hash]
+    timeout = settings.AUTH_CACHE_TIMEOUT
+    cache.set(player_key, token_hashes, timeout)
+    cache.set(key, {'player': player, 'token_id': auth.token_id, 'expires_at': auth.expires_at},
+              max(1, min(timeout, int((auth.expires_at - now).total_seconds()))))
+    touch_token(auth.token_id, now)
+    return player
+
+
+def touch_token(token_id, now):
+    """
+    Record that a token was used
+
+    Kept in memory and written with one bulk UPDATE at most every
+    AUTH_LAST_USED_FLUSH_SECONDS, so authentication adds no write to
+    ordinary requests.
+    """
+    global _last_used_flushed
+    with _last_used_lock:
+        _last_used[token_id] = now
+        if time.monotonic() - _last_used_flushed < settings.AUTH_LAST_USED_FLUSH_SECONDS:
+            return
+        _last_used_flushed = time.monotonic()
+    flush_last_used()
+
+
+def flush_last_used():
+    """
+    Write the pending last_used_at timestamps
+
+    Returns:
+        int: Number of tokens updated
+    """
+    from .models import AuthToken  # Import here to avoid circular imports
+
+    with _last_used_lock:
+        pending = dict(_last_used)
+        _last_used.clear()
+    if not pending:
+        return 0
+    try:
+        AuthToken.objects.bulk_update(
+            [AuthToken(token_id=token_id, last_used_at=used_at) for token_id, used_at in pending.items()],
+            ['last_used_at'],
+            batch_size=500,
+        )
+    except Exception as e:
+        logger.error(f"Could not record token use for {len(pending)} tokens: {e}")
+        return 0
+    return len(pending)
+
+
+def invalidate_token(token_hash):
+    """Forget one cached token"""
+    _auth_cache().delete(_token_key(token_hash))
+    _count('invalidations')
+
+
+def invalidate_player(player_id):
+    """Forget every cached token of a player (deactivation, deletion, role change)"""
+    cache = _auth_cache()
+    player_key = _player_key(player_id)
+    token_hashes = cache.get(player_key) or []
+    cache.delete_many([player_key] + [_token_key(token_hash) for token_hash in token_hashes])
+    _count('invalidations')
+
+
+def invalidate_all_players():
+    """Drop every cached token, e.g. after a role's permissions changed"""
+    cache = _auth_cache()
+    cache.set('auth:generation', _generation() + 1, None)
+    _count('invalidations')
+
 
 def token_required(view_func):
     """
@@ -24,8 +272,6 @@ def token_required(view_func):
     """
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        from .models import Player  # Import here to avoid circular imports
-        
         # Get token from X-Auth-Token header
         auth_token = request.headers.get('X-Auth-Token')
         
@@ -37,22 +283,19 @@ def token_required(view_func):
                 'message': 'Please provide X-Auth-Token header'
             }, status=401)
         
-        try:
-            # Find user by token
-            player = Player.objects.select_related('role').get(
-                auth_token=auth_token, 
-                is_active=True
-            )
-            # Attach player to request
-            request.user = player
-            return view_func(request, *args, **kwargs)
-        except Player.DoesNotExist:
+        # Find user by token
+        player = authenticate_token(auth_token)
+        if player is None:
             logger.warning(f"Invalid token attempt: {auth_token[:8]}...")
             return JsonResponse({
                 'error': 'Invalid or expired token',
                 'code': 'INVALID_TOKEN',
                 'message': 'Please login again'
             }, status=401)
+        
+        # Attach player to request
+        request.user = player
+        return view_func(request, *args, **kwargs)
     
     return wrapper
 
@@ -0,0 +1,234 @@
+"""
+Game Clock
+Millisecond chess clock kept on the Game row. The stored values are the
+remaining times at last_move_time; the side to move's time runs from
+there. Flag-fall ends the game on the server (see clock_scheduler).
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .middleware import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Game columns written whenever the clock changes
+CLOCK_FIELDS = (
+    'white_clock_ms', 'black_clock_ms',
+    'white_time_remaining', 'black_time_remaining',
+    'last_move_time',
+)
+
+
+class ClockExpired(ValidationError):
+    """The player's flag fell before the move arrived"""
+    error_code = 'CLOCK_EXPIRED'
+    message = 'Vrijeme je isteklo'
+
+
+def is_timed(game):
+    return bool(game.time_control_minutes)
+
+
+def stored_clock_ms(game):
+    """
+    Remaining (white_ms, black_ms) as of last_move_time
+
+    Games created before the millisecond fields existed fall back to the
+    whole-second columns.
+    """
+    if not is_timed(game):
+        return None, None
+    white = game.white_clock_ms
+    black = game.black_clock_ms
+    if white is None:
+        white = (game.white_time_remaining or 0) * 1000
+    if black is None:
+        black = (game.black_time_remaining or 0) * 1000
+    return white, black
+
+
+def elapsed_ms(game, now):
+    if not game.last_move_time:
+        return 0
+    return max(0, int((now - game.last_move_time).total_seconds() * 1000))
+
+
+def live_clock_ms(game, now=None):
+    """Remaining (white_ms, black_ms) right now, with the running side's time deducted"""
+    white, black = stored_clock_ms(game)
+    if white is None or game.status != 'in_progress' or not game.last_move_time:
+        return white, black
+    spent = elapsed_ms(game, now or timezone.now())
+    if game.current_turn == 'white':
+        white = max(0, white - spent)
+    else:
+        black = max(0, black - spent)
+    return white, black
+
+
+def live_clock_seconds(game, now=None):
+    """Remaining (white, black) in whole seconds for the legacy *_time_remaining fields"""
+    white, black = live_clock_ms(game, now)
+    if white is None:
+        return game.white_time_remaining, game.black_time_remaining
+    return white // 1000, black // 1000
+
+
+def set_clock_ms(game, white, black):
+    game.white_clock_ms = white
+    game.black_clock_ms = black
+    game.white_time_remaining = white // 1000
+    game.black_time_remaining = black // 1000
+
+
+def is_flagged(game, now):
+    """True if the side to move has run out of time"""
+    white, black = live_clock_ms(game, now)
+    if white is None or game.status != 'in_progress' or not game.last_move_time:
+        return False
+    return (white if game.current_turn == 'white' else black) <= 0
+
+
+def start_clock(game, now):
+    """Start the clock when both players have joined"""
+    game.last_move_time = now
+    if is_timed(game):
+        set_clock_ms(game, *stored_clock_ms(game))
+
+
+def press_clock(game, mover, now):
+    """
+    Stop the mover's clock: deduct the time spent and add the increment
+
+    Args:
+        game: Game being played
+        mover: 'white' or 'black'
+        now: Time the move was received
+    """
+    if not is_timed(game):
+        return
+    white, black = stored_clock_ms(game)
+    spent = elapsed_ms(game, now)
+    increment = (game.time_increment_seconds or 0) * 1000
+    if mover == 'white':
+        white = max(0, white - spent) + increment
+    else:
+        black = max(0, black - spent) + increment
+    set_clock_ms(game, white, black)
+    game.last_move_time = now
+
+
+def flag_deadline(game):
+    """When the side to move's flag falls, or None if no clock is running"""
+    white, black = stored_clock_ms(game)
+    if white is None or game.status != 'in_progress' or not game.last_move_time:
+        return None
+    remaining = white if game.current_turn == 'white' else black
+    return game.last_move_time + timedelta(milliseconds=remaining)
+
+
+def clock_snapshot(game, now=None):
+    """Authoritative clock state pushed to clients as clock_update"""
+    now = now or timezone.now()
+    white, black = live_clock_ms(game, now)
+    return {
+        'game_id': game.game_id,
+        'white_ms': white,
+        'black_ms': black,
+        'turn': game.current_turn,
+        'running': game.status == 'in_progress' and white is not None,
+        'server_time': now.isoformat(),
+    }
+
+
+def flag_game(game_id):
+    """
+    End a game whose side to move has run out of time
+
+    Safe to call repeatedly and from several processes: the game is only
+    ended by a conditional UPDATE on the turn and move count it was read
+    with, so a move that lands first or a second flag call changes nothing.
+
+    Returns:
+        dict: The outcome ({'termination', 'winner', 'result'}), or None if
+            the game is not over on time
+    """
+    from .chess_engine import Board, WHITE, BLACK, KING
+    from .game_moves import RESULT_FIELDS, export_pgn, finish_game, result_messages, save_game_if
+    from .models import Game
+    from .publisher import get_publisher
+
+    with transaction.atomic():
+        game = Game.objects.filter(game_id=game_id).first()
+        now = timezone.now()
+        if game is None or not is_flagged(game, now):
+            return None
+
+        loser = game.current_turn
+        winner = 'black' if loser == 'white' else 'white'
+        white, black = stored_clock_ms(game)
+        if loser == 'white':
+            white = 0
+        else:
+            black = 0
+        set_clock_ms(game, white, black)
+        game.last_move_time = now
+
+        # A lone king cannot win on time
+        result = f'{winner}_win'
+        try:
+            board = Board(game.fen)
+            pieces = board.pieces[WHITE if winner == 'white' else BLACK]
+            if not any(pieces[ptype] for ptype in range(KING)):
+                winner, result = None, 'draw'
+        except ValueError:
+            pass
+
+        game.status = 'completed'
+        game.result = result
+        game.completed_at = now
+        game.pgn = export_pgn(game)
+        if not save_game_if(game, CLOCK_FIELDS + RESULT_FIELDS, status='in_progress',
+                            current_turn=loser, move_count=game.move_count):
+            return None
+
+        outcome = {'termination': 'timeout', 'winner': winner, 'result': result}
+        messages = [(f'game_{game.game_id}', 'clock_update', clock_snapshot(game, now))]
+        messages += result_messages(game, 'timeout', winner)
+        transaction.on_commit(lambda: get_publisher().publish_many(messages))
+
+    logger.info(f"[CLOCK] Game {game_id} ended on time: {result}")
+    try:
+        finish_game(game)
+    except Exception as e:
+        logger.error(f"Error finishing game {game_id} after flag-fall: {str(e)}", exc_info=True)
+    return outcome
+
+
+def running_deadlines():
+    """
+    Flag deadlines of every timed game in progress, used to fill the
+    scheduler when an ASGI process starts
+
+    Returns:
+        list: (game_id, deadline) tuples
+    """
+    from .models import Game
+
+    games = Game.objects.filter(
+        status='in_progress',
+        time_control_minutes__isnull=False,
+        last_move_time__isnull=False
+    ).only(
+        'game_id', 'status', 'current_turn', 'time_control_minutes', 'last_move_time',
+        'white_clock_ms', 'black_clock_ms', 'white_time_remaining', 'black_time_remaining'
+    )
+    deadlines = []
+    for game in games:
+        deadline = flag_deadline(game)
+        if deadline:
+            deadlines.append((game.game_id, deadline))
+    return deadlines
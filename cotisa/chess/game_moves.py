@@ -0,0 +1,537 @@
+"""
+Game Moves
+Shared move submission path for the HTTP move endpoint and the
+GameConsumer WebSocket, so both validate and persist moves the same way.
+"""
+import json
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .middleware import NotFoundError, ValidationError, PermissionDeniedError, ConflictError
+from .chess_engine import Board, move_to_uci
+from .game_clock import CLOCK_FIELDS, ClockExpired, clock_snapshot, flag_game, is_flagged, press_clock
+from . import elo_rating, game_state
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_MOVE_FIELDS = ('from', 'to')
+
+# Game columns a move writes; pgn and move_history are left alone until the game ends
+MOVE_FIELDS = ('fen', 'current_turn', 'move_count') + CLOCK_FIELDS
+RESULT_FIELDS = ('status', 'result', 'completed_at', 'pgn')
+
+
+def save_game_if(game, fields, extra_state=None, **expected):
+    """
+    Write only the given fields of a game, and only if its row still
+    matches expected - a single conditional UPDATE instead of a full-row
+    save under a lock. The active-game cache is updated after commit.
+
+    Args:
+        game: Game instance holding the new values
+        fields: Names of the columns to write
+        extra_state: Non-column values for the cached entry (see game_state.write_through)
+        **expected: Column values the row must still have, e.g.
+            status='in_progress', move_count=12
+
+    Returns:
+        bool: False if another request changed the game first
+    """
+    from .models import Game
+
+    values = {field: getattr(game, field) for field in fields}
+    if Game.objects.filter(game_id=game.game_id, **expected).update(**values) != 1:
+        # Whatever the cache holds for this game is out of date
+        game_state.evict(game.game_id)
+        return False
+    game_state.write_through(game, fields, extra_state)
+    return True
+
+
+def parse_move(board, from_square, to_square, promotion=None):
+    """
+    Find the legal move for a from/to/promotion triple
+
+    Clients may send a promotion piece with ordinary pawn moves, so a
+    promotion that does not apply is ignored rather than rejected.
+
+    Returns:
+        int: The encoded move, or None if it is illegal
+    """
+    uci = f"{from_square}{to_square}".lower()
+    if promotion:
+        move = board.parse_uci(uci + str(promotion)[:1].lower())
+        if move is not None:
+            return move
+    return board.parse_uci(uci)
+
+
+def earlier_positions(state, board):
+    """
+    Position keys since the last irreversible move, before the current
+    position, for the threefold repetition check
+
+    Every move stores them in the game-state entry (position_keys). An
+    entry freshly loaded from the database has none, so the game is
+    replayed from the start once to rebuild them.
+
+    Args:
+        state: Game state from game_state.get_state
+        board: Board set from the game's FEN
+
+    Returns:
+        list: Keys as returned by Board.repetition_history()
+    """
+    keys = state.get('position_keys')
+    if keys is not None:
+        return keys
+    if board.halfmove_clock == 0:
+        return []
+    replayed = Board()
+    for move in game_state.load_history(state):
+        encoded = parse_move(replayed, move.get('from'), move.get('to'), move.get('promotion'))
+        if encoded is None:
+            logger.warning(f"[MOVES] Game {state['game_id']} history does not replay, skipping repetition check")
+            return []
+        replayed.push(encoded)
+    if replayed.fen() != board.fen():
+        return []
+    return replayed.repetition_history()
+
+
+def game_messages(event):
+    """
+    WebSocket messages announcing a move, plus game_end when it finished the game
+
+    Tournament games also send a compact board_update to the tournament
+    stream, so spectators of every board get one small delta per move.
+
+    Returns:
+        list: (group_name, message_type, data) tuples
+    """
+    group = f"game_{event['game_id']}"
+    messages = [(group, 'game_move', event)]
+    if event.get('outcome'):
+        messages.append((group, 'game_end', {
+            'game_id': event['game_id'],
+            'result': event['outcome']['result'],
+            'winner': event['outcome']['winner'],
+            'termination': event['outcome']['termination'],
+        }))
+    if event.get('tournament_id'):
+        move = event['move']
+        delta = {
+            'game_id': event['game_id'],
+            'move_count': event['move_count'],
+            'san': move['san'],
+            'uci': f"{move['from']}{move['to']}{move['promotion'] or ''}",
+            'fen': event['fen'],
+            'turn': event['current_turn'],
+            'white_ms': event['clock']['white_ms'],
+            'black_ms': event['clock']['black_ms'],
+        }
+        if event.get('outcome'):
+            delta['result'] = event['outcome']['result']
+            delta['termination'] = event['outcome']['termination']
+        messages.append((f"tournament_{event['tournament_id']}", 'board_update', delta))
+    return messages
+
+
+def result_messages(game, termination, winner=None):
+    """
+    WebSocket messages for a game that ended off the board (resignation,
+    agreed draw, flag-fall, reported result)
+
+    Returns:
+        list: (group_name, message_type, data) tuples
+    """
+    if winner is None and game.result in ('white_win', 'black_win'):
+        winner = game.result.split('_')[0]
+    outcome = {'result': game.result, 'winner': winner, 'termination': termination}
+    messages = [(f'game_{game.game_id}', 'game_end', {'game_id': game.game_id, **outcome})]
+    if game.tournament_id:
+        messages.append((f'tournament_{game.tournament_id}', 'board_update', {
+            'game_id': game.game_id,
+            'result': game.result,
+            'termination': termination,
+        }))
+    return messages
+
+
+def apply_move(game_id, player_id, data, broadcast=True):
+    """
+    Validate and play a move with the server-side engine
+
+    The game is written with one conditional UPDATE on the turn and move
+    count it was read with, so of two moves racing for the same turn only
+    the first is applied and the second gets a ConflictError. The FEN and SAN come from the engine, not the
+    client. Checkmate, stalemate, insufficient material, the 50-move rule
+    and threefold repetition end the game immediately. A move that arrives
+    after the mover's flag fell is rejected and the game is ended on time.
+
+    Args:
+        game_id: Game ID
+        player_id: ID of the player submitting the move
+        data: Move dict with from, to and optional promotion
+        broadcast: Publish game_move (and game_end) after commit. The
+            WebSocket consumer passes False and sends them on its own loop.
+
+    Returns:
+        dict: The game_move event (game_id, move, fen, player, clocks,
+            outcome)
+
+    Raises:
+        NotFoundError: Game does not exist
+        ValidationError: Game not in progress, move data incomplete or illegal
+        PermissionDeniedError: Not this player's turn
+        ConflictError: Another move was applied first
+        ClockExpired: The mover ran out of time
+    """
+    missing = [field for field in REQUIRED_MOVE_FIELDS if not data.get(field)]
+    if missing:
+        raise ValidationError(
+            message='Nepotpuni podaci o potezu',
+            errors={field: 'required' for field in missing}
+        )
+
+    try:
+        game, event = _apply_move_locked(game_id, player_id, data, broadcast)
+    except ClockExpired:
+        # The rejected move's transaction is rolled back; end the game in a new one
+        flag_game(game_id)
+        raise
+
+    if event['outcome']:
+        try:
+            event['replay_required'] = finish_game(game)['replay_required']
+        except Exception as e:
+            logger.error(f"Error finishing game {game_id}: {str(e)}", exc_info=True)
+
+    return event
+
+
+def _apply_move_locked(game_id, player_id, data, broadcast):
+    """Play the move in one transaction; returns (game, event)"""
+    from .models import GameMove
+    from .clock_scheduler import schedule_flag
+
+    with transaction.atomic():
+        # Served from the active-game cache; the conditional UPDATE below
+        # rejects the move if the cached state was stale
+        state = game_state.get_state(game_id)
+        if state is None:
+            raise NotFoundError('Game not found')
+        game = game_state.state_game(state)
+
+        # Provjeri je li igra u tijeku
+        if game.status == 'waiting':
+            raise ValidationError(message='Igra još nije započela. Čeka se drugi igrač.')
+        if game.status != 'in_progress':
+            raise ValidationError(message='Igra nije u tijeku')
+
+        # Provjeri je li red trenutnog igrača
+        expected_player_id = game.white_player_id if game.current_turn == 'white' else game.black_player_id
+        if player_id != expected_player_id:
+            raise PermissionDeniedError('Nije tvoj red')
+
+        now = timezone.now()
+        if is_flagged(game, now):
+            raise ClockExpired()
+
+        try:
+            board = Board(game.fen)
+        except ValueError as e:
+            logger.error(f"[MOVES] Game {game.game_id} has an invalid FEN: {e}")
+            raise ValidationError(message='Neispravna pozicija igre')
+        # outcome() then also sees threefold repetition
+        board.set_repetition_history(earlier_positions(state, board))
+
+        encoded = parse_move(board, data['from'], data['to'], data.get('promotion'))
+        if encoded is None:
+            raise ValidationError(message='Nelegalan potez')
+
+        san = board.san(encoded)
+        board.push(encoded)
+        outcome = board.outcome()
+
+        # Save who just moved BEFORE changing turn
+        player_who_moved = game.current_turn
+        previous_move_count = game.move_count
+        uci = move_to_uci(encoded)
+
+        move = {
+            'from': uci[:2],
+            'to': uci[2:4],
+            'san': san,
+            'promotion': uci[4:] or None,
+            'timestamp': now.isoformat()
+        }
+
+        # Stop the mover's clock before handing the turn over
+        press_clock(game, player_who_moved, now)
+
+        game.fen = board.fen()
+        game.current_turn = 'black' if player_who_moved == 'white' else 'white'
+        game.move_count += 1
+        fields = MOVE_FIELDS
+
+        if outcome:
+            game.status = 'completed'
+            game.result = outcome['result']
+            game.completed_at = now
+            game.pgn = export_pgn(game, game_state.load_history(state) + [move])
+            fields += RESULT_FIELDS
+
+        # A concurrent move or flag-fall changed the row since it was read;
+        # the cached entry keeps the repetition history for the next move
+        if not save_game_if(game, fields, extra_state={'position_keys': board.repetition_history()},
+                            status='in_progress', current_turn=player_who_moved,
+                            move_count=previous_move_count):
+            raise ConflictError(message='Stanje igre se promijenilo, osvježi igru')
+
+        # Append-only: one small INSERT per move instead of rewriting the history blob
+        clock = game.white_time_remaining if player_who_moved == 'white' else game.black_time_remaining
+        game_move = GameMove.objects.create(
+            game=game,
+            ply=game.move_count,
+            uci=uci,
+            san=san,
+            clock=clock,
+            created_at=now
+        )
+        game_state.append_history(game.game_id, game.move_count, game_move.to_dict())
+
+        event = {
+            'game_id': game.game_id,
+            'tournament_id': game.tournament_id,
+            'move': move,
+            'fen': game.fen,
+            'player': player_who_moved,
+            'current_turn': game.current_turn,
+            'move_count': game.move_count,
+            'white_time_remaining': game.white_time_remaining,
+            'black_time_remaining': game.black_time_remaining,
+            'outcome': outcome,
+            'clock': clock_snapshot(game, now),
+        }
+
+        # Re-arm the flag timer for the side now to move (disarmed if the game ended)
+        transaction.on_commit(lambda: schedule_flag(game))
+
+        if broadcast:
+            from .publisher import get_publisher
+            messages = game_messages(event)
+            transaction.on_commit(lambda: get_publisher().publish_many(messages))
+
+    return game, event
+
+
+def record_standings(match):
+    """Apply a finished tournament match to standings without failing the request"""
+    try:
+        from .standings import record_match_result
+        record_match_result(match)
+    except Exception as e:
+        logger.error(f"Error updating standings for match {match.match_id}: {str(e)}", exc_info=True)
+
+
+def finish_game(game):
+    """
+    Apply a completed game's result to its match, the tournament and ratings
+
+    The caller sets game.result, status and completed_at and saves the game
+    first. Elimination draws reset the match for a replay instead.
+
+    Args:
+        game: Completed Game with white_player, black_player and match loaded
+
+    Returns:
+        dict: {'replay_required': bool}
+    """
+    # Update match result if this is a tournament game
+    if game.match:
+        match = game.match
+        logger.info(f"[END_GAME] Match {match.match_id} prije update: status={match.match_status}")
+
+        # Check if this is elimination tournament and result is draw/stalemate
+        is_elimination = match.tournament and match.tournament.tournament_type == 'elimination'
+        is_draw_result = game.result in ['draw', 'stalemate']
+
+        if is_elimination and is_draw_result:
+            # In elimination, draws are not allowed - replay the match
+            logger.info(f"[END_GAME] ELIMINATION + DRAW/STALEMATE detected! Match {match.match_id} will be replayed")
+
+            # Mark this game as completed but don't update match status
+            # Reset match to allow replay
+            match.match_status = 'scheduled'  # Reset to scheduled for replay
+            match.save()
+
+            logger.info(f"[END_GAME] Match {match.match_id} reset to 'scheduled' for replay due to stalemate in elimination")
+
+            # Don't update ELO for stalemate in elimination
+            return {'replay_required': True}
+
+        # Normal match completion logic
+        match.match_status = 'completed'
+        match.is_played = True
+        match.played_at = timezone.now()
+        match.pgn_notation = game.pgn
+        match.number_of_moves = game.move_count
+
+        # Record ELO before match
+        match.white_elo_before = game.white_player.elo_rating
+        match.black_elo_before = game.black_player.elo_rating
+
+        if game.result == 'white_win' or game.result == 'resignation' and game.current_turn == 'black':
+            match.winner = game.white_player
+            match.loser = game.black_player
+            match.result = 'white_win'
+            match.is_draw = False
+        elif game.result == 'black_win' or game.result == 'resignation' and game.current_turn == 'white':
+            match.winner = game.black_player
+            match.loser = game.white_player
+            match.result = 'black_win'
+            match.is_draw = False
+        else:  # draw, stalemate, etc.
+            match.result = 'draw'
+            match.winner = None
+            match.is_draw = True
+
+        match.match_date = timezone.now()
+        match.save()
+
+        logger.info(f"[END_GAME] Match {match.match_id} poslije save: status={match.match_status}, winner={match.winner}, result={match.result}")
+
+        # Check round completion and possibly advance to next round
+        tournament = match.tournament
+        if tournament:
+            record_standings(match)
+
+            # Refresh tournament to get latest data
+            tournament.refresh_from_db()
+
+            logger.info(f"[END_GAME] Tournament {tournament.tournament_id} status: {tournament.tournament_status}, current_round: {tournament.current_round}")
+
+            if tournament.tournament_status == 'in_progress':
+                from .tournament_helpers import check_round_complete_and_advance
+
+                round_status = check_round_complete_and_advance(tournament, match)
+                logger.info(f"[END_GAME] Tournament {tournament.tournament_id} round check result: {round_status}")
+
+                if round_status.get('tournament_complete'):
+                    logger.info(f"Tournament {tournament.tournament_id} ({tournament.tournament_name}) marked as completed")
+                elif round_status.get('next_round'):
+                    logger.info(f"Tournament {tournament.tournament_id} advanced to round {round_status['next_round']}")
+            else:
+                logger.warning(f"[END_GAME] Tournament {tournament.tournament_id} status is {tournament.tournament_status}, NOT checking rounds")
+
+    # Update ELO ratings (this also updates wins/losses/draws/matches_played)
+    try:
+        logger.info(f"[END_GAME] Updating ELO for game {game.game_id}, result: {game.result}")
+        # Determine time control (default to 'blitz' for now)
+        time_control = 'blitz'
+        if game.time_control_minutes:
+            if game.time_control_minutes <= 3:
+                time_control = 'bullet'
+            elif game.time_control_minutes <= 10:
+                time_control = 'blitz'
+            else:
+                time_control = 'rapid'
+
+        # Update ratings based on result
+        if game.result == 'white_win':
+            elo_rating.update_player_ratings(
+                winner=game.white_player,
+                loser=game.black_player,
+                is_draw=False,
+                time_control_type=time_control
+            )
+        elif game.result == 'black_win':
+            elo_rating.update_player_ratings(
+                winner=game.black_player,
+                loser=game.white_player,
+                is_draw=False,
+                time_control_type=time_control
+            )
+        elif game.result in ['draw', 'stalemate']:
+            elo_rating.update_player_ratings(
+                winner=game.white_player,
+                loser=game.black_player,
+                is_draw=True,
+                time_control_type=time_control
+            )
+
+        # Record ELO after match
+        if game.match:
+            game.match.white_elo_after = game.white_player.elo_rating
+            game.match.black_elo_after = game.black_player.elo_rating
+            game.match.elo_change = abs(game.white_player.elo_rating - (game.match.white_elo_before or game.white_player.elo_rating))
+            game.match.save()
+
+    except Exception as e:
+        logger.error(f"Error updating ELO ratings: {str(e)}")
+        # Don't fail the whole request if ELO update fails
+
+    return {'replay_required': False}
+
+
+def load_move_history(game):
+    """
+    Rebuild the full move list of a game
+
+    Games started before moves were stored as GameMove rows keep their
+    opening moves in the legacy move_history JSON; rows follow them.
+
+    Args:
+        game: Game instance
+
+    Returns:
+        list: Move dicts with from, to, san, promotion and timestamp
+    """
+    history = json.loads(game.move_history) if game.move_history else []
+    history.extend(move.to_dict() for move in game.moves.all())
+    return history
+
+
+def export_pgn(game, history=None):
+    """
+    Build a PGN for a game from its stored moves
+
+    Args:
+        game: Game instance with white_player and black_player loaded
+        history: Optional move list already returned by load_move_history
+
+    Returns:
+        str: PGN text with the standard seven-tag roster
+    """
+    if history is None:
+        history = load_move_history(game)
+
+    result = {
+        'white_win': '1-0',
+        'black_win': '0-1',
+        'draw': '1/2-1/2',
+        'stalemate': '1/2-1/2',
+    }.get(game.result, '*')
+    date = game.started_at or game.created_at
+    tags = [
+        ('Event', game.tournament.tournament_name if game.tournament_id else 'COTISA'),
+        ('Site', 'COTISA'),
+        ('Date', date.strftime('%Y.%m.%d') if date else '????.??.??'),
+        ('Round', str(game.match.round_number) if game.match_id else '-'),
+        ('White', game.white_player.username),
+        ('Black', game.black_player.username),
+        ('Result', result),
+    ]
+
+    movetext = []
+    for index, move in enumerate(history):
+        if index % 2 == 0:
+            movetext.append(f'{index // 2 + 1}.')
+        movetext.append(move['san'])
+    movetext.append(result)
+
+    header = '\n'.join(f'[{name} "{value}"]' for name, value in tags)
+    return f"{header}\n\n{' '.join(movetext)}\n"
@@ -0,0 +1,242 @@
+"""
+Game State Cache
+Hot copy of active games (waiting or in progress) keyed by game_id, so
+polling, moves and draw offers for live games are served without
+reading the Game and Player rows.
+
+The cache is write-through: every conditional game UPDATE
+(game_moves.save_game_if) refreshes the cached entry after commit, and
+finished games are evicted. The move history is not part of the entry,
+so a move rewrites a bounded entry however long the game is; it is
+cached under its own key (history_cache_key), which every move extends
+by one entry after commit, so polling a live game runs no SQL. Moves also keep the position keys since the last
+irreversible move (position_keys, at most 100 by the 50-move rule), so
+threefold repetition is checked without replaying the game. The backend is the 'game_state' alias in
+settings.CACHES - local memory for a single process, Redis when several
+workers share it.
+"""
+import logging
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'game_state'
+ACTIVE_STATUSES = ('waiting', 'in_progress')
+
+# Game columns mirrored in the cache
+GAME_FIELDS = (
+    'game_id', 'tournament_id', 'match_id', 'white_player_id', 'black_player_id',
+    'status', 'result', 'fen', 'pgn', 'current_turn', 'move_count',
+    'time_control_minutes', 'time_increment_seconds',
+    'white_time_remaining', 'black_time_remaining', 'white_clock_ms', 'black_clock_ms',
+    'last_move_time', 'white_joined', 'black_joined', 'white_offers_draw', 'black_offers_draw',
+    'started_at', 'completed_at', 'created_at',
+)
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def cache_key(game_id):
+    return f'game_state:{game_id}'
+
+
+def history_cache_key(game_id):
+    return f'game_moves:{game_id}'
+
+
+def player_summary(player):
+    from .game_views import get_player_profile_picture
+    return {
+        'id': player.player_id,
+        'username': player.username,
+        'elo_rating': player.elo_rating,
+        'profile_picture': get_player_profile_picture(player),
+    }
+
+
+def build_state(game):
+    """
+    Cacheable dict for a game
+
+    Args:
+        game: Game with white_player, black_player and tournament loaded
+    """
+    state = {field: getattr(game, field) for field in GAME_FIELDS}
+    tournament = game.tournament if game.tournament_id else None
+    state.update({
+        'tournament_name': tournament.tournament_name if tournament else None,
+        'tournament_type': tournament.tournament_type if tournament else None,
+        'tournament_creator_id': tournament.created_by_id if tournament else None,
+        'white_player': player_summary(game.white_player),
+        'black_player': player_summary(game.black_player),
+        # Games from before GameMove keep their opening moves in move_history
+        'legacy_history': bool(game.move_history),
+    })
+    return state
+
+
+def get_state(game_id):
+    """
+    State of a game, from the cache for active games
+
+    Returns:
+        dict: Game state, or None if the game does not exist
+    """
+    from .models import Game
+
+    state = get_cache().get(cache_key(game_id))
+    if state is not None:
+        return state
+
+    game = Game.objects.select_related(
+        'white_player', 'black_player', 'tournament'
+    ).filter(game_id=game_id).first()
+    if game is None:
+        return None
+    state = build_state(game)
+    if game.status in ACTIVE_STATUSES:
+        get_cache().set(cache_key(game_id), state)
+    return state
+
+
+def state_game(state):
+    """
+    Unsaved Game instance carrying the cached columns, for the clock
+    helpers and conditional UPDATEs. Related objects load lazily.
+    """
+    from .models import Game
+    return Game(**{field: state[field] for field in GAME_FIELDS})
+
+
+def evict(game_id):
+    get_cache().delete_many([cache_key(game_id), history_cache_key(game_id)])
+
+
+def write_through(game, fields, extra=None):
+    """
+    Copy written game columns into the cached entry once the transaction
+    commits; a finished game is evicted instead
+
+    Args:
+        extra: Other entry values to replace, e.g. position_keys
+    """
+    def apply():
+        key = cache_key(game.game_id)
+        if game.status not in ACTIVE_STATUSES:
+            evict(game.game_id)
+            return
+        state = get_cache().get(key)
+        if state is None:
+            return
+        # A write from another worker overtook this one - reload on next read
+        if state['move_count'] > game.move_count:
+            get_cache().delete(key)
+            return
+        for field in fields:
+            state[field] = getattr(game, field)
+        state.update(extra or {})
+        get_cache().set(key, state)
+
+    transaction.on_commit(apply)
+
+
+def load_history(state):
+    """
+    Full move list of a game
+
+    Live games are served from history_cache_key. Otherwise, or when the
+    cached list does not match the state's move count, it is one query on
+    GameMove, plus the legacy move_history column for games that have one;
+    a live game's list is cached again.
+    """
+    from .game_moves import load_move_history
+    from .models import Game
+
+    live = state['status'] in ACTIVE_STATUSES
+    key = history_cache_key(state['game_id'])
+    if live:
+        history = get_cache().get(key)
+        if history is not None and len(history) == state['move_count']:
+            return history
+
+    game = state_game(state)
+    if state.get('legacy_history', True):
+        game.move_history = Game.objects.filter(
+            game_id=state['game_id']
+        ).values_list('move_history', flat=True).first()
+    history = load_move_history(game)
+    if live and len(history) == state['move_count']:
+        get_cache().set(key, history)
+    return history
+
+
+def append_history(game_id, ply, move):
+    """
+    Add a played move to the cached move list once the transaction commits
+
+    A list that is not exactly one move behind (a concurrent write, or an
+    eviction) is dropped and rebuilt by the next load_history.
+
+    Args:
+        ply: The move's number in the game, i.e. the new move_count
+        move: Move dict as returned by GameMove.to_dict()
+    """
+    def apply():
+        key = history_cache_key(game_id)
+        history = get_cache().get(key)
+        if history is None:
+            return
+        if len(history) != ply - 1:
+            get_cache().delete(key)
+            return
+        history.append(move)
+        get_cache().set(key, history)
+
+    transaction.on_commit(apply)
+
+
+def board_summary(game, now=None):
+    """Compact state of one board for the tournament spectator stream"""
+    from .game_clock import live_clock_ms
+
+    white_ms, black_ms = live_clock_ms(game, now)
+    return {
+        'game_id': game.game_id,
+        'white': {'id': game.white_player_id, 'username': game.white_player.username,
+                  'elo_rating': game.white_player.elo_rating},
+        'black': {'id': game.black_player_id, 'username': game.black_player.username,
+                  'elo_rating': game.black_player.elo_rating},
+        'status': game.status,
+        'fen': game.fen,
+        'turn': game.current_turn,
+        'move_count': game.move_count,
+        'white_ms': white_ms,
+        'black_ms': black_ms,
+    }
+
+
+def tournament_boards(tournament_id):
+    """
+    Every running board of a tournament, sent once when a spectator
+    subscribes; after that only board_update deltas follow
+
+    Returns:
+        list: board_summary dicts
+    """
+    from .models import Game
+
+    games = Game.objects.filter(
+        tournament_id=tournament_id, status='in_progress'
+    ).select_related('white_player', 'black_player').only(
+        'game_id', 'status', 'fen', 'current_turn', 'move_count', 'time_control_minutes',
+        'white_clock_ms', 'black_clock_ms', 'white_time_remaining', 'black_time_remaining',
+        'last_move_time', 'white_player', 'black_player', 'white_player__username', 'white_player__elo_rating',
+        'black_player__username', 'black_player__elo_rating',
+    ).order_by('game_id')
+    now = timezone.now()
+    return [board_summary(game, now) for game in games]
@@ -1,14 +1,22 @@
 """
 Game API views - Chess game endpoints
 """
-from django.http import JsonResponse
+from django.http import HttpResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from django.db import models
-from functools import wraps
-from .models import Game, Player, TournamentActive, Match
-from . import elo_rating
+from .models import Game, TournamentActive, Match
+from .game_moves import (
+    apply_move, finish_game, record_standings, export_pgn,
+    save_game_if, result_messages, RESULT_FIELDS
+)
+from .game_clock import live_clock_ms, live_clock_seconds, start_clock, clock_snapshot, CLOCK_FIELDS
+from .middleware import APIException
+from .json_encoding import JsonResponse
+from .decorators import token_required
+from .notifications import publish_after_commit
+from . import elo_rating, game_state
 import json
 import logging
 
@@ -28,26 +36,66 @@ def get_player_profile_picture(player):
     return None
 
 
-# Token-based authentication decorator (same as in api_views)
-def token_required(view_func):
-    @wraps(view_func)
-    def wrapper(request, *args, **kwargs):
-        # Get token from X-Auth-Token header
-        auth_token = request.headers.get('X-Auth-Token')
-        
-        if not auth_token:
-            return JsonResponse({'error': 'Authentication required - no token provided'}, status=401)
-        
-        try:
-            # Find user by token
-            player = Player.objects.get(auth_token=auth_token, is_active=True)
-            # Attach player to request
-            request.user = player
-            return view_func(request, *args, **kwargs)
-        except Player.DoesNotExist:
-            return JsonResponse({'error': 'Invalid or expired token'}, status=401)
+def game_state_response(state):
+    """Fields shared by the player and spectator views of a game, with live clocks"""
+    # Izračunaj trenutno vrijeme ako je igra u tijeku
+    game = game_state.state_game(state)
+    now = timezone.now()
+    white_time, black_time = live_clock_seconds(game, now)
+    white_ms, black_ms = live_clock_ms(game, now)
+    
+    return {
+        'game_id': state['game_id'],
+        'tournament_id': state['tournament_id'],
+        'tournament_name': state['tournament_name'],
+        'white_player': state['white_player'],
+        'black_player': state['black_player'],
+        'status': state['status'],
+        'result': state['result'],
+        'fen': state['fen'],
+        'pgn': state['pgn'],
+        'current_turn': state['current_turn'],
+        'move_count': state['move_count'],
+        'move_history': json.dumps(game_state.load_history(state)),
+        'time_control_minutes': state['time_control_minutes'],
+        'time_increment_seconds': state['time_increment_seconds'],
+        'white_time_remaining': white_time,
+        'black_time_remaining': black_time,
+        'white_clock_ms': white_ms,
+        'black_clock_ms': black_ms,
+        'started_at': state['started_at'],
+        'completed_at': state['completed_at'],
+    }
+
+
+def is_tournament_member(tournament_id, creator_id, player_id):
+    """Whether a player created or takes part in a tournament"""
+    from .models import TournamentParticipant
+    return creator_id == player_id or TournamentParticipant.objects.filter(
+        tournament_id=tournament_id,
+        player_id=player_id
+    ).exists()
+
+
+def spectate_denied(state, player_id):
+    """
+    Why a player may not view a game, or None if they may
+    Tournament games are open to the tournament's creator and participants
     
-    return wrapper
+    Args:
+        state: Game state from game_state.get_state
+        player_id: ID of the requesting player
+    
+    Returns:
+        str: Error message, or None if access is allowed
+    """
+    if state['tournament_id']:
+        if not is_tournament_member(state['tournament_id'], state['tournament_creator_id'], player_id):
+            return 'Nisi sudionik ovog turnira'
+    # Non-tournament games - for now only players can view
+    elif player_id not in (state['white_player_id'], state['black_player_id']):
+        return 'Možeš promatrati samo turnirske igre u kojima sudjeluješ'
+    return None
 
 
 @require_http_methods(["GET"])
@@ -59,71 +107,27 @@ def api_game_detail(request, game_id):
     Get game details
     """
     try:
-        game = Game.objects.select_related('white_player', 'black_player', 'tournament').get(game_id=game_id)
+        # Live games are served from the active-game cache without SQL
+        state = game_state.get_state(game_id)
+        if state is None:
+            return JsonResponse({'error': 'Game not found'}, status=404)
         
         # Provjeri je li korisnik igrač u ovoj igri
         if not request.user.is_authenticated:
             return JsonResponse({'error': 'Potrebna autentifikacija'}, status=401)
         
-        if request.user.player_id != game.white_player.player_id and request.user.player_id != game.black_player.player_id:
+        if request.user.player_id not in (state['white_player_id'], state['black_player_id']):
             return JsonResponse({'error': 'Nisi igrač u ovoj igri'}, status=403)
         
-        # Izračunaj trenutno vrijeme ako je igra u tijeku
-        white_time = game.white_time_remaining
-        black_time = game.black_time_remaining
-        
-        if game.status == 'in_progress' and game.time_control_minutes and game.last_move_time:
-            time_elapsed = int((timezone.now() - game.last_move_time).total_seconds())
-            
-            # Oduzmi vrijeme od igrača koji je trenutno na redu
-            if game.current_turn == 'white':
-                white_time = max(0, white_time - time_elapsed)
-            else:
-                black_time = max(0, black_time - time_elapsed)
-        
-        # Get tournament type if this is a tournament game
-        tournament_type = None
-        if game.tournament:
-            tournament_type = game.tournament.tournament_type
-        
         return JsonResponse({
-            'game_id': game.game_id,
-            'tournament_id': game.tournament.tournament_id if game.tournament else None,
-            'tournament_name': game.tournament.tournament_name if game.tournament else None,
-            'tournament_type': tournament_type,
-            'white_player': {
-                'id': game.white_player.player_id,
-                'username': game.white_player.username,
-                'elo_rating': game.white_player.elo_rating,
-                'profile_picture': get_player_profile_picture(game.white_player),
-            },
-            'black_player': {
-                'id': game.black_player.player_id,
-                'username': game.black_player.username,
-                'elo_rating': game.black_player.elo_rating,
-                'profile_picture': get_player_profile_picture(game.black_player),
-            },
-            'status': game.status,
-            'result': game.result,
-            'fen': game.fen,
-            'pgn': game.pgn,
-            'current_turn': game.current_turn,
-            'move_count': game.move_count,
-            'move_history': game.move_history,
-            'time_control_minutes': game.time_control_minutes,
-            'time_increment_seconds': game.time_increment_seconds,
-            'white_time_remaining': white_time,
-            'black_time_remaining': black_time,
-            'white_joined': game.white_joined,
-            'black_joined': game.black_joined,
-            'white_offers_draw': game.white_offers_draw,
-            'black_offers_draw': game.black_offers_draw,
-            'started_at': game.started_at.isoformat() if game.started_at else None,
-            'completed_at': game.completed_at.isoformat() if game.completed_at else None,
+            **game_state_response(state),
+            'tournament_type': state['tournament_type'],
+            'white_joined': state['white_joined'],
+            'black_joined': state['black_joined'],
+            'white_offers_draw': state['white_offers_draw'],
+            'black_offers_draw': state['black_offers_draw'],
         })
         
-    except Game.DoesNotExist:
-        return JsonResponse({'error': 'Game not found'}, status=404)
     except Exception as e:
         logger.exception(f"Error fetching game {game_id}: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
@@ -139,108 +143,119 @@ def api_game_spectate(request, game_id):
     Anyone can spectate games in tournaments they're part of
     """
     try:
-        game = Game.objects.select_related('white_player', 'black_player', 'tournament').get(game_id=game_id)
-        
-        # If it's a tournament game, check if user is a tournament participant
-        if game.tournament:
-            from .models import TournamentParticipant
-            is_participant = TournamentParticipant.objects.filter(
-                tournament=game.tournament,
-                player=request.user
-            ).exists()
-            
-            is_creator = game.tournament.created_by == request.user
-            
-            if not is_participant and not is_creator:
-                return JsonResponse({'error': 'Nisi sudionik ovog turnira'}, status=403)
-        else:
-            # Non-tournament games - for now only players can view
-            if request.user.player_id != game.white_player.player_id and request.user.player_id != game.black_player.player_id:
-                return JsonResponse({'error': 'Možeš promatrati samo turnirske igre u kojima sudjeluješ'}, status=403)
+        state = game_state.get_state(game_id)
+        if state is None:
+            return JsonResponse({'error': 'Game not found'}, status=404)
         
-        # Calculate current time if game is in progress
-        white_time = game.white_time_remaining
-        black_time = game.black_time_remaining
-        
-        if game.status == 'in_progress' and game.time_control_minutes and game.last_move_time:
-            time_elapsed = int((timezone.now() - game.last_move_time).total_seconds())
-            
-            if game.current_turn == 'white':
-                white_time = max(0, white_time - time_elapsed)
-            else:
-                black_time = max(0, black_time - time_elapsed)
+        error = spectate_denied(state, request.user.player_id)
+        if error:
+            return JsonResponse({'error': error}, status=403)
         
         return JsonResponse({
-            'game_id': game.game_id,
-            'tournament_id': game.tournament.tournament_id if game.tournament else None,
-            'tournament_name': game.tournament.tournament_name if game.tournament else None,
-            'white_player': {
-                'id': game.white_player.player_id,
-                'username': game.white_player.username,
-                'elo_rating': game.white_player.elo_rating,
-                'profile_picture': get_player_profile_picture(game.white_player),
-            },
-            'black_player': {
-                'id': game.black_player.player_id,
-                'username': game.black_player.username,
-                'elo_rating': game.black_player.elo_rating,
-                'profile_picture': get_player_profile_picture(game.black_player),
-            },
-            'status': game.status,
-            'result': game.result,
-            'fen': game.fen,
-            'pgn': game.pgn,
-            'current_turn': game.current_turn,
-            'move_count': game.move_count,
-            'move_history': game.move_history,
-            'time_control_minutes': game.time_control_minutes,
-            'time_increment_seconds': game.time_increment_seconds,
-            'white_time_remaining': white_time,
-            'black_time_remaining': black_time,
+            **game_state_response(state),
             'is_spectator': True,  # Important flag for frontend
-            'started_at': game.started_at.isoformat() if game.started_at else None,
-            'completed_at': game.completed_at.isoformat() if game.completed_at else None,
         })
         
+    except Exception as e:
+        logger.exception(f"Error fetching spectator view for game {game_id}: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+@token_required
+@csrf_exempt
+def api_game_pgn(request, game_id):
+    """
+    GET /api/game/<game_id>/pgn/
+    Export the game as PGN, built from the stored moves
+    Same access as spectating the game
+    """
+    try:
+        state = game_state.get_state(game_id)
+        if state is None:
+            return JsonResponse({'error': 'Game not found'}, status=404)
+        
+        error = spectate_denied(state, request.user.player_id)
+        if error:
+            return JsonResponse({'error': error}, status=403)
+        
+        game = Game.objects.select_related('white_player', 'black_player', 'tournament', 'match').get(game_id=game_id)
+        
+        response = HttpResponse(export_pgn(game), content_type='application/x-chess-pgn; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="cotisa_game_{game.game_id}.pgn"'
+        return response
+        
     except Game.DoesNotExist:
         return JsonResponse({'error': 'Game not found'}, status=404)
     except Exception as e:
-        logger.exception(f"Error fetching spectator view for game {game_id}: {str(e)}")
+        logger.exception(f"Error exporting PGN for game {game_id}: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
 
 
+ONGOING_GAMES_PER_PAGE = 50
+
+
+def get_current_match(tournament_id, player_id):
+    """
+    The player's earliest unfinished match in a tournament
+
+    Each half of the UNION is answered by a (tournament, player, status)
+    index, so the cost does not grow with the number of matches.
+    """
+    pending = Match.objects.filter(tournament_id=tournament_id).exclude(
+        match_status='completed'
+    ).only('match_id', 'round_number', 'match_status')
+    matches = pending.filter(white_player_id=player_id).union(
+        pending.filter(black_player_id=player_id)
+    ).order_by('round_number', 'match_id')[:1]
+    return next(iter(matches), None)
+
+
 @require_http_methods(["GET"])
 @token_required
 @csrf_exempt
 def api_tournament_ongoing_games(request, tournament_id):
     """
     GET /api/tournaments/<tournament_id>/games/
-    Get all ongoing games in a tournament (for spectating)
+    Get ongoing games in a tournament (for spectating), newest first
+    Query: status (comma-separated, e.g. in_progress), round, cursor, per_page
     """
     try:
         tournament = TournamentActive.objects.get(tournament_id=tournament_id)
         
         # Check if user is a participant or creator
         from .models import TournamentParticipant
-        is_participant = TournamentParticipant.objects.filter(
+        is_creator = tournament.created_by_id == request.user.player_id
+        
+        if not is_creator and not TournamentParticipant.objects.filter(
             tournament=tournament,
             player=request.user
-        ).exists()
-        
-        is_creator = tournament.created_by == request.user
-        
-        if not is_participant and not is_creator:
+        ).exists():
             return JsonResponse({'error': 'Nisi sudionik ovog turnira'}, status=403)
         
-        # Get ongoing and recently completed games
-        games = Game.objects.filter(
-            tournament=tournament
-        ).select_related('white_player', 'black_player').order_by('-created_at')
-        
-        # Get matches with games
-        matches = Match.objects.filter(tournament=tournament).select_related(
-            'white_player', 'black_player', 'winner'
-        ).order_by('round_number', 'match_id')
+        # Filters
+        statuses = [value for value in request.GET.get('status', '').split(',') if value]
+        valid_statuses = {choice for choice, _ in Game.GAME_STATUS}
+        if any(value not in valid_statuses for value in statuses):
+            return JsonResponse({'error': f'Invalid status; use {", ".join(sorted(valid_statuses))}'}, status=400)
+        try:
+            round_number = int(request.GET['round']) if request.GET.get('round') else None
+            cursor = int(request.GET['cursor']) if request.GET.get('cursor') else None
+            per_page = min(max(int(request.GET.get('per_page', ONGOING_GAMES_PER_PAGE)), 1), 100)
+        except ValueError:
+            return JsonResponse({'error': 'round, cursor and per_page must be integers'}, status=400)
+        
+        # Served by the (tournament, status) index; game_id order doubles as creation order
+        games = Game.objects.filter(tournament=tournament)
+        if statuses:
+            games = games.filter(status__in=statuses)
+        if round_number is not None:
+            games = games.filter(match__round_number=round_number)
+        if cursor is not None:
+            games = games.filter(game_id__lt=cursor)
+        games = list(games.select_related('white_player', 'black_player').order_by('-game_id')[:per_page + 1])
+        has_more = len(games) > per_page
+        games = games[:per_page]
         
         # Check if current user has a bye or is idle
         user_has_active_game = Game.objects.filter(
@@ -251,27 +266,14 @@ def api_tournament_ongoing_games(request, tournament_id):
         ).exists()
         
         # Find user's current match status
-        user_current_round = None
-        for match in matches:
-            if match.match_status != 'completed' and (
-                (match.white_player and match.white_player.player_id == request.user.player_id) or
-                (match.black_player and match.black_player.player_id == request.user.player_id)
-            ):
-                user_current_round = match.round_number
-                break
+        current_match = get_current_match(tournament.tournament_id, request.user.player_id)
+        user_current_round = current_match.round_number if current_match else None
         
+        now = timezone.now()
         games_data = []
         for game in games:
             # Calculate current time
-            white_time = game.white_time_remaining
-            black_time = game.black_time_remaining
-            
-            if game.status == 'in_progress' and game.time_control_minutes and game.last_move_time:
-                time_elapsed = int((timezone.now() - game.last_move_time).total_seconds())
-                if game.current_turn == 'white':
-                    white_time = max(0, white_time - time_elapsed)
-                else:
-                    black_time = max(0, black_time - time_elapsed)
+            white_time, black_time = live_clock_seconds(game, now)
             
             games_data.append({
                 'game_id': game.game_id,
@@ -300,7 +302,10 @@ def api_tournament_ongoing_games(request, tournament_id):
             'tournament_name': tournament.tournament_name,
             'can_spectate': not user_has_active_game,
             'user_is_playing': user_has_active_game,
-            'games': games_data
+            'user_current_round': user_current_round,
+            'games': games_data,
+            'next_cursor': games[-1].game_id if has_more else None,
+            'has_more': has_more
         })
         
     except TournamentActive.DoesNotExist:
@@ -316,73 +321,29 @@ def api_tournament_ongoing_games(request, tournament_id):
 def api_game_move(request, game_id):
     """
     POST /api/game/<game_id>/move/
-    Make a move in the game
-    Body: {from, to, promotion, san, fen}
+    Make a move in the game; the server validates it and computes FEN/SAN
+    Body: {from, to, promotion}
     """
     try:
-        game = Game.objects.select_related('white_player', 'black_player').get(game_id=game_id)
-        
-        # Provjeri je li igra u tijeku
-        if game.status == 'waiting':
-            return JsonResponse({'error': 'Igra još nije započela. Čeka se drugi igrač.'}, status=400)
-        
-        if game.status != 'in_progress':
-            return JsonResponse({'error': 'Igra nije u tijeku'}, status=400)
-        
-        # Provjeri je li red trenutnog igrača
-        if game.current_turn == 'white' and request.user.player_id != game.white_player.player_id:
-            return JsonResponse({'error': 'Nije tvoj red'}, status=403)
-        if game.current_turn == 'black' and request.user.player_id != game.black_player.player_id:
-            return JsonResponse({'error': 'Nije tvoj red'}, status=403)
-        
         data = json.loads(request.body)
-        
-        # Save who just moved BEFORE changing turn
-        player_who_moved = game.current_turn  # 'white' or 'black'
-        
-        # Update game state
-        game.fen = data['fen']
-        game.current_turn = 'black' if game.current_turn == 'white' else 'white'
-        game.move_count += 1
-        
-        # Add move to history
-        move_history = json.loads(game.move_history) if game.move_history else []
-        move_history.append({
-            'from': data['from'],
-            'to': data['to'],
-            'san': data['san'],
-            'promotion': data.get('promotion'),
-            'timestamp': timezone.now().isoformat()
-        })
-        game.move_history = json.dumps(move_history)
-        
-        # Update time - deduct from the player who just moved and add increment
-        if game.time_control_minutes:
-            time_elapsed = 0
-            if game.last_move_time:
-                time_elapsed = int((timezone.now() - game.last_move_time).total_seconds())
-            
-            if player_who_moved == 'white':  # White just moved
-                game.white_time_remaining = max(0, game.white_time_remaining - time_elapsed + game.time_increment_seconds)
-            else:  # Black just moved
-                game.black_time_remaining = max(0, game.black_time_remaining - time_elapsed + game.time_increment_seconds)
-            
-            game.last_move_time = timezone.now()
-        
-        game.save()
+        event = apply_move(game_id, request.user.player_id, data)
         
         return JsonResponse({
             'success': True,
             'message': 'Potez zabilježen',
-            'fen': game.fen,
-            'current_turn': game.current_turn,
-            'move_count': game.move_count,
-            'white_time_remaining': game.white_time_remaining,
-            'black_time_remaining': game.black_time_remaining
+            'fen': event['fen'],
+            'current_turn': event['current_turn'],
+            'move_count': event['move_count'],
+            'white_time_remaining': event['white_time_remaining'],
+            'black_time_remaining': event['black_time_remaining'],
+            'san': event['move']['san'],
+            'outcome': event['outcome'],
+            'clock': event['clock'],
+            'replay_required': event.get('replay_required', False)
         })
         
-    except Game.DoesNotExist:
-        return JsonResponse({'error': 'Game not found'}, status=404)
+    except APIException as e:
+        return e.to_response()
     except Exception as e:
         logger.exception(f"Error making move in game {game_id}: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
@@ -409,7 +370,11 @@ def api_game_resign(request, game_id):
         
         game.status = 'completed'
         game.completed_at = timezone.now()
-        game.save()
+        # Only an unfinished game can be resigned; a repeated request must not re-rate it
+        if not save_game_if(game, ('status', 'result', 'completed_at'),
+                            status__in=('waiting', 'in_progress')):
+            return JsonResponse({'error': 'Igra je već završena'}, status=409)
+        publish_after_commit(result_messages(game, 'resignation'))
         
         # Update match result if this is a tournament game
         if game.match:
@@ -432,6 +397,7 @@ def api_game_resign(request, game_id):
             # Check round completion and possibly advance to next round
             tournament = match.tournament
             if tournament:
+                record_standings(match)
                 tournament.refresh_from_db()
                 
                 if tournament.tournament_status == 'in_progress':
@@ -506,139 +472,35 @@ def api_game_end(request, game_id):
     try:
         game = Game.objects.select_related('white_player', 'black_player', 'match').get(game_id=game_id)
         
+        # The server may already have ended the game on checkmate or a draw rule
+        if game.status == 'completed':
+            return JsonResponse({
+                'success': True,
+                'message': 'Igra je već završena',
+                'result': game.result
+            })
+        
         data = json.loads(request.body)
         
         game.result = data['result']
-        game.pgn = data.get('pgn', '')
+        game.pgn = data.get('pgn') or export_pgn(game)
         game.status = 'completed'
         game.completed_at = timezone.now()
-        game.save()
-        
-        # Update match result if this is a tournament game
-        if game.match:
-            match = game.match
-            logger.info(f"[END_GAME] Match {match.match_id} prije update: status={match.match_status}")
-            
-            # Check if this is elimination tournament and result is draw/stalemate
-            is_elimination = match.tournament and match.tournament.tournament_type == 'elimination'
-            is_draw_result = game.result in ['draw', 'stalemate']
-            
-            if is_elimination and is_draw_result:
-                # In elimination, draws are not allowed - replay the match
-                logger.info(f"[END_GAME] ELIMINATION + DRAW/STALEMATE detected! Match {match.match_id} will be replayed")
-                
-                # Mark this game as completed but don't update match status
-                # Reset match to allow replay
-                match.match_status = 'scheduled'  # Reset to scheduled for replay
-                match.save()
-                
-                logger.info(f"[END_GAME] Match {match.match_id} reset to 'scheduled' for replay due to stalemate in elimination")
-                
-                # Don't update ELO for stalemate in elimination
-                return JsonResponse({
-                    'success': True,
-                    'message': 'Pat u eliminacijskom turniru - meč će se ponoviti',
-                    'replay_required': True
-                })
-            
-            # Normal match completion logic
-            match.match_status = 'completed'
-            match.is_played = True
-            match.played_at = timezone.now()
-            match.pgn_notation = game.pgn
-            match.number_of_moves = game.move_count
-            
-            # Record ELO before match
-            match.white_elo_before = game.white_player.elo_rating
-            match.black_elo_before = game.black_player.elo_rating
-            
-            if game.result == 'white_win' or game.result == 'resignation' and game.current_turn == 'black':
-                match.winner = game.white_player
-                match.loser = game.black_player
-                match.result = 'white_win'
-                match.is_draw = False
-            elif game.result == 'black_win' or game.result == 'resignation' and game.current_turn == 'white':
-                match.winner = game.black_player
-                match.loser = game.white_player
-                match.result = 'black_win'
-                match.is_draw = False
-            else:  # draw, stalemate, etc.
-                match.result = 'draw'
-                match.winner = None
-                match.is_draw = True
-            
-            match.match_date = timezone.now()
-            match.save()
-            
-            logger.info(f"[END_GAME] Match {match.match_id} poslije save: status={match.match_status}, winner={match.winner}, result={match.result}")
-            
-            # Check round completion and possibly advance to next round
-            tournament = match.tournament
-            if tournament:
-                # Refresh tournament to get latest data
-                tournament.refresh_from_db()
-                
-                logger.info(f"[END_GAME] Tournament {tournament.tournament_id} status: {tournament.tournament_status}, current_round: {tournament.current_round}")
-                
-                if tournament.tournament_status == 'in_progress':
-                    from .tournament_helpers import check_round_complete_and_advance
-                    
-                    round_status = check_round_complete_and_advance(tournament, match)
-                    logger.info(f"[END_GAME] Tournament {tournament.tournament_id} round check result: {round_status}")
-                    
-                    if round_status.get('tournament_complete'):
-                        logger.info(f"Tournament {tournament.tournament_id} ({tournament.tournament_name}) marked as completed")
-                    elif round_status.get('next_round'):
-                        logger.info(f"Tournament {tournament.tournament_id} advanced to round {round_status['next_round']}")
-                else:
-                    logger.warning(f"[END_GAME] Tournament {tournament.tournament_id} status is {tournament.tournament_status}, NOT checking rounds")
+        if not save_game_if(game, RESULT_FIELDS, status__in=('waiting', 'in_progress')):
+            game.refresh_from_db(fields=['result'])
+            return JsonResponse({
+                'success': True,
+                'message': 'Igra je već završena',
+                'result': game.result
+            })
+        publish_after_commit(result_messages(game, 'reported'))
         
-        # Update ELO ratings (this also updates wins/losses/draws/matches_played)
-        try:
-            logger.info(f"[END_GAME] Updating ELO for game {game_id}, result: {game.result}")
-            # Determine time control (default to 'blitz' for now)
-            time_control = 'blitz'
-            if game.time_control_minutes:
-                if game.time_control_minutes <= 3:
-                    time_control = 'bullet'
-                elif game.time_control_minutes <= 10:
-                    time_control = 'blitz'
-                else:
-                    time_control = 'rapid'
-            
-            # Update ratings based on result
-            if game.result == 'white_win':
-                elo_rating.update_player_ratings(
-                    winner=game.white_player,
-                    loser=game.black_player,
-                    is_draw=False,
-                    time_control_type=time_control
-                )
-            elif game.result == 'black_win':
-                elo_rating.update_player_ratings(
-                    winner=game.black_player,
-                    loser=game.white_player,
-                    is_draw=False,
-                    time_control_type=time_control
-                )
-            elif game.result in ['draw', 'stalemate']:
-                elo_rating.update_player_ratings(
-                    winner=game.white_player,
-                    loser=game.black_player,
-                    is_draw=True,
-                    time_control_type=time_control
-                )
-            
-            # Record ELO after match
-            if game.match:
-                game.match.white_elo_after = game.white_player.elo_rating
-                game.match.black_elo_after = game.black_player.elo_rating
-                game.match.elo_change = abs(game.white_player.elo_rating - (game.match.white_elo_before or game.white_player.elo_rating))
-                game.match.save()
-                
-        except Exception as e:
-            logger.error(f"Error updating ELO ratings: {str(e)}")
-            # Don't fail the whole request if ELO update fails
+        if finish_game(game).get('replay_required'):
+            return JsonResponse({
+                'success': True,
+                'message': 'Pat u eliminacijskom turniru - meč će se ponoviti',
+                'replay_required': True
+            })
         
         return JsonResponse({
             'success': True,
@@ -662,15 +524,18 @@ def api_game_draw_offer(request, game_id):
     Offer or accept a draw
     """
     try:
-        game = Game.objects.select_related('white_player', 'black_player', 'match').get(game_id=game_id)
+        state = game_state.get_state(game_id)
+        if state is None:
+            return JsonResponse({'error': 'Game not found'}, status=404)
+        game = game_state.state_game(state)
         
         # Verify game is in progress
         if game.status != 'in_progress':
             return JsonResponse({'error': 'Game is not in progress'}, status=400)
         
         # Determine which player is making the offer
-        is_white = request.user.player_id == game.white_player.player_id
-        is_black = request.user.player_id == game.black_player.player_id
+        is_white = request.user.player_id == game.white_player_id
+        is_black = request.user.player_id == game.black_player_id
         
         if not is_white and not is_black:
             return JsonResponse({'error': 'You are not a player in this game'}, status=403)
@@ -685,7 +550,11 @@ def api_game_draw_offer(request, game_id):
             game.result = 'draw'
             game.status = 'completed'
             game.completed_at = timezone.now()
-            game.save()
+            opponent_flag = 'black_offers_draw' if is_white else 'white_offers_draw'
+            if not save_game_if(game, ('white_offers_draw', 'black_offers_draw', 'status', 'result', 'completed_at'),
+                                status='in_progress', **{opponent_flag: True}):
+                return JsonResponse({'error': 'Game is not in progress'}, status=409)
+            publish_after_commit(result_messages(game, 'agreement'))
             
             # Update match if tournament game
             if game.match:
@@ -698,6 +567,7 @@ def api_game_draw_offer(request, game_id):
                 # Check round completion
                 tournament = game.match.tournament
                 if tournament:
+                    record_standings(game.match)
                     tournament.refresh_from_db()
                     if tournament.tournament_status == 'in_progress':
                         from .tournament_helpers import check_round_complete_and_advance
@@ -731,24 +601,26 @@ def api_game_draw_offer(request, game_id):
             })
         
         # Set the draw offer flag
-        if is_white:
-            game.white_offers_draw = True
-        else:
-            game.black_offers_draw = True
-        
-        game.save()
+        offer_flag = 'white_offers_draw' if is_white else 'black_offers_draw'
+        setattr(game, offer_flag, True)
+        if not save_game_if(game, (offer_flag,), status='in_progress'):
+            return JsonResponse({'error': 'Game is not in progress'}, status=409)
+        publish_after_commit([(f'game_{game.game_id}', 'game_update', {
+            'game_id': game.game_id,
+            'data': {offer_flag: True}
+        })])
         
         # Create notification for opponent about draw offer
         from .models import Notification
-        opponent = game.black_player if is_white else game.white_player
+        opponent_id = game.black_player_id if is_white else game.white_player_id
         try:
             Notification.objects.create(
-                player=opponent,
+                player_id=opponent_id,
                 notification_type='draw_offer',
                 title='🤝 Ponuda remija',
                 message=f'{request.user.username} nudi remi u igri!'
             )
-            logger.info(f"Created draw offer notification for {opponent.username}")
+            logger.info(f"Created draw offer notification for player {opponent_id}")
         except Exception as e:
             logger.error(f"Error creating draw notification: {e}")
         
@@ -767,6 +639,54 @@ def api_game_draw_offer(request, game_id):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def join_game(game, player_id):
+    """
+    Mark a player as joined and start the game once both have
+
+    Both writes are conditional on the game still waiting, so of two
+    simultaneous joins only one starts the clock and arms the flag timer.
+
+    Returns:
+        bool: True if this call started the game
+    """
+    joined_flag = 'white_joined' if player_id == game.white_player_id else 'black_joined'
+    setattr(game, joined_flag, True)
+    save_game_if(game, (joined_flag,), status='waiting')
+    # The opponent may have joined since the game was read
+    game.refresh_from_db(fields=['status', 'white_joined', 'black_joined'])
+    
+    started = False
+    if game.status == 'waiting' and game.white_joined and game.black_joined:
+        now = timezone.now()
+        game.status = 'in_progress'
+        game.started_at = now
+        start_clock(game, now)
+        started = save_game_if(game, ('status', 'started_at') + CLOCK_FIELDS, status='waiting')
+        if started:
+            logger.info(f"Game {game.game_id} started - both players joined")
+        else:
+            game.refresh_from_db()
+    
+    if started:
+        from .clock_scheduler import schedule_flag
+        schedule_flag(game)
+        clock = clock_snapshot(game)
+        messages = [
+            (f'game_{game.game_id}', 'game_update', {'game_id': game.game_id, 'data': {'status': game.status}}),
+            (f'game_{game.game_id}', 'clock_update', clock),
+        ]
+        if game.tournament_id:
+            messages.append((f'tournament_{game.tournament_id}', 'board_update', {
+                'game_id': game.game_id,
+                'status': game.status,
+                'turn': game.current_turn,
+                'white_ms': clock['white_ms'],
+                'black_ms': clock['black_ms'],
+            }))
+        publish_after_commit(messages)
+    return started
+
+
 @require_POST
 @token_required
 @csrf_exempt
@@ -794,22 +714,9 @@ def api_create_game(request):
         # Check if game already exists for this match
         existing_game = Game.objects.filter(match=match).first()
         if existing_game:
-            # Mark current player as joined
-            player_joined = False
-            if request.user.player_id == match.white_player.player_id and not existing_game.white_joined:
-                existing_game.white_joined = True
-                player_joined = True
-            elif request.user.player_id == match.black_player.player_id and not existing_game.black_joined:
-                existing_game.black_joined = True
-                player_joined = True
-            
-            if player_joined:
-                # Check if both players joined - if so, start the game
-                if existing_game.white_joined and existing_game.black_joined and existing_game.status == 'waiting':
-                    existing_game.status = 'in_progress'
-                    existing_game.started_at = timezone.now()
-                    logger.info(f"[GAME_START] Game {existing_game.game_id} started - both players joined")
-                existing_game.save()
+            # Mark current player as joined; starts the game and its clock once both have
+            if existing_game.status == 'waiting':
+                join_game(existing_game, request.user.player_id)
             
             # Update match status if needed
             if match.match_status != 'in_progress':
@@ -921,27 +828,14 @@ def api_game_join(request, game_id):
                 'message': 'Igra je već u tijeku'
             })
         
-        # Mark player as joined
-        if request.user.player_id == game.white_player.player_id:
-            game.white_joined = True
-        else:
-            game.black_joined = True
-        
-        # Check if both players have joined
-        if game.white_joined and game.black_joined:
-            game.status = 'in_progress'
-            game.started_at = timezone.now()
-            game.last_move_time = timezone.now()
-            logger.info(f"Game {game_id} started - both players joined")
-        
-        game.save()
+        join_game(game, request.user.player_id)
         
         return JsonResponse({
             'success': True,
             'status': game.status,
             'white_joined': game.white_joined,
             'black_joined': game.black_joined,
-            'started_at': game.started_at.isoformat() if game.started_at else None,
+            'started_at': game.started_at,
             'message': 'Pridružen igri' if game.status == 'waiting' else 'Igra započela'
         })
         
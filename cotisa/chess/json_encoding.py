@@ -0,0 +1,115 @@
+"""
+JSON Encoding
+=============
+One encoder for every HTTP response and WebSocket event.
+
+orjson is used when installed (several times faster than the stdlib on our
+payloads, see the benchmark_json command); otherwise the stdlib json module
+is used. Both backends produce the same document (compact separators, and
+datetimes, dates and times written with isoformat()), so views can put
+model datetimes straight into their payloads. The stdlib backend escapes
+non-ASCII characters, which keeps it on the C encoder's fast path.
+
+The backend is chosen with settings.JSON_ENCODER_BACKEND ('auto', 'orjson'
+or 'stdlib').
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+
+_django_default = DjangoJSONEncoder().default
+
+
+def default(value):
+    """Encode the types neither backend handles natively (Decimal, UUID, lazy strings...)"""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        # DjangoJSONEncoder would cut microseconds and write 'Z'
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return _django_default(value)
+
+
+class StdlibEncoder:
+    name = 'stdlib'
+
+    def __init__(self):
+        self._encode = json.JSONEncoder(default=default, separators=(',', ':')).encode
+
+    def dumps(self, data):
+        return self._encode(data).encode()
+
+
+class OrjsonEncoder:
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("JSON_ENCODER_BACKEND is 'orjson' but orjson is not installed")
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=default, option=self._options)
+
+
+_encoders = {}
+
+
+def get_encoder(backend=None):
+    """
+    Encoder for a backend name, by default the configured one
+
+    Raises:
+        ValueError: Unknown backend name
+        ImportError: 'orjson' requested but not installed
+    """
+    backend = backend or getattr(settings, 'JSON_ENCODER_BACKEND', 'auto')
+    encoder = _encoders.get(backend)
+    if encoder is None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JSON encoder backend: {backend}")
+        if backend == 'orjson' or (backend == 'auto' and orjson is not None):
+            encoder = OrjsonEncoder()
+        else:
+            encoder = StdlibEncoder()
+        _encoders[backend] = encoder
+    return encoder
+
+
+def dumps(data):
+    """Encode to UTF-8 bytes"""
+    return get_encoder().dumps(data)
+
+
+def dumps_text(data):
+    """Encode to str, for WebSocket text frames"""
+    return get_encoder().dumps(data).decode()
+
+
+class JsonResponse(HttpResponse):
+    """
+    Drop-in replacement for django.http.JsonResponse using the configured encoder
+
+    Args:
+        data: Object to encode; must be a dict unless safe=False
+        safe: Refuse non-dict data, as Django's JsonResponse does
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
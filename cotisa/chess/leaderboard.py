@@ -0,0 +1,423 @@
+"""
+Leaderboard
+Ranked snapshots of active players per rating type, so leaderboard
+requests never sort the player table.
+
+Each process keeps a RankIndex per rating type (players ordered by rating,
+highest first, ties by player_id), built with one indexed query at
+startup (warm_in_background) or the first time it is needed. Rating changes are not applied in place: the Player
+post_save signal (fired by update_player_ratings) appends them to a change
+journal in the 'leaderboard' cache, and every process replays the journal
+before answering. Rendered pages are cached per journal position, so a
+rating change makes them stale immediately.
+"""
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'leaderboard'
+
+# Public rating type -> Player column
+RATING_FIELDS = {
+    'overall': 'elo_rating',
+    'bullet': 'elo_bullet',
+    'blitz': 'elo_blitz',
+    'rapid': 'elo_rapid',
+    'daily': 'elo_daily',
+}
+DEFAULT_RATING_TYPE = 'overall'
+
+JOURNAL_KEY = 'leaderboard:seq'
+
+
+class RankIndex:
+    """
+    Order-statistics index of players by rating
+
+    A Fenwick tree counts players per rating value; the players at each
+    rating are kept in an array sorted by player_id. Ranks are ordinal and
+    1-based (highest rating first, ties by player_id). rank() and finding
+    the k-th player are O(log R) over the rating range plus a bisect in
+    one bucket, and an update touches two buckets and two tree paths, so
+    neither depends on the number of players.
+
+    Args:
+        ratings: Iterable of (player_id, rating)
+        low, high: Initial rating range; it grows if a rating falls outside
+    """
+
+    def __init__(self, ratings=(), low=0, high=4096):
+        self._ratings = dict(ratings)
+        self._buckets = {}
+        for player_id in sorted(self._ratings):
+            self._buckets.setdefault(self._ratings[player_id], array('q')).append(player_id)
+        self._total = len(self._ratings)
+        self._low = min(low, min(self._buckets, default=low))
+        self._size = max(high, max(self._buckets, default=high) + 1) - self._low
+        self._build_tree()
+
+    def __len__(self):
+        return self._total
+
+    def __contains__(self, player_id):
+        return player_id in self._ratings
+
+    def rating(self, player_id):
+        return self._ratings.get(player_id)
+
+    def _build_tree(self):
+        tree = [0] * (self._size + 1)
+        for rating, bucket in self._buckets.items():
+            tree[rating - self._low + 1] = len(bucket)
+        for i in range(1, self._size + 1):
+            parent = i + (i & -i)
+            if parent <= self._size:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top_bit = 1 << (self._size.bit_length() - 1)
+
+    def _add(self, rating, delta):
+        i = rating - self._low + 1
+        tree = self._tree
+        while i <= self._size:
+            tree[i] += delta
+            i += i & -i
+
+    def _count_upto(self, rating):
+        """Players rated at most rating"""
+        i = rating - self._low + 1
+        tree = self._tree
+        count = 0
+        while i > 0:
+            count += tree[i]
+            i -= i & -i
+        return count
+
+    def _find(self, k):
+        """Lowest rating with at least k players rated at or below it"""
+        tree = self._tree
+        i = 0
+        step = self._top_bit
+        while step:
+            nxt = i + step
+            if nxt <= self._size and tree[nxt] < k:
+                i = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return i + self._low
+
+    def _grow(self, rating):
+        high = self._low + self._size
+        self._low = min(self._low, rating)
+        self._size = max(high, rating + 1) - self._low
+        self._build_tree()
+
+    def rank(self, player_id):
+        """1-based rank of a player, or None if not ranked"""
+        rating = self._ratings.get(player_id)
+        if rating is None:
+            return None
+        higher = self._total - self._count_upto(rating)
+        return higher + bisect_left(self._buckets[rating], player_id) + 1
+
+    def _kth(self, k):
+        """(rating, position in its bucket) of the player ranked k"""
+        rating = self._find(self._total - k + 1)
+        higher = self._total - self._count_upto(rating)
+        return rating, k - higher - 1
+
+    def page(self, offset, limit):
+        """
+        A slice of the ranking
+
+        Returns:
+            list: (rank, player_id, rating) tuples
+        """
+        k = max(0, offset) + 1
+        end = min(self._total, k - 1 + max(0, limit))
+        rows = []
+        while k <= end:
+            rating, position = self._kth(k)
+            for player_id in self._buckets[rating][position:position + end - k + 1]:
+                rows.append((k, player_id, rating))
+                k += 1
+        return rows
+
+    def count_before(self, rating, player_id):
+        """Entries ranked at or above (rating, player_id), present or not"""
+        if rating < self._low:
+            return self._total
+        higher = self._total - self._count_upto(min(rating, self._low + self._size - 1))
+        if rating >= self._low + self._size:
+            return higher
+        bucket = self._buckets.get(rating)
+        return higher + (bisect_right(bucket, player_id) if bucket else 0)
+
+    def window(self, player_id, neighbors):
+        """
+        A player's rank with up to neighbors players above and below
+
+        Returns:
+            tuple: (rank, rows as in page()), or (None, []) if not ranked
+        """
+        rank = self.rank(player_id)
+        if rank is None:
+            return None, []
+        first = max(1, rank - neighbors)
+        return rank, self.page(first - 1, rank + neighbors - first + 1)
+
+    def update(self, player_id, rating):
+        """Add a player or move them to a new rating"""
+        self.remove(player_id)
+        if rating < self._low or rating >= self._low + self._size:
+            self._grow(rating)
+        self._ratings[player_id] = rating
+        bucket = self._buckets.get(rating)
+        if bucket is None:
+            bucket = self._buckets[rating] = array('q')
+        bucket.insert(bisect_left(bucket, player_id), player_id)
+        self._add(rating, 1)
+        self._total += 1
+
+    def remove(self, player_id):
+        rating = self._ratings.pop(player_id, None)
+        if rating is None:
+            return
+        bucket = self._buckets[rating]
+        del bucket[bisect_left(bucket, player_id)]
+        if not bucket:
+            del self._buckets[rating]
+        self._add(rating, -1)
+        self._total -= 1
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def rating_field(rating_type):
+    """Player column for a public rating type; ValueError for unknown types"""
+    try:
+        return RATING_FIELDS[rating_type or DEFAULT_RATING_TYPE]
+    except KeyError:
+        raise ValueError(f"Unknown rating type: {rating_type}")
+
+
+def _change_key(seq):
+    return f'leaderboard:change:{seq}'
+
+
+# Process-wide indexes and the journal position they include
+_indexes = {}
+_applied_seq = None
+_lock = threading.Lock()
+
+
+def _build(field):
+    from .models import Player
+
+    ratings = Player.objects.filter(is_active=True).values_list('player_id', field).iterator(chunk_size=10000)
+    return RankIndex(ratings)
+
+
+def _apply(change):
+    player_id = change['player_id']
+    for field, index in _indexes.items():
+        if change['active']:
+            index.update(player_id, change['ratings'][field])
+        else:
+            index.remove(player_id)
+
+
+def _sync():
+    """Replay journal entries this process has not seen; rebuild if some expired"""
+    global _applied_seq
+    cache = get_cache()
+    seq = cache.get(JOURNAL_KEY, 0)
+    if seq == _applied_seq:
+        return seq
+    with _lock:
+        if seq == _applied_seq:
+            return seq
+        missing = _applied_seq is None or seq < _applied_seq
+        if not missing and _indexes:
+            wanted = [_change_key(n) for n in range(_applied_seq + 1, seq + 1)]
+            changes = cache.get_many(wanted) if len(wanted) <= settings.LEADERBOARD_JOURNAL_REPLAY else {}
+            if len(changes) == len(wanted):
+                for key in wanted:
+                    _apply(changes[key])
+            else:
+                missing = True
+        if missing:
+            _indexes.clear()
+        _applied_seq = seq
+    return seq
+
+
+def get_index(rating_type=DEFAULT_RATING_TYPE):
+    """
+    Up-to-date RankIndex for a rating type
+
+    Returns:
+        tuple: (RankIndex, journal position it reflects)
+    """
+    field = rating_field(rating_type)
+    seq = _sync()
+    index = _indexes.get(field)
+    if index is None:
+        with _lock:
+            index = _indexes.get(field)
+            if index is None:
+                index = _build(field)
+                _indexes[field] = index
+                logger.info(f"[LEADERBOARD] Built {field} index with {len(index)} players")
+    return index, seq
+
+
+def offset_after(rating_type, rating, player_id):
+    """Leaderboard offset just past (rating, player_id), the key of a cursor"""
+    index, _ = get_index(rating_type)
+    with _lock:
+        return index.count_before(rating, player_id)
+
+
+def warm_in_background():
+    """Build every rating type's index in a daemon thread when a server process starts"""
+    def warm():
+        try:
+            for rating_type in RATING_FIELDS:
+                get_index(rating_type)
+        except Exception as e:
+            logger.error(f"[LEADERBOARD] Warm-up failed: {e}", exc_info=True)
+        finally:
+            from django.db import connection
+            connection.close()
+
+    if not settings.LEADERBOARD_WARM_ON_STARTUP:
+        return
+    threading.Thread(target=warm, name='leaderboard-warm', daemon=True).start()
+
+
+def rank_window(rating_type, player_id, neighbors):
+    """
+    A player's rank and the players around them
+
+    Returns:
+        dict: {'rank', 'rating', 'total', 'players'}; rank is None for
+            players not on the leaderboard (e.g. deactivated)
+    """
+    from .models import Player
+
+    index, _ = get_index(rating_type)
+    with _lock:
+        rank, ranked = index.window(player_id, neighbors)
+        rating, total = index.rating(player_id), len(index)
+    players = Player.objects.select_related('active_title').only(
+        'player_id', 'username', 'full_name', 'is_provisional', 'active_title', 'active_title__title_name'
+    ).in_bulk([ranked_id for _, ranked_id, _ in ranked])
+    rows = []
+    for row_rank, ranked_id, rating in ranked:
+        player = players.get(ranked_id)
+        if player is None:
+            continue
+        rows.append({
+            'rank': row_rank,
+            'id': ranked_id,
+            'username': player.username,
+            'full_name': player.full_name,
+            'rating': rating,
+            'is_provisional': player.is_provisional,
+            'active_title': player.active_title.title_name if player.active_title else None,
+            'is_me': ranked_id == player_id,
+        })
+    return {'rank': rank, 'rating': rating, 'total': total, 'players': rows}
+
+
+def record_player(player):
+    """
+    Queue a player's current ratings (or removal) for every process's
+    index once the transaction commits
+    """
+    change = {
+        'player_id': player.player_id,
+        'active': bool(player.is_active),
+        'ratings': {field: getattr(player, field) for field in RATING_FIELDS.values()},
+    }
+    transaction.on_commit(lambda: _append(change))
+
+
+def record_removal(player_id):
+    change = {'player_id': player_id, 'active': False, 'ratings': {}}
+    transaction.on_commit(lambda: _append(change))
+
+
+def _append(change):
+    cache = get_cache()
+    cache.add(JOURNAL_KEY, 0, None)
+    try:
+        seq = cache.incr(JOURNAL_KEY)
+    except ValueError:
+        # Evicted between add and incr - every process rebuilds
+        cache.set(JOURNAL_KEY, 1, None)
+        return
+    cache.set(_change_key(seq), change, settings.LEADERBOARD_JOURNAL_TIMEOUT)
+
+
+def leaderboard_page(rating_type, offset, limit):
+    """
+    Rendered leaderboard rows with ranks, cached per journal position
+
+    Returns:
+        tuple: (rows, total ranked players)
+    """
+    from .models import Player
+
+    rating_type = rating_type or DEFAULT_RATING_TYPE
+    index, seq = get_index(rating_type)
+    key = f'leaderboard:page:{rating_type}:{seq}:{offset}:{limit}'
+    cached = get_cache().get(key)
+    if cached is not None:
+        return cached
+
+    # Replays from other threads mutate the index under the same lock
+    with _lock:
+        ranked = index.page(offset, limit)
+        total = len(index)
+    players = Player.objects.select_related('active_title').in_bulk([player_id for _, player_id, _ in ranked])
+    rows = []
+    for rank, player_id, rating in ranked:
+        player = players.get(player_id)
+        if player is None:
+            continue
+        rows.append({
+            'rank': rank,
+            'id': player_id,
+            'username': player.username,
+            'full_name': player.full_name,
+            'rating': rating,
+            'elo_rating': player.elo_rating,
+            'wins': player.wins,
+            'losses': player.losses,
+            'draws': player.draws,
+            'total_matches': player.total_matches,
+            'is_provisional': player.is_provisional,
+            'active_title': player.active_title.title_name if player.active_title else None,
+        })
+    result = (rows, total)
+    get_cache().set(key, result, settings.LEADERBOARD_PAGE_TIMEOUT)
+    return result
+
+
+def reset():
+    """Drop this process's indexes (tests, management commands)"""
+    global _applied_seq
+    with _lock:
+        _indexes.clear()
+        _applied_seq = None
@@ -0,0 +1,192 @@
+"""
+Management command to benchmark JSON encode throughput of the response
+encoder backends on payloads shaped like our tournament detail, game
+detail and leaderboard responses
+"""
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from chess import json_encoding
+
+NAMES = ['Đuro', 'Šime', 'Žarko', 'Ćiril', 'Ivana', 'Marko', 'Lucija', 'Petra', 'Čedo', 'Ana']
+
+
+def _username(rng, i):
+    return f'{rng.choice(NAMES).lower()}_{i}'
+
+
+def tournament_detail(rng, participants):
+    """Body of GET /api/tournaments/<id>/ for a finished Swiss tournament"""
+    now = timezone.now()
+    players = [(i + 1, _username(rng, i)) for i in range(participants)]
+    rounds = max(1, participants.bit_length())
+    matches = []
+    for round_number in range(1, rounds + 1):
+        for white, black in zip(players[0::2], players[1::2]):
+            matches.append({
+                'id': len(matches) + 1,
+                'tournament_id': 1,
+                'round_number': round_number,
+                'player1_id': white[0],
+                'player1_name': white[1],
+                'player1_is_provisional': False,
+                'player2_id': black[0],
+                'player2_name': black[1],
+                'player2_is_provisional': rng.random() < 0.1,
+                'winner_id': rng.choice([white[0], black[0], None]),
+                'status': 'completed',
+                'scheduled_time': now - timedelta(hours=rounds - round_number, microseconds=rng.randint(0, 999999)),
+            })
+    return {
+        'success': True,
+        'tournament': {
+            'id': 1,
+            'code': 'ABC123',
+            'tournament_code': 'ABC123',
+            'name': 'Zimski turnir',
+            'tournament_name': 'Zimski turnir',
+            'description': 'Švicarski sustav, 5+3',
+            'type': 'swiss',
+            'tournament_type': 'swiss',
+            'status': 'completed',
+            'tournament_status': 'completed',
+            'current_participants': participants,
+            'max_participants': participants,
+            'start_date': now - timedelta(days=1),
+            'created_at': now - timedelta(days=7),
+            'created_by': players[0][1],
+            'creator_id': players[0][0],
+        },
+        'participants': [{
+            'id': player_id,
+            'username': username,
+            'elo_rating': rng.randint(800, 2200),
+            'seed': seed,
+            'is_eliminated': False,
+            'is_provisional': rng.random() < 0.1,
+            'matches_played': rng.randint(0, 300),
+        } for seed, (player_id, username) in enumerate(players, 1)],
+        'matches': matches,
+    }
+
+
+def game_detail(rng, moves):
+    """Body of GET /api/game/<id>/ for a game in progress"""
+    now = timezone.now()
+    history = [{
+        'from': 'e2',
+        'to': 'e4',
+        'san': rng.choice(['e4', 'Nf3', 'Bxc6+', 'O-O', 'Qxd8#']),
+        'promotion': None,
+        'clock': rng.randint(0, 300000),
+        'timestamp': (now - timedelta(seconds=moves - i)).isoformat(),
+    } for i in range(moves)]
+    return {
+        'game_id': 1,
+        'tournament_id': 1,
+        'tournament_name': 'Zimski turnir',
+        'white_player': {'id': 1, 'username': 'đuro_1', 'elo_rating': 1500, 'profile_picture': '/media/profile_pictures/1.png'},
+        'black_player': {'id': 2, 'username': 'šime_2', 'elo_rating': 1480, 'profile_picture': None},
+        'status': 'in_progress',
+        'result': None,
+        'fen': 'r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4',
+        'pgn': ' '.join(move['san'] for move in history),
+        'current_turn': 'white',
+        'move_count': moves,
+        'move_history': json.dumps(history),
+        'time_control_minutes': 5,
+        'time_increment_seconds': 3,
+        'white_time_remaining': 212,
+        'black_time_remaining': 187,
+        'white_clock_ms': 212345,
+        'black_clock_ms': 187654,
+        'started_at': now - timedelta(minutes=4),
+        'completed_at': None,
+        'tournament_type': 'swiss',
+        'white_joined': True,
+        'black_joined': True,
+        'white_offers_draw': False,
+        'black_offers_draw': False,
+    }
+
+
+def leaderboard(rng, rows):
+    """Body of GET /api/leaderboard/?page=1&per_page=<rows>"""
+    return {
+        'success': True,
+        'leaderboard': [{
+            'rank': rank,
+            'id': rank,
+            'username': _username(rng, rank),
+            'full_name': f'{rng.choice(NAMES)} {rng.choice(NAMES)}ić',
+            'rating': 2400 - rank,
+            'elo_rating': 2400 - rank,
+            'wins': rng.randint(0, 500),
+            'losses': rng.randint(0, 500),
+            'draws': rng.randint(0, 100),
+            'total_matches': rng.randint(0, 1100),
+            'is_provisional': False,
+            'active_title': rng.choice([None, 'Velemajstor', 'Majstor']),
+        } for rank in range(1, rows + 1)],
+        'type': 'overall',
+        'pagination': {
+            'current_page': 1,
+            'total_pages': 1000,
+            'total_items': rows * 1000,
+            'per_page': rows,
+            'has_next': True,
+            'has_previous': False,
+            'next_page': 2,
+            'previous_page': None,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON encode throughput of the response encoder backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000, help='Encodes per payload and backend')
+        parser.add_argument('--participants', type=int, default=64, help='Tournament participants')
+        parser.add_argument('--moves', type=int, default=80, help='Moves in the game')
+        parser.add_argument('--rows', type=int, default=100, help='Leaderboard rows')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for payloads')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        iterations = options['iterations']
+        payloads = [
+            ('tournament detail', tournament_detail(rng, options['participants'])),
+            ('game detail', game_detail(rng, options['moves'])),
+            ('leaderboard', leaderboard(rng, options['rows'])),
+        ]
+
+        # Django's JsonResponse: DjangoJSONEncoder with default separators and ASCII escapes
+        backends = [('django', lambda data: json.dumps(data, cls=DjangoJSONEncoder).encode())]
+        for name in ('stdlib', 'orjson'):
+            try:
+                backends.append((name, json_encoding.get_encoder(name).dumps))
+            except ImportError:
+                self.stdout.write(self.style.WARNING(f'{name} is not installed, skipped'))
+
+        self.stdout.write(f'{iterations} encodes per payload (seed={options["seed"]}), '
+                          f'configured backend: {json_encoding.get_encoder().name}\n')
+        for label, payload in payloads:
+            self.stdout.write(f'{label}:')
+            baseline = None
+            for name, encode in backends:
+                size = len(encode(payload))
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    encode(payload)
+                per_encode = (time.perf_counter() - start) / iterations
+                baseline = baseline or per_encode
+                self.stdout.write(
+                    f'  {name:<8} {per_encode * 1e6:8.1f} us  {size / per_encode / 1e6:7.1f} MB/s  '
+                    f'{size:7d} bytes  x{baseline / per_encode:.1f}'
+                )
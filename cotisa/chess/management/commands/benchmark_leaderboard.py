@@ -0,0 +1,56 @@
+"""
+Management command to benchmark leaderboard rank lookups on the
+order-statistics index against sorting all ratings per request
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from chess.leaderboard import RankIndex
+
+
+class Command(BaseCommand):
+    help = 'Benchmark rank, rank-window and update times of the leaderboard index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000000, help='Number of ranked players')
+        parser.add_argument('--lookups', type=int, default=10000, help='Number of rank lookups and updates')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for ratings')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        num_players = options['players']
+        lookups = options['lookups']
+        ratings = [(i + 1, max(100, int(rng.gauss(1200, 300)))) for i in range(num_players)]
+        sample = [rng.randint(1, num_players) for _ in range(lookups)]
+
+        start = time.perf_counter()
+        index = RankIndex(ratings)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for player_id in sample:
+            index.rank(player_id)
+        rank_time = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for player_id in sample:
+            index.window(player_id, 5)
+        window_time = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for player_id in sample:
+            index.update(player_id, rng.randint(800, 1600))
+        update_time = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        ordered = sorted(ratings, key=lambda item: (-item[1], item[0]))
+        {player_id: rank for rank, (player_id, _) in enumerate(ordered, 1)}[sample[0]]
+        sort_time = time.perf_counter() - start
+
+        self.stdout.write(f'{num_players} players, {lookups} operations (seed={options["seed"]})\n')
+        self.stdout.write(f'  index build:        {build * 1000:.1f} ms')
+        self.stdout.write(f'  rank lookup:        {rank_time * 1e6:.1f} us')
+        self.stdout.write(f'  rank window (+-5):  {window_time * 1e6:.1f} us')
+        self.stdout.write(f'  rating update:      {update_time * 1e6:.1f} us')
+        self.stdout.write(self.style.WARNING(f'  sort per request:   {sort_time * 1000:.1f} ms'))
@@ -0,0 +1,55 @@
+"""
+Management command to check the move generator against known perft
+counts and measure its speed
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from chess.chess_engine import Board, STARTING_FEN
+
+# (name, FEN, node counts for depth 1, 2, 3, ...) from the Chess Programming Wiki
+PERFT_POSITIONS = [
+    ('start', STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603]),
+    ('position 3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238, 674624]),
+    ('position 4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333]),
+    ('position 5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379, 2103487]),
+    ('position 6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]),
+]
+
+
+class Command(BaseCommand):
+    help = 'Verify the chess move generator with perft and report nodes per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--depth', type=int, default=3, help='Maximum perft depth per position')
+
+    def handle(self, *args, **options):
+        max_depth = options['depth']
+        total_nodes = 0
+        total_time = 0.0
+        failures = 0
+
+        for name, fen, expected in PERFT_POSITIONS:
+            board = Board(fen)
+            depth = min(max_depth, len(expected))
+            start = time.perf_counter()
+            nodes = board.perft(depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+
+            line = f'{name:<12} depth {depth}: {nodes:>9} nodes in {elapsed * 1000:8.1f} ms'
+            if nodes == expected[depth - 1]:
+                self.stdout.write(self.style.SUCCESS(f'{line}  ok'))
+            else:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'{line}  expected {expected[depth - 1]}'))
+
+        nps = total_nodes / total_time if total_time else 0
+        self.stdout.write(f'\nTotal: {total_nodes} nodes in {total_time:.2f} s ({nps:,.0f} nodes/s)')
+        if failures:
+            self.stdout.write(self.style.ERROR(f'{failures} position(s) returned wrong node counts'))
@@ -0,0 +1,168 @@
+"""
+Management command to benchmark Swiss pairing speed and quality
+against the legacy greedy pairing algorithm
+"""
+import random
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from chess.tournament_helpers import generate_swiss_pairings
+
+
+def legacy_swiss_pairings(participants, round_number, previous_matches):
+    """Greedy O(n^2) pairing used before the Dutch engine (kept for comparison)"""
+    scores = {}
+    played_against = {}
+
+    for participant in participants:
+        scores[participant.player_id] = 0
+        played_against[participant.player_id] = set()
+
+    for match in previous_matches:
+        if match.result == 'white_win':
+            scores[match.white_player.player_id] += 1
+        elif match.result == 'black_win':
+            scores[match.black_player.player_id] += 1
+        elif match.result == 'draw':
+            scores[match.white_player.player_id] += 0.5
+            scores[match.black_player.player_id] += 0.5
+
+        played_against[match.white_player.player_id].add(match.black_player.player_id)
+        played_against[match.black_player.player_id].add(match.white_player.player_id)
+
+    sorted_players = sorted(participants, key=lambda p: scores[p.player_id], reverse=True)
+
+    pairings = []
+    paired = set()
+
+    for player in sorted_players:
+        if player.player_id in paired:
+            continue
+        for opponent in sorted_players:
+            if (opponent.player_id != player.player_id and
+                    opponent.player_id not in paired and
+                    opponent.player_id not in played_against[player.player_id]):
+                pairings.append((player, opponent))
+                paired.add(player.player_id)
+                paired.add(opponent.player_id)
+                break
+
+    unpaired = [p for p in sorted_players if p.player_id not in paired]
+    if unpaired:
+        pairings.append((unpaired[0], None))
+
+    return pairings
+
+
+class Command(BaseCommand):
+    help = 'Benchmark Swiss pairing time and quality against the legacy greedy algorithm'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000, help='Number of players')
+        parser.add_argument('--rounds', type=int, default=9, help='Number of rounds to simulate')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for ratings and results')
+
+    def simulate(self, pairing_func, num_players, num_rounds, seed):
+        """Play a simulated tournament and collect timing and quality metrics"""
+        rng = random.Random(seed)
+        players = [
+            SimpleNamespace(player_id=i + 1, elo_rating=rng.randint(800, 2400))
+            for i in range(num_players)
+        ]
+        scores = {p.player_id: 0 for p in players}
+        colors = {p.player_id: '' for p in players}
+        byes = {p.player_id: 0 for p in players}
+        matches = []
+        stats = {
+            'total_time': 0.0,
+            'max_round_time': 0.0,
+            'unpaired': 0,
+            'repeat_pairings': 0,
+            'repeat_byes': 0,
+            'score_diff': 0.0,
+            'games': 0,
+        }
+        met = set()
+
+        for round_number in range(1, num_rounds + 1):
+            start = time.perf_counter()
+            pairings = pairing_func(players, round_number, matches)
+            elapsed = time.perf_counter() - start
+            stats['total_time'] += elapsed
+            stats['max_round_time'] = max(stats['max_round_time'], elapsed)
+
+            seated = set()
+            for white, black in pairings:
+                seated.add(white.player_id)
+                if black is None:
+                    if byes[white.player_id]:
+                        stats['repeat_byes'] += 1
+                    byes[white.player_id] += 1
+                    continue
+                seated.add(black.player_id)
+
+                key = frozenset((white.player_id, black.player_id))
+                if key in met:
+                    stats['repeat_pairings'] += 1
+                met.add(key)
+                stats['score_diff'] += abs(scores[white.player_id] - scores[black.player_id])
+                stats['games'] += 1
+
+                # Rating-weighted random result
+                expected = 1 / (1 + 10 ** ((black.elo_rating - white.elo_rating) / 400))
+                roll = rng.random()
+                if roll < expected * 0.85:
+                    result = 'white_win'
+                    scores[white.player_id] += 1
+                elif roll < 0.85:
+                    result = 'black_win'
+                    scores[black.player_id] += 1
+                else:
+                    result = 'draw'
+                    scores[white.player_id] += 0.5
+                    scores[black.player_id] += 0.5
+
+                colors[white.player_id] += 'W'
+                colors[black.player_id] += 'B'
+                matches.append(SimpleNamespace(
+                    match_id=len(matches) + 1,
+                    round_number=round_number,
+                    white_player=white,
+                    black_player=black,
+                    white_player_id=white.player_id,
+                    black_player_id=black.player_id,
+                    result=result,
+                ))
+
+            stats['unpaired'] += num_players - len(seated)
+
+        stats['color_violations'] = sum(
+            1 for history in colors.values()
+            if 'WWW' in history or 'BBB' in history or
+            abs(history.count('W') - history.count('B')) > 2
+        )
+        stats['avg_score_diff'] = stats['score_diff'] / stats['games'] if stats['games'] else 0
+        return stats
+
+    def handle(self, *args, **options):
+        num_players = options['players']
+        num_rounds = options['rounds']
+        seed = options['seed']
+
+        self.stdout.write(f'Simulating {num_rounds} rounds with {num_players} players (seed={seed})\n')
+
+        engines = [
+            ('legacy greedy', legacy_swiss_pairings),
+            ('dutch engine', generate_swiss_pairings),
+        ]
+        for name, func in engines:
+            stats = self.simulate(func, num_players, num_rounds, seed)
+            self.stdout.write(self.style.SUCCESS(name))
+            self.stdout.write(f"  total pairing time:   {stats['total_time'] * 1000:.1f} ms")
+            self.stdout.write(f"  slowest round:        {stats['max_round_time'] * 1000:.1f} ms")
+            self.stdout.write(f"  unpaired players:     {stats['unpaired']}")
+            self.stdout.write(f"  repeat pairings:      {stats['repeat_pairings']}")
+            self.stdout.write(f"  repeat byes:          {stats['repeat_byes']}")
+            self.stdout.write(f"  colour violations:    {stats['color_violations']}")
+            self.stdout.write(f"  avg score difference: {stats['avg_score_diff']:.3f}")
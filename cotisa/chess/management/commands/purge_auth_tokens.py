@@ -0,0 +1,14 @@
+"""
+Management command to delete expired API session tokens
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from chess.models import AuthToken
+
+
+class Command(BaseCommand):
+    help = 'Delete auth tokens whose expiry has passed'
+
+    def handle(self, *args, **options):
+        deleted, _ = AuthToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired token(s)'))
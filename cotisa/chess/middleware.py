@@ -7,8 +7,8 @@ Catches unhandled exceptions and returns proper JSON responses.
 import json
 import logging
 import traceback
-from django.http import JsonResponse
 from django.conf import settings
+from .json_encoding import JsonResponse
 
 logger = logging.getLogger(__name__)
 
@@ -0,0 +1,105 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:06
+
+from django.db import migrations, models
+import json
+
+
+def backfill_standings(apps, schema_editor):
+    """Replay completed matches of running tournaments into the new standings columns"""
+    TournamentActive = apps.get_model('chess', 'TournamentActive')
+    TournamentParticipant = apps.get_model('chess', 'TournamentParticipant')
+    Match = apps.get_model('chess', 'Match')
+
+    for tournament in TournamentActive.objects.filter(tournament_status='in_progress'):
+        participants = {
+            tp.player_id: tp for tp in TournamentParticipant.objects.filter(tournament=tournament)
+        }
+        opponents = {player_id: [] for player_id in participants}
+
+        matches = Match.objects.filter(
+            tournament=tournament,
+            match_status='completed',
+            result__in=['white_win', 'black_win', 'draw']
+        ).order_by('round_number', 'match_id')
+
+        for match in matches:
+            white = participants.get(match.white_player_id)
+            black = participants.get(match.black_player_id)
+            if not white or not black:
+                continue
+
+            white_score = {'white_win': 1, 'black_win': 0, 'draw': 0.5}[match.result]
+            for tp, score, color, opponent_id in (
+                (white, white_score, 'W', black.player_id),
+                (black, 1 - white_score, 'B', white.player_id),
+            ):
+                tp.points += score
+                tp.games_played += 1
+                tp.wins += 1 if score == 1 else 0
+                tp.color_history += color
+                opponents[tp.player_id].append(opponent_id)
+
+        for tp in participants.values():
+            tp.opponent_ids = json.dumps(opponents[tp.player_id])
+            tp.buchholz = sum(participants[o].points for o in opponents[tp.player_id] if o in participants)
+            tp.had_bye = tp.games_played < tournament.current_round - 1
+        TournamentParticipant.objects.bulk_update(
+            participants.values(),
+            ['points', 'games_played', 'wins', 'color_history', 'opponent_ids', 'buchholz', 'had_bye']
+        )
+        matches.update(standings_recorded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0014_add_current_round_to_tournament'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='standings_recorded',
+            field=models.BooleanField(default=False, help_text='True once the result has been applied to tournament standings'),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='buchholz',
+            field=models.FloatField(default=0, help_text="Sum of opponents' points"),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='color_history',
+            field=models.CharField(blank=True, default='', help_text="Colours played in order, e.g. 'WBW'", max_length=200),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='games_played',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='had_bye',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='opponent_ids',
+            field=models.TextField(blank=True, default='[]', help_text='JSON array of opponent player IDs in round order'),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='points',
+            field=models.FloatField(default=0, help_text='Tournament score (win=1, draw=0.5, bye=1)'),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='wins',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentparticipant',
+            index=models.Index(fields=['tournament', '-points', '-buchholz'], name='idx_tp_standings'),
+        ),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0015_add_tournament_standings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameMove',
+            fields=[
+                ('move_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('ply', models.PositiveSmallIntegerField(help_text='1-based half-move number')),
+                ('uci', models.CharField(help_text="Move in UCI notation, e.g. 'e2e4' or 'e7e8q'", max_length=5)),
+                ('san', models.CharField(max_length=10)),
+                ('clock', models.IntegerField(blank=True, help_text="Mover's remaining time in seconds after the move", null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('game', models.ForeignKey(db_column='game_id', on_delete=django.db.models.deletion.CASCADE, related_name='moves', to='chess.game')),
+            ],
+            options={
+                'db_table': 'game_moves',
+                'ordering': ['ply'],
+                'unique_together': {('game', 'ply')},
+            },
+        ),
+    ]
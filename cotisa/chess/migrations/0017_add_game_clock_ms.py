@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0016_add_game_moves'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='white_clock_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='black_clock_ms',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0017_add_game_clock_ms'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', 'status'], name='idx_game_tournament_status'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'white_player', 'match_status'], name='idx_match_tourn_white'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'black_player', 'match_status'], name='idx_match_tourn_black'),
+        ),
+    ]
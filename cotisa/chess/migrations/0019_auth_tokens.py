@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:05
+
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def move_tokens_to_table(apps, schema_editor):
+    """Hash the existing plaintext tokens into auth_tokens so nobody is logged out"""
+    Player = apps.get_model('chess', 'Player')
+    AuthToken = apps.get_model('chess', 'AuthToken')
+    key = settings.AUTH_TOKEN_HASH_KEY.encode()
+    now = django.utils.timezone.now()
+    expires_at = now + timedelta(seconds=settings.AUTH_TOKEN_TTL)
+    tokens = [
+        AuthToken(
+            player_id=player_id,
+            token_hash=hmac.new(key, token.encode(), hashlib.sha256).hexdigest(),
+            device_label='legacy',
+            created_at=now,
+            expires_at=expires_at,
+        )
+        for player_id, token in Player.objects.exclude(auth_token__isnull=True).exclude(
+            auth_token=''
+        ).values_list('player_id', 'auth_token').iterator()
+    ]
+    AuthToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0018_add_ongoing_games_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('token_id', models.AutoField(primary_key=True, serialize=False)),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('device_label', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('last_used_at', models.DateTimeField(blank=True, help_text='Written in batches, may lag by AUTH_LAST_USED_FLUSH_SECONDS', null=True)),
+                ('player', models.ForeignKey(db_column='player_id', on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'auth_tokens',
+                'indexes': [
+                    models.Index(fields=['player', 'created_at'], name='idx_auth_token_player'),
+                    models.Index(fields=['expires_at'], name='idx_auth_token_expires'),
+                ],
+            },
+        ),
+        migrations.RunPython(move_tokens_to_table, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='player',
+            name='auth_token',
+        ),
+    ]
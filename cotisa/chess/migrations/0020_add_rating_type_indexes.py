@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0019_auth_tokens'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['elo_bullet'], name='idx_elo_bullet'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['elo_blitz'], name='idx_elo_blitz'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['elo_rapid'], name='idx_elo_rapid'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['elo_daily'], name='idx_elo_daily'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chess', '0020_add_rating_type_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['white_player', 'match_date'], name='idx_match_white_date'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['black_player', 'match_date'], name='idx_match_black_date'),
+        ),
+    ]
@@ -5,6 +5,7 @@ These models match the database schema from database_schema_base.sql
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone as django_timezone
+import json
 import os
 import uuid
 
@@ -153,7 +154,6 @@ class Player(AbstractBaseUser, PermissionsMixin):
     
     is_active = models.BooleanField(default=True)
     last_login = models.DateTimeField(null=True, blank=True)
-    auth_token = models.CharField(max_length=64, null=True, blank=True, unique=True, help_text='Authentication token for API requests')
     
     objects = PlayerManager()
     
@@ -166,6 +166,10 @@ class Player(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['username'], name='idx_username'),
             models.Index(fields=['email'], name='idx_email'),
             models.Index(fields=['elo_rating'], name='idx_elo'),
+            models.Index(fields=['elo_bullet'], name='idx_elo_bullet'),
+            models.Index(fields=['elo_blitz'], name='idx_elo_blitz'),
+            models.Index(fields=['elo_rapid'], name='idx_elo_rapid'),
+            models.Index(fields=['elo_daily'], name='idx_elo_daily'),
             models.Index(fields=['role'], name='idx_role'),
         ]
     
@@ -210,6 +214,27 @@ class Player(AbstractBaseUser, PermissionsMixin):
         self.password_hash = value
 
 
+class AuthToken(models.Model):
+    """API session token - only a keyed hash of the token is stored (see decorators.hash_token)"""
+    token_id = models.AutoField(primary_key=True)
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, db_column='player_id', related_name='auth_tokens')
+    token_hash = models.CharField(max_length=64, unique=True)
+    device_label = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(default=django_timezone.now)
+    expires_at = models.DateTimeField()
+    last_used_at = models.DateTimeField(null=True, blank=True, help_text='Written in batches, may lag by AUTH_LAST_USED_FLUSH_SECONDS')
+    
+    class Meta:
+        db_table = 'auth_tokens'
+        indexes = [
+            models.Index(fields=['player', 'created_at'], name='idx_auth_token_player'),
+            models.Index(fields=['expires_at'], name='idx_auth_token_expires'),
+        ]
+    
+    def __str__(self):
+        return f"{self.player_id} ({self.device_label or 'unknown device'})"
+
+
 class Title(models.Model):
     """Chess titles (Novice, Amateur, Expert, etc.)"""
     title_id = models.AutoField(primary_key=True)
@@ -356,16 +381,31 @@ class TournamentParticipant(models.Model):
     is_eliminated = models.BooleanField(default=False)
     placement = models.IntegerField(null=True, blank=True)
     
+    # Running standings - updated incrementally as matches complete
+    points = models.FloatField(default=0, help_text='Tournament score (win=1, draw=0.5, bye=1)')
+    games_played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    color_history = models.CharField(max_length=200, default='', blank=True, help_text="Colours played in order, e.g. 'WBW'")
+    opponent_ids = models.TextField(default='[]', blank=True, help_text='JSON array of opponent player IDs in round order')
+    buchholz = models.FloatField(default=0, help_text='Sum of opponents\' points')
+    had_bye = models.BooleanField(default=False)
+    
     class Meta:
         db_table = 'tournament_participants'
         unique_together = [['tournament', 'player']]
         indexes = [
             models.Index(fields=['tournament'], name='idx_tournament_tp'),
             models.Index(fields=['player'], name='idx_player_tp'),
+            models.Index(fields=['tournament', '-points', '-buchholz'], name='idx_tp_standings'),
         ]
     
     def __str__(self):
         return f"{self.player.username} in {self.tournament.tournament_name}"
+    
+    @property
+    def opponents(self):
+        """List of opponent player IDs in round order"""
+        return json.loads(self.opponent_ids) if self.opponent_ids else []
 
 
 class Match(models.Model):
@@ -403,6 +443,7 @@ class Match(models.Model):
     pgn_notation = models.TextField(null=True, blank=True)
     round_number = models.IntegerField(default=1)
     match_duration_seconds = models.IntegerField(null=True, blank=True)
+    standings_recorded = models.BooleanField(default=False, help_text='True once the result has been applied to tournament standings')
     
     class Meta:
         db_table = 'matches'
@@ -411,7 +452,12 @@ class Match(models.Model):
             models.Index(fields=['white_player'], name='idx_white_player'),
             models.Index(fields=['black_player'], name='idx_black_player'),
             models.Index(fields=['match_date'], name='idx_match_date'),
+            models.Index(fields=['white_player', 'match_date'], name='idx_match_white_date'),
+            models.Index(fields=['black_player', 'match_date'], name='idx_match_black_date'),
             models.Index(fields=['match_status'], name='idx_status_m'),
+            # A player's unfinished matches in one tournament
+            models.Index(fields=['tournament', 'white_player', 'match_status'], name='idx_match_tourn_white'),
+            models.Index(fields=['tournament', 'black_player', 'match_status'], name='idx_match_tourn_black'),
         ]
     
     def __str__(self):
@@ -880,6 +926,8 @@ class Game(models.Model):
     time_increment_seconds = models.IntegerField(default=0)
     white_time_remaining = models.IntegerField(null=True, blank=True)  # seconds
     black_time_remaining = models.IntegerField(null=True, blank=True)  # seconds
+    white_clock_ms = models.IntegerField(null=True, blank=True)  # milliseconds left at last_move_time
+    black_clock_ms = models.IntegerField(null=True, blank=True)  # milliseconds left at last_move_time
     last_move_time = models.DateTimeField(null=True, blank=True)
     
     # Player join tracking
@@ -903,8 +951,39 @@ class Game(models.Model):
             models.Index(fields=['black_player'], name='idx_game_black_player'),
             models.Index(fields=['status'], name='idx_game_status'),
             models.Index(fields=['created_at'], name='idx_game_created'),
+            models.Index(fields=['tournament', 'status'], name='idx_game_tournament_status'),
         ]
     
     def __str__(self):
         return f"Game {self.game_id}: {self.white_player.username} vs {self.black_player.username}"
 
+
+
+class GameMove(models.Model):
+    """One half-move of a game, appended as the game is played"""
+    move_id = models.BigAutoField(primary_key=True)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='moves', db_column='game_id')
+    ply = models.PositiveSmallIntegerField(help_text='1-based half-move number')
+    uci = models.CharField(max_length=5, help_text="Move in UCI notation, e.g. 'e2e4' or 'e7e8q'")
+    san = models.CharField(max_length=10)
+    clock = models.IntegerField(null=True, blank=True, help_text="Mover's remaining time in seconds after the move")
+    created_at = models.DateTimeField(default=django_timezone.now)
+    
+    class Meta:
+        db_table = 'game_moves'
+        ordering = ['ply']
+        unique_together = [['game', 'ply']]
+    
+    def __str__(self):
+        return f"Game {self.game_id} ply {self.ply}: {self.san}"
+    
+    def to_dict(self):
+        """Move in the legacy move_history entry format"""
+        return {
+            'from': self.uci[:2],
+            'to': self.uci[2:4],
+            'san': self.san,
+            'promotion': self.uci[4:] or None,
+            'clock': self.clock,
+            'timestamp': self.created_at.isoformat()
+        }
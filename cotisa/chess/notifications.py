@@ -0,0 +1,106 @@
+"""
+Notification Fan-out
+Bulk notification rows and batched WebSocket delivery for events that
+reach every tournament participant at once (starts, new rounds).
+"""
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def notify_players(player_ids, notification_type, title, message,
+                   related_tournament=None, related_match=None, batch_size=500):
+    """
+    Create the same notification for many players with bulk INSERTs
+
+    Args:
+        player_ids: Iterable of player IDs to notify
+        notification_type: Notification.NOTIFICATION_TYPES value
+        title: Notification title
+        message: Notification body
+        related_tournament: Optional TournamentActive instance
+        related_match: Optional Match instance
+        batch_size: Maximum number of rows per INSERT statement
+
+    Returns:
+        int: Number of notifications created
+    """
+    from .models import Notification
+
+    notifications = [
+        Notification(
+            player_id=player_id,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            related_tournament=related_tournament,
+            related_match=related_match
+        )
+        for player_id in player_ids
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    return len(notifications)
+
+
+def publish_after_commit(messages):
+    """
+    Flush WebSocket messages once the surrounding transaction commits,
+    so clients never receive a round that could still be rolled back
+
+    Args:
+        messages: List of (group_name, message_type, data) tuples
+    """
+    from .publisher import get_publisher
+
+    if messages:
+        transaction.on_commit(lambda: get_publisher().publish_many(messages))
+
+
+def announce_round(tournament, round_number, player_ids, message, matches=None, user_message=None):
+    """
+    Publish a new round: one tournament-group message plus one message per
+    participant, sent together in a single channel-layer flush
+
+    Args:
+        tournament: TournamentActive instance
+        round_number: Round that was just created
+        player_ids: Iterable of participant player IDs
+        message: Text shown to participants
+        matches: Optional list of Match objects in the new round
+        user_message: Optional text for the per-user messages
+
+    Returns:
+        list: The queued (group_name, message_type, data) tuples
+    """
+    tournament_id = tournament.tournament_id
+    messages = [(
+        f'tournament_{tournament_id}',
+        'tournament_round_update',
+        {
+            'tournament_id': tournament_id,
+            'round_number': round_number,
+            'message': message,
+            'matches': [
+                {'player1': m.white_player.username, 'player2': m.black_player.username}
+                for m in matches or []
+            ]
+        }
+    )]
+    user_message = user_message or f'Nova runda {round_number} u turniru {tournament.tournament_name}!'
+    messages += [
+        (
+            f'user_{player_id}',
+            'new_round',
+            {
+                'tournament_id': tournament_id,
+                'round_number': round_number,
+                'message': user_message
+            }
+        )
+        for player_id in player_ids
+    ]
+    publish_after_commit(messages)
+    logger.info(f"[FANOUT] Queued {len(messages)} WebSocket messages for round {round_number}")
+    return messages
@@ -5,13 +5,147 @@ Provides reusable pagination for API list endpoints.
 """
 
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import JsonResponse
+from django.db import connections
+from django.db.models import Q
+import base64
+import binascii
+import json
+import logging
+
+from .middleware import ValidationError
+from .json_encoding import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _cursor_value(value):
+    # Full precision: DjangoJSONEncoder cuts datetimes to milliseconds, which would skip rows
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(values):
+    """Opaque cursor for a list of sort-key values"""
+    raw = json.dumps(values, default=_cursor_value, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor, length=None):
+    """
+    Sort-key values from a cursor made by encode_cursor
+
+    Raises:
+        ValidationError: The cursor was not issued by this API
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        values = None
+    if not isinstance(values, list) or (length is not None and len(values) != length):
+        raise ValidationError(message='Neispravan kursor', errors={'cursor': 'invalid'})
+    return values
+
+
+def estimate_count(queryset):
+    """
+    Row estimate from the query planner, without counting
+
+    Returns:
+        int or None: None when the database cannot estimate
+    """
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'mysql':
+                cursor.execute(f'EXPLAIN {sql}', params)
+                columns = [column[0] for column in cursor.description]
+                row = cursor.fetchone()
+                return int(row[columns.index('rows')]) if row else 0
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.warning(f"Row estimate failed: {e}")
+    return None
+
+
+def keyset_ordering(queryset):
+    """
+    (field, attname, descending) of the queryset ordering, ending with the
+    primary key so the order is total
+    """
+    meta = queryset.model._meta
+    order_by = list(queryset.query.order_by) or list(meta.ordering)
+    ordering = []
+    for name in order_by:
+        if not isinstance(name, str) or '__' in name or name.lstrip('-') == '?':
+            raise ValueError(f'Keyset pagination needs local field ordering, got {name!r}')
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        field = meta.pk if name == 'pk' else meta.get_field(name)
+        ordering.append((field, field.attname, descending))
+    if meta.pk not in [field for field, _, _ in ordering]:
+        ordering.append((meta.pk, meta.pk.attname, ordering[0][2] if ordering else False))
+    return ordering
+
+
+def keyset_order_by(ordering):
+    return [f"{'-' if descending else ''}{field.name}" for field, _, descending in ordering]
+
+
+def keyset_after(ordering, values):
+    """Q for rows strictly after the given sort-key values"""
+    # (a, b, pk) after (x, y, z): a beyond x, or a = x and b beyond y, ...
+    after = Q()
+    for i, (field, _, descending) in enumerate(ordering):
+        condition = Q(**{f"{field.name}__{'lt' if descending else 'gt'}": values[i]})
+        for (previous, _, _), value in zip(ordering[:i], values):
+            condition &= Q(**{previous.name: value})
+        after |= condition
+    return after
+
+
+def keyset_values(obj, ordering):
+    return [getattr(obj, attname) for _, attname, _ in ordering]
+
+
+def iterate_keyset(queryset, chunk_size=2000):
+    """
+    Iterate a large queryset in keyset-ordered chunks
+    
+    Each chunk is a separate LIMIT query starting after the previous one, so
+    memory stays bounded even where the database driver buffers a whole
+    result set (MySQL's does, which defeats QuerySet.iterator()).
+    """
+    ordering = keyset_ordering(queryset)
+    queryset = queryset.order_by(*keyset_order_by(ordering))
+    chunk = list(queryset[:chunk_size])
+    while chunk:
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = keyset_values(chunk[-1], ordering)
+        chunk = list(queryset.filter(keyset_after(ordering, last))[:chunk_size])
 
 
 class APIPaginator:
     """
     API Paginator for consistent pagination across endpoints.
     
+    Two modes:
+    - page mode (?page=N): Django Paginator, a COUNT(*) and an OFFSET query
+      per page, so deep pages get slower
+    - cursor mode (?cursor=, empty for the first page): keyset pagination on
+      the queryset's ordering plus the primary key, so every page is one
+      range query whatever its depth. Totals are only computed on request
+      (?total=exact or ?total=estimate).
+    
     Usage:
         paginator = APIPaginator(queryset, request, per_page=20)
         return paginator.get_response(serializer_func)
@@ -22,6 +156,8 @@ class APIPaginator:
         self.request = request
         self.per_page = int(request.GET.get('per_page', per_page))
         self.page_number = request.GET.get('page', 1)
+        self.cursor = request.GET.get('cursor')
+        self.total = request.GET.get('total')
         
         # Limit per_page to prevent abuse
         if self.per_page > 100:
@@ -29,6 +165,10 @@ class APIPaginator:
         if self.per_page < 1:
             self.per_page = 1
     
+    @property
+    def cursor_mode(self):
+        return self.cursor is not None
+    
     def get_page(self):
         """Get the current page of results"""
         paginator = Paginator(self.queryset, self.per_page)
@@ -42,6 +182,39 @@ class APIPaginator:
         
         return page, paginator
     
+    def get_cursor_page(self):
+        """
+        Rows after the cursor, in keyset order
+        
+        Returns:
+            tuple: (items, next_cursor or None)
+        """
+        ordering = keyset_ordering(self.queryset)
+        queryset = self.queryset.order_by(*keyset_order_by(ordering))
+        
+        if self.cursor:
+            raw = decode_cursor(self.cursor, len(ordering))
+            try:
+                values = [field.to_python(value) for (field, _, _), value in zip(ordering, raw)]
+            except Exception:
+                raise ValidationError(message='Neispravan kursor', errors={'cursor': 'invalid'})
+            queryset = queryset.filter(keyset_after(ordering, values))
+        
+        items = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            next_cursor = encode_cursor(keyset_values(items[-1], ordering))
+        return items, next_cursor
+    
+    def get_total(self):
+        """Item count for cursor mode: (total or None, is_estimate)"""
+        if self.total == 'exact':
+            return self.queryset.count(), False
+        if self.total == 'estimate':
+            return estimate_count(self.queryset), True
+        return None, False
+    
     def get_response(self, serializer_func, data_key='items'):
         """
         Get paginated JSON response.
@@ -53,6 +226,9 @@ class APIPaginator:
         Returns:
             JsonResponse with pagination metadata
         """
+        if self.cursor_mode:
+            return self.get_cursor_response(serializer_func, data_key)
+        
         page, paginator = self.get_page()
         
         items = [serializer_func(item) for item in page.object_list]
@@ -71,11 +247,30 @@ class APIPaginator:
                 'previous_page': page.previous_page_number() if page.has_previous() else None,
             }
         })
+    
+    def get_cursor_response(self, serializer_func, data_key='items'):
+        try:
+            items, next_cursor = self.get_cursor_page()
+        except ValidationError as e:
+            return e.to_response()
+        total, estimated = self.get_total()
+        
+        return JsonResponse({
+            'success': True,
+            data_key: [serializer_func(item) for item in items],
+            'pagination': {
+                'per_page': self.per_page,
+                'has_next': next_cursor is not None,
+                'next_cursor': next_cursor,
+                'total_items': total,
+                'total_is_estimate': estimated,
+            }
+        })
 
 
 def paginate_queryset(queryset, request, per_page=20, serializer_func=None, data_key='items'):
     """
-    Convenience function for quick pagination.
+    Convenience function for quick pagination (page or cursor mode, see APIPaginator).
     
     Usage:
         def api_list_items(request):
@@ -112,8 +307,8 @@ def serialize_tournament(tournament):
         'max_participants': tournament.max_participants,
         'time_control_minutes': getattr(tournament, 'time_control_minutes', 10),
         'increment_seconds': getattr(tournament, 'increment_seconds', 5),
-        'start_date': tournament.start_date.isoformat() if tournament.start_date else None,
-        'created_at': tournament.created_at.isoformat() if tournament.created_at else None,
+        'start_date': tournament.start_date,
+        'created_at': tournament.created_at,
         'created_by': tournament.created_by.username if tournament.created_by else None,
         'is_public': getattr(tournament, 'is_public', True),
         'is_rated': getattr(tournament, 'is_rated', True),
@@ -138,7 +333,7 @@ def serialize_player(player, include_sensitive=False):
         'matches_played': player.matches_played,
         'is_provisional': player.is_provisional,
         'active_title': player.active_title.title_name if player.active_title else None,
-        'date_joined': player.date_joined.isoformat() if player.date_joined else None,
+        'date_joined': player.date_joined,
     }
     
     if include_sensitive:
@@ -171,9 +366,9 @@ def serialize_match(match):
         } if match.winner else None,
         'result': match.result,
         'status': match.status,
-        'scheduled_time': match.scheduled_time.isoformat() if match.scheduled_time else None,
-        'start_time': match.start_time.isoformat() if match.start_time else None,
-        'end_time': match.end_time.isoformat() if match.end_time else None,
+        'scheduled_time': match.scheduled_time,
+        'start_time': match.start_time,
+        'end_time': match.end_time,
     }
 
 
@@ -185,6 +380,6 @@ def serialize_notification(notification):
         'message': notification.message,
         'notification_type': notification.notification_type,
         'is_read': notification.is_read,
-        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+        'created_at': notification.created_at,
         'link': getattr(notification, 'link', None),
     }
@@ -0,0 +1,346 @@
+"""
+WebSocket Publisher
+Queues WebSocket messages for the channel layer so views do not wait on
+channel-layer round-trips. Bursts are coalesced and sent in one flush.
+"""
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Message types where only the latest message per group and tournament
+# matters; earlier ones in the same batch are superseded and never sent. Each
+# carries the whole round, so a later one replaces an earlier one; game_update and
+# tournament_update carry distinct payloads and are never coalesced.
+COALESCED_TYPES = {'new_round', 'tournament_round_update'}
+
+_STOP = object()
+
+
+def build_event(message_type, data):
+    """Build the channel-layer event dict for a message"""
+    return {
+        'type': message_type.replace('-', '_'),
+        **data
+    }
+
+
+def coalesce(messages):
+    """
+    Drop superseded messages from a batch
+
+    For COALESCED_TYPES only the last message per (group, type, tournament)
+    is kept, at the position of the first one, so a user in two tournaments
+    still gets both rounds. Every other message is kept in order.
+
+    Args:
+        messages: List of (group_name, message_type, data) tuples
+
+    Returns:
+        list: The messages that still need to be sent
+    """
+    result = []
+    positions = {}
+    for group_name, message_type, data in messages:
+        if message_type in COALESCED_TYPES:
+            key = (group_name, message_type, data.get('tournament_id'))
+            if key in positions:
+                result[positions[key]] = (group_name, message_type, data)
+                continue
+            positions[key] = len(result)
+        result.append((group_name, message_type, data))
+    return result
+
+
+async def group_send_ordered(channel_layer, messages):
+    """
+    Send messages through the channel layer, each group's in order
+
+    Different groups are sent concurrently, but a group's messages go one
+    after another, so e.g. game_end never overtakes the last game_move.
+
+    Args:
+        messages: List of (group_name, message_type, data) tuples
+
+    Returns:
+        list: The exception of every message that failed
+    """
+    by_group = {}
+    for group_name, message_type, data in messages:
+        by_group.setdefault(group_name, []).append(build_event(message_type, data))
+
+    async def send_group(group_name, events):
+        errors = []
+        for event in events:
+            try:
+                await channel_layer.group_send(group_name, event)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    results = await asyncio.gather(*[
+        send_group(group_name, events) for group_name, events in by_group.items()
+    ])
+    return [error for errors in results for error in errors]
+
+
+class WebSocketPublisher:
+    """
+    Sends WebSocket group messages through the channel layer
+
+    publish()/publish_many() are for synchronous code. In background mode
+    they only enqueue and a sender thread with its own event loop flushes
+    batches; otherwise the batch is flushed inline with one async_to_sync
+    call. apublish()/apublish_many() send directly on the caller's loop.
+    """
+
+    def __init__(self, background=False, batch_window=0.01, max_batch=500, queue_size=10000):
+        self.background = background
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._thread = None
+        self._metrics = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'batches': 0,
+            'last_batch_size': 0,
+            'last_flush_ms': 0.0,
+            'max_flush_ms': 0.0,
+        }
+
+    # ------------------------------------------
+    # Public API
+    # ------------------------------------------
+
+    def publish(self, group_name, message_type, data):
+        """
+        Publish one message from synchronous code
+
+        Returns:
+            bool: True if the message was accepted
+        """
+        return self.publish_many([(group_name, message_type, data)]) == 1
+
+    def publish_many(self, messages):
+        """
+        Publish many messages from synchronous code
+
+        Args:
+            messages: List of (group_name, message_type, data) tuples
+
+        Returns:
+            int: Number of messages accepted (queued or sent)
+        """
+        messages = list(messages)
+        if not messages:
+            return 0
+
+        if not self.background:
+            self._count(enqueued=len(messages))
+            self._flush_inline(messages)
+            return len(messages)
+
+        self._ensure_thread()
+        accepted = 0
+        for message in messages:
+            with self._lock:
+                self._pending += 1
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                self._count(dropped=1)
+                self._done(1)
+                continue
+            accepted += 1
+
+        self._count(enqueued=accepted)
+        if accepted < len(messages):
+            logger.warning(f"[PUBLISH] Queue full, dropped {len(messages) - accepted} WebSocket messages")
+        return accepted
+
+    async def apublish(self, group_name, message_type, data):
+        """Publish one message from async code"""
+        return await self.apublish_many([(group_name, message_type, data)]) == 1
+
+    async def apublish_many(self, messages):
+        """
+        Publish many messages from async code, sent on the running event
+        loop (groups concurrently, each group in order)
+
+        Returns:
+            int: Number of messages sent
+        """
+        messages = list(messages)
+        if not messages:
+            return 0
+        self._count(enqueued=len(messages))
+        return await self._send(messages)
+
+    def flush(self, timeout=5.0):
+        """
+        Wait until every queued message has been sent
+
+        Returns:
+            bool: True if the queue drained before the timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def stop(self, timeout=5.0):
+        """Flush pending messages and stop the sender thread"""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_metrics(self):
+        """
+        Delivery counters for monitoring
+
+        Returns:
+            dict: Counters plus current queue depth and mode
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['pending'] = self._pending
+        metrics['background'] = self.background
+        return metrics
+
+    # ------------------------------------------
+    # Internals
+    # ------------------------------------------
+
+    def _count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._metrics[key] += value
+
+    def _done(self, count):
+        with self._idle:
+            self._pending -= count
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    def _record_flush(self, batch_size, sent, failed, coalesced, started):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._metrics['batches'] += 1
+            self._metrics['sent'] += sent
+            self._metrics['failed'] += failed
+            self._metrics['coalesced'] += coalesced
+            self._metrics['last_batch_size'] = batch_size
+            self._metrics['last_flush_ms'] = elapsed_ms
+            self._metrics['max_flush_ms'] = max(self._metrics['max_flush_ms'], elapsed_ms)
+
+    def _flush_inline(self, messages):
+        from .consumers import send_websocket_messages
+
+        started = time.monotonic()
+        batch = coalesce(messages)
+        try:
+            sent = send_websocket_messages(batch)
+            failed = len(batch) - sent
+        except Exception as e:
+            logger.error(f"[PUBLISH] Error sending WebSocket messages: {e}")
+            sent, failed = 0, len(batch)
+        self._record_flush(len(messages), sent, failed, len(messages) - len(batch), started)
+
+    async def _send(self, messages):
+        from channels.layers import get_channel_layer
+
+        started = time.monotonic()
+        batch = coalesce(messages)
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            self._record_flush(len(messages), 0, len(batch), len(messages) - len(batch), started)
+            return 0
+
+        failed = len(await group_send_ordered(channel_layer, batch))
+        if failed:
+            logger.error(f"[PUBLISH] {failed} of {len(batch)} WebSocket messages failed")
+        self._record_flush(len(messages), len(batch) - failed, failed, len(messages) - len(batch), started)
+        return len(batch) - failed
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='websocket-publisher', daemon=True
+            )
+            self._thread.start()
+
+    def _next_batch(self):
+        """Block for one message, then gather the rest of the burst"""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                message = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if message is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(message)
+        return batch
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                try:
+                    loop.run_until_complete(self._send(batch))
+                except Exception as e:
+                    logger.error(f"[PUBLISH] Error flushing WebSocket batch: {e}")
+                    self._count(failed=len(batch))
+                finally:
+                    self._done(len(batch))
+        finally:
+            loop.close()
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """Return the process-wide publisher configured from settings"""
+    global _publisher
+    if _publisher is None:
+        from django.conf import settings
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = WebSocketPublisher(
+                    background=getattr(settings, 'WEBSOCKET_PUBLISH_BACKGROUND', False),
+                    batch_window=getattr(settings, 'WEBSOCKET_PUBLISH_BATCH_WINDOW', 0.01),
+                    max_batch=getattr(settings, 'WEBSOCKET_PUBLISH_MAX_BATCH', 500),
+                    queue_size=getattr(settings, 'WEBSOCKET_PUBLISH_QUEUE_SIZE', 10000),
+                )
+                atexit.register(_publisher.stop)
+    return _publisher
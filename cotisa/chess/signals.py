@@ -0,0 +1,57 @@
+"""
+Model signal handlers
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import AuthToken, Game, Player, Role
+from .decorators import invalidate_all_players, invalidate_player, invalidate_token
+from . import game_state, leaderboard
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def evict_game_state(sender, instance, **kwargs):
+    """Full saves (admin, match setup) bypass the write-through path, so drop the cached copy"""
+    transaction.on_commit(lambda: game_state.evict(instance.game_id))
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def invalidate_player_auth(sender, instance, **kwargs):
+    """Deactivation, role reassignment and deletion all save or delete the player row"""
+    invalidate_player(instance.player_id)
+    # A request racing this transaction may have cached the old row again
+    transaction.on_commit(lambda: invalidate_player(instance.player_id))
+
+
+LEADERBOARD_FIELDS = frozenset(leaderboard.RATING_FIELDS.values()) | {'is_active'}
+
+
+@receiver(post_save, sender=Player)
+def record_leaderboard_change(sender, instance, update_fields=None, **kwargs):
+    """Rating updates (update_player_ratings), new players and deactivation reach the rank indexes"""
+    if update_fields is not None and not LEADERBOARD_FIELDS.intersection(update_fields):
+        return
+    leaderboard.record_player(instance)
+
+
+@receiver(post_delete, sender=Player)
+def record_leaderboard_removal(sender, instance, **kwargs):
+    leaderboard.record_removal(instance.player_id)
+
+
+@receiver(post_save, sender=AuthToken)
+@receiver(post_delete, sender=AuthToken)
+def invalidate_token_auth(sender, instance, **kwargs):
+    """Logout, rotation and expiry purges delete the token row"""
+    invalidate_token(instance.token_hash)
+    transaction.on_commit(lambda: invalidate_token(instance.token_hash))
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_role_auth(sender, instance, **kwargs):
+    """Cached players carry their role; drop them all when a role changes"""
+    invalidate_all_players()
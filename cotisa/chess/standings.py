@@ -0,0 +1,134 @@
+"""
+Tournament Standings
+Incremental per-participant standings kept on TournamentParticipant
+"""
+import json
+import logging
+
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+RESULT_SCORES = {
+    'white_win': (1, 0),
+    'black_win': (0, 1),
+    'draw': (0.5, 0.5),
+}
+
+
+def record_match_result(match):
+    """
+    Apply a completed match to both players' standings
+
+    Only the two participant rows are rewritten; opponents' Buchholz
+    scores are bumped with a single UPDATE per player. Each match is
+    applied at most once, guarded by Match.standings_recorded.
+
+    Args:
+        match: Completed Match instance with result set
+
+    Returns:
+        bool: True if standings were updated
+    """
+    from .models import Match, TournamentParticipant
+
+    if not match.tournament_id or match.result not in RESULT_SCORES:
+        return False
+
+    white_score, black_score = RESULT_SCORES[match.result]
+
+    with transaction.atomic():
+        # Claim the match so duplicate completions don't count it twice
+        claimed = Match.objects.filter(
+            match_id=match.match_id,
+            standings_recorded=False
+        ).update(standings_recorded=True)
+        if not claimed:
+            return False
+        match.standings_recorded = True
+
+        rows = {
+            tp.player_id: tp for tp in TournamentParticipant.objects.select_for_update().filter(
+                tournament_id=match.tournament_id,
+                player_id__in=[match.white_player_id, match.black_player_id]
+            )
+        }
+        white = rows.get(match.white_player_id)
+        black = rows.get(match.black_player_id)
+        if not white or not black:
+            logger.warning(f"[STANDINGS] Match {match.match_id} players are not tournament participants")
+            return False
+
+        white_opponents = white.opponents
+        black_opponents = black.opponents
+
+        for tp, score, color, opponents, opponent_id in (
+            (white, white_score, 'W', white_opponents, black.player_id),
+            (black, black_score, 'B', black_opponents, white.player_id),
+        ):
+            tp.points += score
+            tp.games_played += 1
+            if score == 1:
+                tp.wins += 1
+            tp.color_history += color
+            tp.opponent_ids = json.dumps(opponents + [opponent_id])
+
+        # Each player's Buchholz gains the new opponent's full score
+        white.buchholz += black.points
+        black.buchholz += white.points
+
+        fields = ['points', 'games_played', 'wins', 'color_history', 'opponent_ids', 'buchholz']
+        white.save(update_fields=fields)
+        black.save(update_fields=fields)
+
+        # Earlier opponents gain this game's points in their Buchholz
+        for opponents, score in ((white_opponents, white_score), (black_opponents, black_score)):
+            if opponents and score:
+                TournamentParticipant.objects.filter(
+                    tournament_id=match.tournament_id,
+                    player_id__in=opponents
+                ).update(buchholz=F('buchholz') + score)
+
+    return True
+
+
+def record_bye(tournament, player, points=1):
+    """
+    Record a pairing-allocated bye (worth one point by default)
+
+    Args:
+        tournament: TournamentActive instance
+        player: Player receiving the bye
+        points: Points awarded for the bye
+    """
+    from .models import TournamentParticipant
+
+    participant = TournamentParticipant.objects.filter(tournament=tournament, player=player)
+    opponents = participant.values_list('opponent_ids', flat=True).first()
+    participant.update(points=F('points') + points, had_bye=True)
+
+    # Opponents' Buchholz includes this player's score
+    opponent_ids = json.loads(opponents) if opponents else []
+    if opponent_ids and points:
+        TournamentParticipant.objects.filter(
+            tournament=tournament,
+            player_id__in=opponent_ids
+        ).update(buchholz=F('buchholz') + points)
+
+
+def get_standings(tournament):
+    """
+    Current standings ordered by points, Buchholz and rating
+
+    Args:
+        tournament: TournamentActive instance
+
+    Returns:
+        QuerySet of TournamentParticipant with player loaded
+    """
+    from .models import TournamentParticipant
+
+    return TournamentParticipant.objects.filter(
+        tournament=tournament
+    ).select_related('player').order_by('-points', '-buchholz', '-player__elo_rating')
@@ -0,0 +1,102 @@
+"""
+Streaming JSON Responses
+========================
+For list endpoints whose result can run to hundreds of thousands of rows
+(admin exports, full tournament lists). Rows are read in keyset chunks and
+encoded as they go, so memory stays flat and the first bytes leave before
+the last row is read.
+
+The body has the same shape JsonResponse would produce:
+    {"success": true, <extra...>, "<data_key>": [row, row, ...]}
+"""
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+
+from .json_encoding import dumps
+from .pagination import iterate_keyset
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per query and bytes gathered per yielded chunk
+STREAM_CHUNK_ROWS = 2000
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def iter_json_list(items, serializer_func, data_key='items', extra=None, chunk_size=STREAM_CHUNK_ROWS):
+    """
+    Yield the encoded response body in chunks of about STREAM_CHUNK_BYTES
+
+    Args:
+        items: QuerySet (read with iterate_keyset) or any iterable
+        serializer_func: Function that takes an item and returns a dict
+        data_key: Key name for the data array
+        extra: Other top-level keys, written before the array
+    """
+    head = {'success': True, **(extra or {})}
+    yield dumps(head)[:-1] + b',' + dumps(data_key) + b':['
+
+    if isinstance(items, QuerySet):
+        items = iterate_keyset(items, chunk_size)
+
+    buffer = []
+    size = 0
+    first = True
+    for item in items:
+        row = dumps(serializer_func(item))
+        if not first:
+            row = b',' + row
+        first = False
+        buffer.append(row)
+        size += len(row)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(b']}')
+    yield b''.join(buffer)
+
+
+class JSONStreamingResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse over a synchronous body that also streams under ASGI
+
+    WSGI iterates the body directly. Django's ASGI handler would read a
+    synchronous body into a list before sending anything, so __aiter__
+    pulls one chunk at a time through sync_to_async instead; the keyset
+    queries run on the request's sync thread as they would in the view.
+    """
+
+    async def __aiter__(self):
+        chunks = iter(self.streaming_content)
+        next_chunk = sync_to_async(next, thread_sensitive=True)
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+
+
+def stream_json_response(items, serializer_func, data_key='items', extra=None, chunk_size=STREAM_CHUNK_ROWS):
+    """
+    StreamingHttpResponse of a JSON list
+
+    Errors after the first chunk cannot change the status code; they are
+    logged and the body is cut short, which clients see as invalid JSON.
+
+    Usage:
+        return stream_json_response(
+            Player.objects.order_by('-date_joined'),
+            lambda p: {'id': p.player_id, 'username': p.username},
+            data_key='players'
+        )
+    """
+    def body():
+        try:
+            yield from iter_json_list(items, serializer_func, data_key, extra, chunk_size)
+        except Exception as e:
+            logger.error(f"Streaming {data_key} failed: {e}", exc_info=True)
+
+    return JSONStreamingResponse(body(), content_type='application/json')
@@ -0,0 +1,358 @@
+"""
+Swiss Pairing Engine
+Dutch-style pairing with score groups, colour balance, float handling
+and the bye-once rule.
+
+The engine works on plain player records (ids, scores, colour history,
+opponents) so it can be fed from the database, from persisted standings
+or from a benchmark without touching the ORM.
+"""
+
+WHITE = 'W'
+BLACK = 'B'
+
+# Colour preference strengths (FIDE C.04.1)
+PREF_NONE = 0
+PREF_MILD = 1
+PREF_STRONG = 2
+PREF_ABSOLUTE = 3
+
+# How many legal candidates are inspected when looking for one that
+# also satisfies both colour preferences
+COLOR_LOOKAHEAD = 6
+
+_FLOAT = -1
+
+
+class SwissPlayer:
+    """
+    Pairing state of a single tournament participant
+
+    Args:
+        player_id: Unique player identifier
+        score: Points scored so far
+        rating: Rating used to order players inside a score group
+        colors: Colour history as a string/list of 'W' and 'B'
+        opponents: Iterable of player ids already faced
+        had_bye: True if the player already received a bye
+    """
+    __slots__ = ('player_id', 'score', 'rating', 'colors', 'opponents', 'had_bye',
+                 'pref_color', 'pref_strength')
+
+    def __init__(self, player_id, score=0, rating=0, colors='', opponents=(), had_bye=False):
+        self.player_id = player_id
+        self.score = score
+        self.rating = rating
+        self.colors = ''.join(colors)
+        self.opponents = set(opponents)
+        self.had_bye = had_bye
+        self.pref_color, self.pref_strength = color_preference(self.colors)
+
+    def __repr__(self):
+        return f"SwissPlayer({self.player_id}, score={self.score})"
+
+
+def color_preference(colors):
+    """
+    Determine colour preference from a colour history
+
+    Args:
+        colors: String of 'W'/'B' for every game played (byes excluded)
+
+    Returns:
+        tuple: (preferred colour or None, preference strength)
+    """
+    if not colors:
+        return None, PREF_NONE
+
+    diff = colors.count(WHITE) - colors.count(BLACK)
+    last_two = colors[-2:]
+
+    if diff > 1 or last_two == WHITE * 2:
+        return BLACK, PREF_ABSOLUTE
+    if diff < -1 or last_two == BLACK * 2:
+        return WHITE, PREF_ABSOLUTE
+    if diff == 1:
+        return BLACK, PREF_STRONG
+    if diff == -1:
+        return WHITE, PREF_STRONG
+
+    return (BLACK if colors[-1] == WHITE else WHITE), PREF_MILD
+
+
+def _colors_compatible(a, b):
+    """Two players with the same absolute colour preference can't meet"""
+    return not (
+        a.pref_strength == PREF_ABSOLUTE and
+        b.pref_strength == PREF_ABSOLUTE and
+        a.pref_color == b.pref_color
+    )
+
+
+def _colors_satisfied(a, b):
+    """True if both players can get their preferred colour"""
+    return a.pref_color is None or b.pref_color is None or a.pref_color != b.pref_color
+
+
+def allocate_colors(higher, lower, board_number=0):
+    """
+    Decide who plays white
+
+    Args:
+        higher: Higher ranked SwissPlayer
+        lower: Lower ranked SwissPlayer
+        board_number: Board index, used to alternate colours in round one
+
+    Returns:
+        tuple: (white SwissPlayer, black SwissPlayer)
+    """
+    if higher.pref_color is None and lower.pref_color is None:
+        # No history - alternate colours down the boards
+        return (higher, lower) if board_number % 2 == 0 else (lower, higher)
+
+    if higher.pref_color != lower.pref_color:
+        # At least one preference and no conflict - both are satisfied
+        if higher.pref_color == WHITE or lower.pref_color == BLACK:
+            return higher, lower
+        return lower, higher
+
+    # Same preferred colour - the stronger preference wins
+    if lower.pref_strength > higher.pref_strength:
+        winner, other = lower, higher
+    elif higher.pref_strength > lower.pref_strength:
+        winner, other = higher, lower
+    else:
+        # Equal strength - alternate from the last round in which they differed
+        winner, other = higher, lower
+        for a, b in zip(reversed(higher.colors), reversed(lower.colors)):
+            if a != b:
+                winner, other = (higher, lower) if a != higher.pref_color else (lower, higher)
+                break
+
+    if winner.pref_color == WHITE:
+        return winner, other
+    return other, winner
+
+
+def _pair_bracket(players, float_budget, node_limit, allow_repeats=False, ignore_colors=False):
+    """
+    Pair a single bracket (score group plus downfloaters) with backtracking
+
+    Players are split into S1 (top half) and S2 (bottom half). The highest
+    unpaired player is always paired first, trying S2 in order, then the
+    rest of S1. Up to float_budget players may be left over to float down.
+
+    Returns:
+        tuple: (list of (higher, lower) pairs, list of floaters) or None
+    """
+    n = len(players)
+    if n == 0:
+        return [], []
+
+    half = n // 2
+    order = list(range(half, n)) + list(range(half))
+    used = [False] * n
+    floats = [0]
+
+    def legal(x, y):
+        a, b = players[x], players[y]
+        if not allow_repeats and b.player_id in a.opponents:
+            return False
+        return ignore_colors or _colors_compatible(a, b)
+
+    def candidates(x):
+        a = players[x]
+        deferred = []
+        position = 0
+        # First pass: a few legal candidates that also satisfy both colours
+        while position < n and len(deferred) < COLOR_LOOKAHEAD:
+            y = order[position]
+            position += 1
+            if y == x or used[y] or not legal(x, y):
+                continue
+            if _colors_satisfied(a, players[y]):
+                yield y
+            else:
+                deferred.append(y)
+        for y in deferred:
+            if not used[y]:
+                yield y
+        # Then every remaining legal candidate in S2/S1 order
+        while position < n:
+            y = order[position]
+            position += 1
+            if y != x and not used[y] and legal(x, y):
+                yield y
+        if floats[0] < float_budget:
+            yield _FLOAT
+
+    def first_free(start):
+        for i in range(start, n):
+            if not used[i]:
+                return i
+        return None
+
+    x = first_free(0)
+    used[x] = True
+    stack_x = [x]
+    stack_gen = [candidates(x)]
+    choices = []
+    nodes = 0
+
+    while stack_gen:
+        nodes += 1
+        if nodes > node_limit:
+            return None
+
+        x = stack_x[-1]
+        # Undo this level's previous choice before trying the next one
+        if len(choices) == len(stack_gen):
+            previous = choices.pop()
+            if previous == _FLOAT:
+                floats[0] -= 1
+            else:
+                used[previous] = False
+
+        y = next(stack_gen[-1], None)
+        if y is None:
+            stack_gen.pop()
+            stack_x.pop()
+            used[x] = False
+            continue
+
+        if y == _FLOAT:
+            floats[0] += 1
+        else:
+            used[y] = True
+        choices.append(y)
+
+        nx = first_free(x + 1)
+        if nx is None:
+            pairs = []
+            floaters = []
+            for px, py in zip(stack_x, choices):
+                if py == _FLOAT:
+                    floaters.append(players[px])
+                else:
+                    pairs.append((players[px], players[py]))
+            return pairs, floaters
+
+        used[nx] = True
+        stack_x.append(nx)
+        stack_gen.append(candidates(nx))
+
+    return None
+
+
+def _pair_score_groups(players, allow_repeats=False, ignore_colors=False):
+    """
+    Pair all players bracket by bracket from the top score group down
+
+    When the last bracket can't be completed it is merged with the
+    previous one and re-paired, moving up until a solution is found.
+
+    Returns:
+        list: (higher, lower) pairs, or None if no pairing exists
+    """
+    groups = []
+    for player in players:
+        if groups and groups[-1][0].score == player.score:
+            groups[-1].append(player)
+        else:
+            groups.append([player])
+
+    node_limit = 50 * len(players) + 2000
+    history = []
+    carry = []
+    i = 0
+
+    while i < len(groups):
+        bracket = carry + groups[i]
+        is_last = i == len(groups) - 1
+
+        result = None
+        if is_last:
+            result = _pair_bracket(bracket, 0, node_limit, allow_repeats, ignore_colors)
+        else:
+            # Float as few players as possible into the next bracket
+            for budget in range(len(bracket) % 2, len(bracket) + 1, 2):
+                result = _pair_bracket(bracket, budget, node_limit, allow_repeats, ignore_colors)
+                if result is not None:
+                    break
+
+        if result is None:
+            if not history:
+                return None
+            # Merge with the previous bracket and pair them together
+            # Its downfloaters only reached this bracket through carry and
+            # are still in previous_bracket, so carry is dropped, not merged
+            previous_bracket, _ = history.pop()
+            merged = set(id(p) for p in previous_bracket)
+            groups[i] = previous_bracket + [p for p in groups[i] if id(p) not in merged]
+            carry = []
+            continue
+
+        pairs, floaters = result
+        history.append((bracket, pairs))
+        carry = floaters
+        i += 1
+
+    return [pair for _, pairs in history for pair in pairs]
+
+
+def bye_candidates(players):
+    """
+    Bye candidates in order of preference: lowest ranked players who
+    haven't had a bye yet, then everyone else from the bottom up
+
+    Args:
+        players: SwissPlayer list sorted from highest to lowest rank
+
+    Returns:
+        list: SwissPlayer objects
+    """
+    ranked = list(reversed(players))
+    return [p for p in ranked if not p.had_bye] + [p for p in ranked if p.had_bye]
+
+
+def pair_round(players):
+    """
+    Generate pairings for the next Swiss round
+
+    Args:
+        players: Iterable of SwissPlayer objects
+
+    Returns:
+        tuple: (list of (white SwissPlayer, black SwissPlayer), bye SwissPlayer or None)
+    """
+    ranked = sorted(players, key=lambda p: (-p.score, -p.rating, str(p.player_id)))
+
+    bye = None
+    pairs = None
+    if len(ranked) % 2 == 1:
+        # The bye goes to the lowest eligible player whose removal still
+        # leaves a valid pairing for everyone else
+        candidates = bye_candidates(ranked)
+        for candidate in candidates:
+            remaining = [p for p in ranked if p is not candidate]
+            pairs = _pair_score_groups(remaining)
+            if pairs is not None:
+                bye, ranked = candidate, remaining
+                break
+        if bye is None:
+            bye = candidates[0]
+            ranked = [p for p in ranked if p is not bye]
+    else:
+        pairs = _pair_score_groups(ranked)
+
+    # Relax constraints step by step if a perfect pairing doesn't exist
+    if pairs is None:
+        pairs = _pair_score_groups(ranked, ignore_colors=True)
+    if pairs is None:
+        pairs = _pair_score_groups(ranked, allow_repeats=True, ignore_colors=True)
+
+    # Order boards by the stronger player's rank
+    rank = {p.player_id: index for index, p in enumerate(ranked)}
+    pairs.sort(key=lambda pair: rank[pair[0].player_id])
+
+    return [allocate_colors(a, b, board) for board, (a, b) in enumerate(pairs)], bye
@@ -21,6 +21,7 @@ from .models import (
     Title, PlayerTitle, Achievement, Notification, Friendship
 )
 from . import elo_rating
+from .decorators import issue_token
 
 
 # ============================================
@@ -373,6 +374,98 @@ class AuthenticationAPITests(TestCase):
         response = self.client.get('/api/me/')
         self.assertEqual(response.status_code, 401)
 
+    def test_token_lookup_is_cached_until_logout(self):
+        """Repeated requests reuse the cached player; logout drops it"""
+        from django.core.cache import caches
+        from .decorators import AUTH_CACHE_ALIAS, get_auth_metrics
+        caches[AUTH_CACHE_ALIAS].clear()
+        issue_token(self.player, token='cached-token')
+
+        before = get_auth_metrics()
+        for _ in range(3):
+            response = self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='cached-token')
+            self.assertEqual(response.status_code, 200)
+        after = get_auth_metrics()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 2)
+
+        self.client.post('/api/logout/', HTTP_X_AUTH_TOKEN='cached-token')
+        response = self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='cached-token')
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_reaches_cached_player(self):
+        """A role change is visible on the next request despite the token cache"""
+        from django.core.cache import caches
+        from .decorators import AUTH_CACHE_ALIAS
+        caches[AUTH_CACHE_ALIAS].clear()
+        issue_token(self.player, token='role-token')
+        response = self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='role-token')
+        self.assertEqual(response.json()['user']['role'], 'player')
+
+        admin_role = Role.objects.create(role_name='admin')
+        self.player.role = admin_role
+        self.player.save()
+        response = self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='role-token')
+        self.assertEqual(response.json()['user']['role'], 'admin')
+
+    def test_tokens_are_stored_hashed_per_session(self):
+        """Each login adds a session; only a keyed hash of the token is stored"""
+        from .decorators import hash_token
+        from .models import AuthToken
+        tokens = []
+        for _ in range(2):
+            response = self.client.post(
+                '/api/login/',
+                data=json.dumps({'username': 'testuser', 'password': 'testpass123'}),
+                content_type='application/json',
+                HTTP_USER_AGENT='TestBrowser/1.0'
+            )
+            tokens.append(response.json()['auth_token'])
+
+        sessions = AuthToken.objects.filter(player=self.player)
+        self.assertEqual(sessions.count(), 2)
+        self.assertFalse(sessions.filter(token_hash__in=tokens).exists())
+        self.assertTrue(sessions.filter(token_hash=hash_token(tokens[0])).exists())
+        self.assertTrue(all(s.expires_at > timezone.now() and s.device_label == 'TestBrowser/1.0' for s in sessions))
+        for token in tokens:
+            response = self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN=token)
+            self.assertEqual(response.status_code, 200)
+
+    def test_expired_token_is_rejected(self):
+        """A token past its expiry no longer authenticates"""
+        from datetime import timedelta
+        from .models import AuthToken
+        issue_token(self.player, token='old-token')
+        AuthToken.objects.filter(player=self.player).update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='old-token')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_rotates_token(self):
+        """Refreshing returns a new token and revokes the old one"""
+        issue_token(self.player, token='rotate-me')
+        response = self.client.post('/api/token/refresh/', HTTP_X_AUTH_TOKEN='rotate-me')
+        self.assertEqual(response.status_code, 200)
+        new_token = response.json()['auth_token']
+        self.assertNotEqual(new_token, 'rotate-me')
+        self.assertEqual(self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='rotate-me').status_code, 401)
+        self.assertEqual(self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN=new_token).status_code, 200)
+
+    def test_last_used_is_written_in_batches(self):
+        """Requests do not write last_used_at; a flush writes it once"""
+        from django.test import override_settings
+        from .decorators import flush_last_used
+        from .models import AuthToken
+        issue_token(self.player, token='busy-token')
+        with override_settings(AUTH_LAST_USED_FLUSH_SECONDS=3600):
+            for _ in range(3):
+                self.client.get('/api/profile/', HTTP_X_AUTH_TOKEN='busy-token')
+        session = AuthToken.objects.get(player=self.player)
+        self.assertIsNone(session.last_used_at)
+
+        flush_last_used()
+        session.refresh_from_db()
+        self.assertIsNotNone(session.last_used_at)
+
 
 class TournamentAPITests(TestCase):
     """Test tournament API endpoints"""
@@ -392,8 +485,7 @@ class TournamentAPITests(TestCase):
             password='adminpass',
             role=self.admin_role
         )
-        self.admin.auth_token = 'admin-token-123'
-        self.admin.save()
+        issue_token(self.admin, token='admin-token-123')
         
         self.player = Player.objects.create_user(
             username='player1',
@@ -401,8 +493,7 @@ class TournamentAPITests(TestCase):
             password='playerpass',
             role=self.player_role
         )
-        self.player.auth_token = 'player-token-123'
-        self.player.save()
+        issue_token(self.player, token='player-token-123')
     
     def test_create_tournament_as_admin(self):
         """Admin should be able to create tournament"""
@@ -480,8 +571,7 @@ class MatchAPITests(TestCase):
         self.player1 = Player.objects.create_user(
             username='player1', email='p1@example.com', password='pass', role=self.role
         )
-        self.player1.auth_token = 'p1-token'
-        self.player1.save()
+        issue_token(self.player1, token='p1-token')
         
         self.player2 = Player.objects.create_user(
             username='player2', email='p2@example.com', password='pass', role=self.role
@@ -516,6 +606,929 @@ class MatchAPITests(TestCase):
         self.assertIsInstance(data, list)
 
 
+class LeaderboardTests(TestCase):
+    """Test the rank-indexed leaderboard"""
+    
+    def setUp(self):
+        from django.core.cache import caches
+        from . import leaderboard
+        caches[leaderboard.CACHE_ALIAS].clear()
+        leaderboard.reset()
+        self.client = Client()
+        self.role = Role.objects.create(role_name='player')
+        self.players = []
+        for i, blitz in enumerate([1500, 1300, 1700, 1300]):
+            player = Player.objects.create_user(
+                username=f'lb{i}', email=f'lb{i}@example.com', password='pass', role=self.role
+            )
+            player.elo_blitz = blitz
+            player.save()
+            self.players.append(player)
+    
+    def test_leaderboard_ranks_by_rating_type(self):
+        """Pages carry real ranks; ties are ordered by player id"""
+        response = self.client.get('/api/leaderboard/?type=blitz&page=1&per_page=3')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([row['username'] for row in data['leaderboard']], ['lb2', 'lb0', 'lb1'])
+        self.assertEqual([row['rank'] for row in data['leaderboard']], [1, 2, 3])
+        self.assertEqual(data['pagination']['total_items'], 4)
+        
+        response = self.client.get('/api/leaderboard/?type=blitz&page=2&per_page=3')
+        self.assertEqual(response.json()['leaderboard'][0]['rank'], 4)
+        self.assertEqual(response.json()['leaderboard'][0]['username'], 'lb3')
+    
+    def test_rating_change_is_applied_without_rebuilding(self):
+        """A rating change moves the player without re-reading the player table"""
+        self.client.get('/api/leaderboard/?type=blitz')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.players[3].elo_blitz = 1800
+            self.players[3].save()
+        
+        # Only the row fetch for the page; the index is updated from the journal
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/leaderboard/?type=blitz')
+        self.assertEqual(response.json()['leaderboard'][0]['username'], 'lb3')
+        
+        with self.assertNumQueries(0):
+            self.client.get('/api/leaderboard/?type=blitz')
+    
+    def test_unknown_rating_type_is_rejected(self):
+        response = self.client.get('/api/leaderboard/?type=puzzle')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_leaderboard_cursor_walks_every_player_once(self):
+        """Cursor pages continue after the last player seen"""
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            data = self.client.get('/api/leaderboard/', {'type': 'blitz', 'per_page': 3, 'cursor': cursor}).json()
+            seen += [row['username'] for row in data['leaderboard']]
+            cursor = data['pagination']['next_cursor']
+        self.assertEqual(seen, ['lb2', 'lb0', 'lb1', 'lb3'])
+    
+    def test_my_rank_returns_neighbors(self):
+        """The rank window is centred on the current user"""
+        issue_token(self.players[1], token='lb-token')
+        response = self.client.get('/api/leaderboard/me/?type=blitz&neighbors=1', HTTP_X_AUTH_TOKEN='lb-token')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['rank'], 3)
+        self.assertEqual(data['total'], 4)
+        self.assertEqual([row['rank'] for row in data['players']], [2, 3, 4])
+        self.assertEqual([row['is_me'] for row in data['players']], [False, True, False])
+    
+    def test_rank_index_matches_sorted_order(self):
+        """Order-statistics index agrees with a full sort after updates"""
+        import random
+        from .leaderboard import RankIndex
+        rng = random.Random(7)
+        ratings = {pid: rng.randint(1150, 1250) for pid in range(1, 300)}
+        index = RankIndex(ratings.items(), low=1000, high=1300)
+        for _ in range(200):
+            pid = rng.randint(1, 320)
+            if rng.random() < 0.2:
+                ratings.pop(pid, None)
+                index.remove(pid)
+            else:
+                ratings[pid] = rng.randint(900, 1500)
+                index.update(pid, ratings[pid])
+        expected = sorted(ratings, key=lambda pid: (-ratings[pid], pid))
+        self.assertEqual([pid for _, pid, _ in index.page(0, len(expected))], expected)
+        for rank, pid in enumerate(expected, 1):
+            self.assertEqual(index.rank(pid), rank)
+        rank, rows = index.window(expected[10], 3)
+        self.assertEqual(rank, 11)
+        self.assertEqual([pid for _, pid, _ in rows], expected[7:14])
+
+
+class CursorPaginationTests(TestCase):
+    """Test keyset pagination and streamed list responses"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.role = Role.objects.create(role_name='player')
+        self.creator = Player.objects.create_user(
+            username='pager', email='pager@example.com', password='pass', role=self.role
+        )
+        created_at = timezone.now()
+        # Equal sort keys: the primary key keeps the order total
+        self.tournaments = [
+            TournamentActive.objects.create(
+                tournament_name=f'Cursor {i}',
+                tournament_code=f'CUR00{i}',
+                created_by=self.creator,
+                start_date=created_at,
+                created_at=created_at,
+            )
+            for i in range(5)
+        ]
+    
+    def test_cursor_pages_cover_every_row_once(self):
+        """Each cursor page is a single query; no COUNT unless asked for"""
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/tournaments/', {'cursor': cursor, 'per_page': 2})
+            data = response.json()
+            self.assertIsNone(data['pagination']['total_items'])
+            seen += [t['id'] for t in data['tournaments']]
+            cursor = data['pagination']['next_cursor']
+        expected = sorted((t.tournament_id for t in self.tournaments), reverse=True)
+        self.assertEqual(seen, expected)
+    
+    def test_exact_total_on_request(self):
+        response = self.client.get('/api/tournaments/', {'cursor': '', 'total': 'exact'})
+        self.assertEqual(response.json()['pagination']['total_items'], 5)
+    
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/tournaments/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_unpaginated_list_is_streamed(self):
+        """The full list is streamed with the same JSON shape as before"""
+        response = self.client.get('/api/tournaments/')
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['tournaments']), 5)
+    
+    def test_stream_is_pulled_chunk_by_chunk_under_asgi(self):
+        """The ASGI iterator sends the head before reading any row"""
+        import warnings
+        from asgiref.sync import async_to_sync
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        response = self.client.get('/api/tournaments/')
+        
+        async def consume():
+            chunks = []
+            async for chunk in response.__aiter__():
+                if not chunks:
+                    queries_before_head = len(queries)
+                chunks.append(chunk)
+            return chunks, queries_before_head
+        
+        with warnings.catch_warnings(), CaptureQueriesContext(connection) as queries:
+            warnings.simplefilter('error')
+            chunks, queries_before_head = async_to_sync(consume)()
+        self.assertEqual(queries_before_head, 0)
+        self.assertGreater(len(queries), 0)
+        data = json.loads(b''.join(chunks))
+        self.assertEqual(len(data['tournaments']), 5)
+    
+    def test_stream_reads_queryset_in_keyset_chunks(self):
+        """Rows come out in order across chunk boundaries, one query per chunk"""
+        from .streaming import iter_json_list
+        queryset = TournamentActive.objects.order_by('-created_at')
+        with self.assertNumQueries(3):
+            body = b''.join(iter_json_list(queryset, lambda t: t.tournament_id, 'ids', chunk_size=2))
+        expected = sorted((t.tournament_id for t in self.tournaments), reverse=True)
+        self.assertEqual(json.loads(body), {'success': True, 'ids': expected})
+
+
+class JSONEncodingTests(TestCase):
+    """Test the response and event encoder backends"""
+
+    def test_backends_encode_the_same_document(self):
+        """Datetimes keep full precision; Decimal, sets and int keys encode alike"""
+        from .json_encoding import get_encoder, orjson
+        if orjson is None:
+            self.skipTest('orjson is not installed')
+        moment = timezone.now().replace(microsecond=123456)
+        payload = {
+            'created_at': moment,
+            'date': moment.date(),
+            'price': Decimal('1.50'),
+            'ids': {3},
+            1: 'Šime',
+        }
+        encoded = get_encoder('stdlib').dumps(payload)
+        self.assertEqual(json.loads(get_encoder('orjson').dumps(payload)), json.loads(encoded))
+        self.assertEqual(json.loads(encoded)['created_at'], moment.isoformat())
+
+    def test_response_uses_configured_backend(self):
+        from django.test import override_settings
+        from .json_encoding import JsonResponse, get_encoder
+        moment = timezone.now()
+        with override_settings(JSON_ENCODER_BACKEND='stdlib'):
+            self.assertEqual(get_encoder().name, 'stdlib')
+            response = JsonResponse({'at': moment})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {'at': moment.isoformat()})
+        with self.assertRaises(TypeError):
+            JsonResponse([1, 2])
+
+    def test_api_dates_are_isoformat(self):
+        role = Role.objects.create(role_name='player')
+        creator = Player.objects.create_user(
+            username='encoder', email='encoder@example.com', password='pass', role=role
+        )
+        issue_token(creator, token='encoder-token')
+        tournament = TournamentActive.objects.create(
+            tournament_name='Encoder', tournament_code='ENC001', created_by=creator,
+            start_date=timezone.now().replace(microsecond=123456)
+        )
+        tournament.refresh_from_db()
+        response = self.client.get(
+            f'/api/tournaments/{tournament.tournament_id}/', HTTP_X_AUTH_TOKEN='encoder-token'
+        )
+        data = response.json()['tournament']
+        self.assertEqual(data['start_date'], tournament.start_date.isoformat())
+        self.assertIn('.123456', data['start_date'])
+        self.assertEqual(data['created_at'], tournament.created_at.isoformat())
+
+
+class GameMoveTests(TestCase):
+    """Test move submission over HTTP and WebSocket"""
+
+    def setUp(self):
+        from .models import Game
+        from . import game_state
+        game_state.get_cache().clear()
+        self.client = Client()
+        self.role = Role.objects.create(role_name='player')
+        self.white = Player.objects.create_user(
+            username='white', email='white@example.com', password='pass', role=self.role
+        )
+        issue_token(self.white, token='white-token')
+        self.black = Player.objects.create_user(
+            username='black', email='black@example.com', password='pass', role=self.role
+        )
+        issue_token(self.black, token='black-token')
+        self.game = Game.objects.create(
+            white_player=self.white,
+            black_player=self.black,
+            status='in_progress'
+        )
+        self.move = {
+            'from': 'e2', 'to': 'e4', 'san': 'e4',
+            'fen': 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+        }
+
+    def post_move(self, token):
+        return self.client.post(
+            f'/api/game/{self.game.game_id}/move/',
+            data=json.dumps(self.move),
+            content_type='application/json',
+            HTTP_X_AUTH_TOKEN=token
+        )
+
+    def test_move_out_of_turn_is_rejected(self):
+        """Black cannot move while it is white's turn"""
+        response = self.post_move('black-token')
+        self.assertEqual(response.status_code, 403)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.move_count, 0)
+
+    def test_http_move_is_broadcast_to_game_group(self):
+        """An accepted HTTP move publishes game_move after commit"""
+        from unittest import mock
+        with mock.patch('chess.publisher.WebSocketPublisher.publish_many') as publish_many, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.post_move('white-token')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['current_turn'], 'black')
+        messages = list(publish_many.call_args[0][0])
+        moves = [(group, event) for group, message_type, event in messages if message_type == 'game_move']
+        self.assertEqual(len(moves), 1)
+        group, event = moves[0]
+        self.assertEqual(group, f'game_{self.game.game_id}')
+        self.assertEqual(event['move']['san'], 'e4')
+
+    def test_moves_are_appended_and_history_rebuilt(self):
+        """Each move is one GameMove row; history keeps legacy moves first"""
+        from .game_moves import apply_move, load_move_history, export_pgn
+        self.game.move_history = json.dumps([{'from': 'g1', 'to': 'f3', 'san': 'Nf3'}])
+        self.game.fen = 'rnbqkbnr/pppppppp/8/8/8/5N2/PPPPPPPP/RNBQKB1R b KQkq - 1 1'
+        self.game.move_count = 1
+        self.game.current_turn = 'black'
+        self.game.save()
+
+        apply_move(self.game.game_id, self.black.player_id, {
+            'from': 'd7', 'to': 'd5'
+        }, broadcast=False)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.moves.get().ply, 2)
+        self.assertEqual(self.game.moves.get().uci, 'd7d5')
+        self.assertEqual([m['san'] for m in load_move_history(self.game)], ['Nf3', 'd5'])
+        self.assertIn('1. Nf3 d5 *', export_pgn(self.game))
+
+    def test_pgn_export_is_limited_to_players(self):
+        """Only those who may spectate a game can download its PGN"""
+        outsider = Player.objects.create_user(
+            username='outsider', email='outsider@example.com', password='pass', role=self.role
+        )
+        issue_token(outsider, token='outsider-token')
+        url = f'/api/game/{self.game.game_id}/pgn/'
+
+        forbidden = self.client.get(url, HTTP_X_AUTH_TOKEN='outsider-token')
+        allowed = self.client.get(url, HTTP_X_AUTH_TOKEN='black-token')
+
+        self.assertEqual(forbidden.status_code, 403)
+        self.assertEqual(allowed.status_code, 200)
+        self.assertEqual(allowed['Content-Type'], 'application/x-chess-pgn; charset=utf-8')
+
+    def test_threefold_repetition_without_replaying(self):
+        """Repetition is checked against the cached position keys; a cold entry replays once"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .game_moves import apply_move
+        from . import game_state
+        # The position after 1. Nf3 Nf6 comes back after plies 6 and 10
+        moves = 'g1f3 g8f6 b1c3 b8c6 c3b1 c6b8 b1c3 b8c6 c3b1 c6b8'.split()
+        players = [self.white.player_id, self.black.player_id]
+        game_state.get_state(self.game.game_id)  # cache the entry
+
+        def play(ply):
+            with self.captureOnCommitCallbacks(execute=True):
+                return apply_move(self.game.game_id, players[ply % 2],
+                                  {'from': moves[ply][:2], 'to': moves[ply][2:]}, broadcast=False)
+
+        for ply in range(7):
+            self.assertIsNone(play(ply)['outcome'])
+        # Plies 8 and 9 have 8+ reversible plies behind them
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(play(7)['outcome'])
+            self.assertIsNone(play(8)['outcome'])
+        self.assertFalse([q for q in queries if 'FROM "game_moves"' in q['sql']])
+        self.assertEqual(len(game_state.get_state(self.game.game_id)['position_keys']), 9)
+
+        # Rebuilt from the stored moves when the entry is cold
+        game_state.evict(self.game.game_id)
+        event = play(9)
+
+        self.assertEqual(event['outcome']['termination'], 'threefold_repetition')
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.result, 'draw')
+
+    def test_illegal_move_is_rejected(self):
+        """The server validates moves instead of trusting the client"""
+        self.move = {'from': 'e2', 'to': 'e5'}
+        response = self.post_move('white-token')
+        self.assertEqual(response.status_code, 400)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.move_count, 0)
+
+    def test_checkmate_ends_game_on_server(self):
+        """A mating move completes the game without a separate end request"""
+        from .game_moves import apply_move
+        from . import game_state
+        moves = [('white', 'f2', 'f3'), ('black', 'e7', 'e5'), ('white', 'g2', 'g4'), ('black', 'd8', 'h4')]
+        for color, frm, to in moves:
+            player = self.white if color == 'white' else self.black
+            with self.captureOnCommitCallbacks(execute=True):
+                event = apply_move(self.game.game_id, player.player_id, {'from': frm, 'to': to}, broadcast=False)
+
+        self.assertEqual(event['move']['san'], 'Qh4#')
+        self.assertEqual(event['outcome']['termination'], 'checkmate')
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.status, 'completed')
+        self.assertEqual(self.game.result, 'black_win')
+        self.assertIn('2. g4 Qh4# 0-1', self.game.pgn)
+        self.assertIsNone(game_state.get_cache().get(game_state.cache_key(self.game.game_id)))
+
+    def test_live_game_detail_is_served_from_cache(self):
+        """Polling an active game reads the cached state, kept current by write-through"""
+        from .game_moves import apply_move
+        from . import game_state
+        url = f'/api/game/{self.game.game_id}/'
+        self.client.get(url, HTTP_X_AUTH_TOKEN='white-token')  # warms the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_move(self.game.game_id, self.white.player_id, self.move, broadcast=False)
+
+        with self.assertNumQueries(1):  # token lookup only, no Game, Player or GameMove rows
+            response = self.client.get(url, HTTP_X_AUTH_TOKEN='black-token')
+
+        # The move list has its own key; the hot entry does not carry it
+        cached = game_state.get_cache().get(game_state.cache_key(self.game.game_id))
+        self.assertNotIn('moves', cached)
+        self.assertEqual(cached['move_count'], 1)
+        history = game_state.get_cache().get(game_state.history_cache_key(self.game.game_id))
+        self.assertEqual([move['san'] for move in history], ['e4'])
+
+        self.assertEqual(response.json()['move_count'], 1)
+        self.assertEqual(response.json()['fen'], self.move['fen'])
+        self.assertEqual(json.loads(response.json()['move_history'])[0]['san'], 'e4')
+
+    def socket(self, player):
+        from channels.testing import WebsocketCommunicator
+        from .consumers import GameConsumer
+        communicator = WebsocketCommunicator(
+            GameConsumer.as_asgi(), f'/ws/game/{player.player_id}/'
+        )
+        communicator.scope['url_route'] = {'kwargs': {'user_id': str(player.player_id)}}
+        return communicator
+
+    def test_websocket_join_requires_access(self):
+        """Only players and tournament members can subscribe to a game or tournament"""
+        from asgiref.sync import async_to_sync
+        outsider = Player.objects.create_user(
+            username='outsider', email='outsider@example.com', password='pass', role=self.role
+        )
+        issue_token(outsider, token='outsider-token')
+        tournament = TournamentActive.objects.create(
+            tournament_name='Private Stream',
+            created_by=self.white,
+            tournament_type='round_robin',
+            max_participants=2,
+            start_date=timezone.now()
+        )
+        game_id, tournament_id = self.game.game_id, tournament.tournament_id
+
+        async def join(player, token):
+            communicator = self.socket(player)
+            await communicator.connect()
+            await communicator.receive_json_from()  # connection_established
+            if token:
+                await communicator.send_json_to({'type': 'authenticate', 'token': token})
+                await communicator.receive_json_from()  # authenticated
+            replies = []
+            for message in ({'type': 'join_game', 'game_id': game_id},
+                            {'type': 'join_tournament', 'tournament_id': tournament_id}):
+                await communicator.send_json_to(message)
+                replies.append(await communicator.receive_json_from())
+                if replies[-1]['type'] != 'join_refused':
+                    await communicator.receive_json_from()  # clock or board snapshot
+            await communicator.disconnect()
+            return [reply['type'] for reply in replies]
+
+        self.assertEqual(async_to_sync(join)(self.black, None), ['join_refused', 'join_refused'])
+        self.assertEqual(async_to_sync(join)(outsider, 'outsider-token'), ['join_refused', 'join_refused'])
+        self.assertEqual(async_to_sync(join)(self.white, 'white-token'), ['joined_game', 'joined_tournament'])
+
+    def test_websocket_move_reaches_opponent(self):
+        """A move sent over the socket is persisted and pushed to the game group"""
+        from asgiref.sync import async_to_sync
+        game_id = self.game.game_id
+        move = self.move
+
+        async def play():
+            white, black = self.socket(self.white), self.socket(self.black)
+            for communicator in (white, black):
+                await communicator.connect()
+                await communicator.receive_json_from()  # connection_established
+            await black.send_json_to({'type': 'authenticate', 'token': 'black-token'})
+            await black.receive_json_from()  # authenticated
+            await black.send_json_to({'type': 'join_game', 'game_id': game_id})
+            await black.receive_json_from()  # joined_game
+            await black.receive_json_from()  # clock_update
+
+            await white.send_json_to({'type': 'make_move', 'game_id': game_id, 'move': move})
+            rejected = await white.receive_json_from()
+
+            await white.send_json_to({'type': 'authenticate', 'token': 'white-token'})
+            await white.receive_json_from()  # authenticated
+            await white.send_json_to({'type': 'make_move', 'game_id': game_id, 'move': move, 'move_id': 'm1'})
+            accepted = await white.receive_json_from()
+            pushed = await black.receive_json_from()
+
+            await white.disconnect()
+            await black.disconnect()
+            return rejected, accepted, pushed
+
+        rejected, accepted, pushed = async_to_sync(play)()
+
+        self.assertEqual(rejected['type'], 'move_rejected')
+        self.assertEqual(rejected['status'], 401)
+        self.assertEqual(accepted['type'], 'move_accepted')
+        self.assertEqual(accepted['move_id'], 'm1')
+        self.assertEqual(pushed['type'], 'game_move')
+        self.assertEqual(pushed['fen'], move['fen'])
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.current_turn, 'black')
+        self.assertEqual(self.game.move_count, 1)
+
+    def test_conditional_save_only_writes_matching_row(self):
+        """A game write is skipped once the row no longer has the expected state"""
+        from .game_moves import save_game_if
+        stale = type(self.game).objects.get(game_id=self.game.game_id)
+        self.game.fen = 'changed'
+        self.game.move_count = 1
+        self.assertTrue(save_game_if(self.game, ('fen', 'move_count'), move_count=0))
+
+        stale.fen = 'stale'
+        self.assertFalse(save_game_if(stale, ('fen',), move_count=0))
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.fen, 'changed')
+
+    def test_racing_move_is_rejected_with_conflict(self):
+        """A move whose game changed after it was read is not applied"""
+        from unittest import mock
+        with mock.patch('chess.game_moves.save_game_if', return_value=False):
+            response = self.post_move('white-token')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.game.moves.exists())
+
+    def test_resign_is_applied_once(self):
+        """A repeated resignation does not end (and rate) the game twice"""
+        url = f'/api/game/{self.game.game_id}/resign/'
+        first = self.client.post(url, HTTP_X_AUTH_TOKEN='white-token')
+        second = self.client.post(url, HTTP_X_AUTH_TOKEN='white-token')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 409)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.result, 'black_win')
+
+    def test_tournament_board_streams_compact_deltas(self):
+        """Tournament spectators get a board snapshot, then one small delta per move"""
+        from unittest import mock
+        from .game_state import tournament_boards
+        tournament = TournamentActive.objects.create(
+            tournament_name='Stream Test',
+            created_by=self.white,
+            tournament_type='round_robin',
+            max_participants=2,
+            start_date=timezone.now()
+        )
+        self.game.tournament = tournament
+        self.game.save()
+
+        with self.assertNumQueries(1):
+            boards = tournament_boards(tournament.tournament_id)
+        self.assertEqual([b['game_id'] for b in boards], [self.game.game_id])
+        self.assertEqual(boards[0]['white']['username'], 'white')
+
+        with mock.patch('chess.publisher.WebSocketPublisher.publish_many') as publish_many, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.post_move('white-token')
+
+        messages = publish_many.call_args[0][0]
+        group, message_type, delta = messages[-1]
+        self.assertEqual(group, f'tournament_{tournament.tournament_id}')
+        self.assertEqual(message_type, 'board_update')
+        self.assertEqual(delta['san'], 'e4')
+        self.assertEqual(delta['uci'], 'e2e4')
+        self.assertEqual(delta['turn'], 'black')
+        self.assertNotIn('move', delta)
+
+    def test_ongoing_games_are_filtered_and_paged(self):
+        """The tournament games list filters by status and pages by cursor"""
+        from .models import Game
+        tournament = TournamentActive.objects.create(
+            tournament_name='Ongoing Test',
+            created_by=self.white,
+            tournament_type='round_robin',
+            max_participants=2,
+            start_date=timezone.now()
+        )
+        games = [
+            Game.objects.create(white_player=self.white, black_player=self.black,
+                                tournament=tournament, status=status)
+            for status in ('in_progress', 'completed', 'in_progress')
+        ]
+        url = f'/api/tournaments/{tournament.tournament_id}/games/'
+
+        first = self.client.get(url, {'status': 'in_progress', 'per_page': 1}, HTTP_X_AUTH_TOKEN='white-token').json()
+        second = self.client.get(url, {'status': 'in_progress', 'per_page': 1, 'cursor': first['next_cursor']},
+                                 HTTP_X_AUTH_TOKEN='white-token').json()
+        invalid = self.client.get(url, {'status': 'playing'}, HTTP_X_AUTH_TOKEN='white-token')
+
+        self.assertEqual([g['game_id'] for g in first['games']], [games[2].game_id])
+        self.assertTrue(first['has_more'])
+        self.assertEqual([g['game_id'] for g in second['games']], [games[0].game_id])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(invalid.status_code, 400)
+
+    def start_timed_game(self, seconds_ago):
+        from datetime import timedelta
+        self.game.time_control_minutes = 1
+        self.game.time_increment_seconds = 2
+        self.game.white_clock_ms = 60000
+        self.game.black_clock_ms = 60000
+        self.game.last_move_time = timezone.now() - timedelta(seconds=seconds_ago)
+        self.game.save()
+
+    def test_clock_is_pressed_in_milliseconds(self):
+        """The mover's clock loses the time spent and gains the increment"""
+        from .game_moves import apply_move
+        self.start_timed_game(seconds_ago=1.5)
+
+        event = apply_move(self.game.game_id, self.white.player_id, self.move, broadcast=False)
+
+        self.game.refresh_from_db()
+        self.assertTrue(60000 - 1500 + 2000 - 200 < self.game.white_clock_ms <= 60000 - 1500 + 2000)
+        self.assertEqual(self.game.black_clock_ms, 60000)
+        self.assertEqual(self.game.white_time_remaining, self.game.white_clock_ms // 1000)
+        self.assertEqual(event['clock']['turn'], 'black')
+        self.assertTrue(event['clock']['running'])
+
+    def test_move_after_flag_fall_ends_game_on_time(self):
+        """A late move is rejected and the opponent wins on time"""
+        from .game_moves import apply_move
+        from .game_clock import ClockExpired
+        self.start_timed_game(seconds_ago=61)
+
+        with self.assertRaises(ClockExpired):
+            apply_move(self.game.game_id, self.white.player_id, self.move, broadcast=False)
+
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.status, 'completed')
+        self.assertEqual(self.game.result, 'black_win')
+        self.assertEqual(self.game.white_clock_ms, 0)
+        self.assertEqual(self.game.move_count, 0)
+
+    def test_flag_game_ignores_running_clock(self):
+        """The scheduler's flag check is a no-op while time is left"""
+        from .game_clock import flag_game
+        self.start_timed_game(seconds_ago=10)
+
+        self.assertIsNone(flag_game(self.game.game_id))
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.status, 'in_progress')
+
+    def test_timer_wheel_fires_due_timers(self):
+        """Timers fire on the tick they fall due; cancelled ones never fire"""
+        from .clock_scheduler import TimerWheel
+        wheel = TimerWheel(callback=None, tick=0.1, slots=4)
+        wheel.schedule(1, 0.2)
+        wheel.schedule(2, 0.55)  # wraps around the 4-slot wheel once
+        wheel.schedule(3, 0.1)
+        wheel.cancel(3)
+
+        fired = [wheel.advance() for _ in range(6)]
+
+        self.assertEqual(fired, [[], [1], [], [], [], [2]])
+        self.assertEqual(len(wheel), 0)
+
+    def test_early_timer_is_armed_again(self):
+        """A timer firing while time is left re-arms from the stored deadline"""
+        from unittest import mock
+        from asgiref.sync import async_to_sync
+        from .clock_scheduler import TimerWheel, _flag
+        self.start_timed_game(seconds_ago=10)
+        wheel = TimerWheel(callback=None)
+
+        with mock.patch('chess.clock_scheduler.get_flag_scheduler', return_value=wheel):
+            async_to_sync(_flag)(self.game.game_id)
+
+        self.assertIn(self.game.game_id, wheel)
+        self.game.refresh_from_db()
+        self.assertEqual(self.game.status, 'in_progress')
+
+    def test_flag_thread_is_started_only_by_server_entry_points(self):
+        """schedule_flag never starts the wheel; asgi.py/wsgi.py do when enabled"""
+        from unittest import mock
+        from .clock_scheduler import TimerWheel, schedule_flag, start_in_background
+        self.start_timed_game(seconds_ago=1)
+
+        with mock.patch('chess.clock_scheduler.get_flag_scheduler', return_value=TimerWheel(callback=None)), \
+                mock.patch('chess.clock_scheduler.start_flag_scheduler_thread') as start_thread:
+            schedule_flag(self.game)
+            with self.settings(FLAG_SCHEDULER_ON_STARTUP=False):
+                start_in_background()
+            start_thread.assert_not_called()
+            with self.settings(FLAG_SCHEDULER_ON_STARTUP=True):
+                start_in_background()
+            start_thread.assert_called_once()
+
+    def test_failed_clock_load_is_retried(self):
+        """A failed startup read of running clocks is logged and retried"""
+        from unittest import mock
+        from asgiref.sync import async_to_sync
+        from . import clock_scheduler
+        from .game_clock import running_deadlines
+        self.start_timed_game(seconds_ago=1)
+        wheel = clock_scheduler.TimerWheel(callback=None)
+        reads = mock.Mock(side_effect=[RuntimeError('database is down'), running_deadlines()])
+
+        async def start():
+            await clock_scheduler.ensure_flag_scheduler()
+            armed_before_retry = self.game.game_id in wheel
+            await clock_scheduler._load_task
+            wheel.stop()
+            return armed_before_retry
+
+        with mock.patch('chess.clock_scheduler.get_flag_scheduler', return_value=wheel), \
+                mock.patch('chess.game_clock.running_deadlines', reads), \
+                mock.patch('chess.clock_scheduler.LOAD_RETRY_DELAY', 0):
+            armed_before_retry = async_to_sync(start)()
+
+        self.assertFalse(armed_before_retry)
+        self.assertEqual(reads.call_count, 2)
+        self.assertIn(self.game.game_id, wheel)
+
+    def test_create_game_starts_clock_when_both_joined(self):
+        """The second player's create call starts the game like a join"""
+        from unittest import mock
+        from .models import Game
+        tournament = TournamentActive.objects.create(
+            tournament_name='Clock start', created_by=self.white, start_date=timezone.now()
+        )
+        match = Match.objects.create(
+            tournament=tournament, white_player=self.white, black_player=self.black, round_number=1
+        )
+        game = Game.objects.create(
+            tournament=tournament, match=match, white_player=self.white, black_player=self.black,
+            status='waiting', time_control_minutes=1, white_time_remaining=60, black_time_remaining=60,
+            white_joined=True
+        )
+
+        with mock.patch('chess.clock_scheduler.schedule_flag') as schedule_flag:
+            response = self.client.post(
+                '/api/game/create/', data=json.dumps({'match_id': match.match_id}),
+                content_type='application/json', HTTP_X_AUTH_TOKEN='black-token'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        game.refresh_from_db()
+        self.assertEqual(game.status, 'in_progress')
+        self.assertIsNotNone(game.last_move_time)
+        self.assertEqual(game.white_clock_ms, 60000)
+        schedule_flag.assert_called_once()
+
+
+class StartTournamentTests(TestCase):
+    """Test round generation when a tournament is started"""
+    
+    def setUp(self):
+        self.client = Client()
+        self.role = Role.objects.create(role_name='player')
+        self.creator = Player.objects.create_user(
+            username='creator', email='creator@example.com', password='pass', role=self.role
+        )
+        issue_token(self.creator, token='creator-token')
+    
+    def create_tournament(self, num_players, tournament_type='round_robin'):
+        tournament = TournamentActive.objects.create(
+            tournament_name=f'Start Test {num_players}',
+            created_by=self.creator,
+            tournament_type=tournament_type,
+            max_participants=num_players,
+            current_participants=num_players,
+            start_date=timezone.now()
+        )
+        for i in range(num_players):
+            player = Player.objects.create_user(
+                username=f'{tournament.tournament_id}_p{i}',
+                email=f'{tournament.tournament_id}_p{i}@example.com',
+                password='pass',
+                role=self.role
+            )
+            TournamentParticipant.objects.create(tournament=tournament, player=player, seed_number=i + 1)
+        return tournament
+    
+    def start(self, tournament):
+        return self.client.post(
+            f'/api/tournaments/{tournament.tournament_id}/start/',
+            HTTP_X_AUTH_TOKEN='creator-token'
+        )
+    
+    def test_round_robin_creates_first_round_only(self):
+        """Only round 1 is created, each pairing with a game and two notifications"""
+        from .models import Game
+        tournament = self.create_tournament(6)
+        response = self.start(tournament)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['matches_created'], 3)
+        self.assertEqual(Match.objects.filter(tournament=tournament, round_number=1).count(), 3)
+        self.assertEqual(Game.objects.filter(tournament=tournament, match__isnull=False).count(), 3)
+        self.assertEqual(Notification.objects.filter(
+            related_tournament=tournament, related_match__isnull=False
+        ).count(), 6)
+    
+    def test_round_robin_next_round_created_on_completion(self):
+        """Finishing a round robin round creates the next Berger round"""
+        from .tournament_helpers import check_round_complete_and_advance
+        tournament = self.create_tournament(6)
+        self.start(tournament)
+        
+        Match.objects.filter(tournament=tournament, round_number=1).update(
+            match_status='completed', result='draw'
+        )
+        tournament.refresh_from_db()
+        status = check_round_complete_and_advance(tournament, None)
+        
+        self.assertEqual(status['next_round'], 2)
+        round_two = Match.objects.filter(tournament=tournament, round_number=2)
+        self.assertEqual(round_two.count(), 3)
+        round_one_pairs = set(
+            frozenset(pair) for pair in Match.objects.filter(
+                tournament=tournament, round_number=1
+            ).values_list('white_player_id', 'black_player_id')
+        )
+        for match in round_two:
+            self.assertNotIn(frozenset((match.white_player_id, match.black_player_id)), round_one_pairs)
+    
+    def test_incomplete_round_check_is_one_query(self):
+        """Checking an unfinished round is a single aggregate query"""
+        from .tournament_helpers import check_round_complete_and_advance
+        tournament = self.create_tournament(6)
+        self.start(tournament)
+        tournament.refresh_from_db()
+        
+        with self.assertNumQueries(1):
+            status = check_round_complete_and_advance(tournament, None)
+        self.assertFalse(status['round_complete'])
+        self.assertEqual(status['total'], 3)
+    
+    def test_elimination_round_fan_out(self):
+        """A new elimination round bulk-notifies everyone and flushes WebSocket messages once"""
+        from unittest import mock
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .tournament_helpers import check_round_complete_and_advance
+        
+        def advance(num_players):
+            tournament = self.create_tournament(num_players, tournament_type='elimination')
+            self.start(tournament)
+            for match in Match.objects.filter(tournament=tournament, round_number=1):
+                match.match_status = 'completed'
+                match.result = 'white_win'
+                match.winner_id = match.white_player_id
+                match.save()
+            tournament.refresh_from_db()
+            with mock.patch('chess.consumers.send_websocket_messages') as send, \
+                    self.captureOnCommitCallbacks(execute=True):
+                with CaptureQueriesContext(connection) as queries:
+                    check_round_complete_and_advance(tournament, None)
+            return tournament, send, len(queries)
+        
+        tournament, send, small_queries = advance(8)
+        
+        self.assertEqual(Notification.objects.filter(
+            related_tournament=tournament, notification_type='tournament_start'
+        ).count(), 8)
+        self.assertEqual(Match.objects.filter(tournament=tournament, round_number=2).count(), 2)
+        send.assert_called_once()
+        # One tournament-group message plus one per participant
+        self.assertEqual(len(send.call_args[0][0]), 9)
+        
+        _, _, large_queries = advance(16)
+        self.assertEqual(small_queries, large_queries)
+    
+    def test_round_advances_once_for_concurrent_completions(self):
+        """Two completions that both see the finished round create one next round"""
+        from .models import TournamentRound
+        from .tournament_helpers import check_round_complete_and_advance
+        tournament = self.create_tournament(6)
+        self.start(tournament)
+        
+        Match.objects.filter(tournament=tournament, round_number=1).update(
+            match_status='completed', result='draw'
+        )
+        first = TournamentActive.objects.get(pk=tournament.pk)
+        second = TournamentActive.objects.get(pk=tournament.pk)
+        check_round_complete_and_advance(first, None)
+        status = check_round_complete_and_advance(second, None)
+        
+        self.assertTrue(status['already_advanced'])
+        self.assertEqual(second.current_round, 2)
+        self.assertEqual(Match.objects.filter(tournament=tournament, round_number=2).count(), 3)
+        self.assertEqual(
+            TournamentRound.objects.get(tournament=tournament, round_number=1).round_status,
+            'completed'
+        )
+    
+    def test_query_count_does_not_grow_with_players(self):
+        """Starting a larger event costs the same number of queries"""
+        from django.db import connection
+        from django.core.cache import caches
+        from django.test.utils import CaptureQueriesContext
+        from .decorators import AUTH_CACHE_ALIAS
+        
+        # Both requests start with a cold token cache; the periodic last_used
+        # flush is kept out of the window so it can't land in only one of them
+        small = self.create_tournament(4)
+        large = self.create_tournament(6)
+        with self.settings(AUTH_LAST_USED_FLUSH_SECONDS=3600):
+            caches[AUTH_CACHE_ALIAS].clear()
+            with CaptureQueriesContext(connection) as small_queries:
+                self.start(small)
+            
+            caches[AUTH_CACHE_ALIAS].clear()
+            with CaptureQueriesContext(connection) as large_queries:
+                self.start(large)
+        
+        self.assertEqual(len(small_queries), len(large_queries))
+    
+    def test_failed_start_keeps_old_seeds(self):
+        """Seeds are only rewritten when the round 1 matches are written"""
+        from unittest import mock
+        tournament = self.create_tournament(4)
+        tournament.pairing_system = 'rating'
+        tournament.save()
+        # Rating order is the reverse of the stored seeds
+        for participant in TournamentParticipant.objects.filter(tournament=tournament):
+            Player.objects.filter(pk=participant.player_id).update(elo_rating=1000 + participant.seed_number)
+        seeds = dict(TournamentParticipant.objects.filter(
+            tournament=tournament
+        ).values_list('player_id', 'seed_number'))
+        
+        with mock.patch('chess.tournament_helpers.create_round_matches', side_effect=RuntimeError('boom')):
+            response = self.start(tournament)
+        
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(dict(TournamentParticipant.objects.filter(
+            tournament=tournament
+        ).values_list('player_id', 'seed_number')), seeds)
+
+
 # ============================================
 # HELPER FUNCTION TESTS
 # ============================================
@@ -541,6 +1554,248 @@ class HelperFunctionTests(TestCase):
         self.assertTrue(code.isupper())
 
 
+class ChessEngineTests(TestCase):
+    """Test the server-side move generator"""
+
+    def test_perft_matches_known_node_counts(self):
+        """Move generation is exact for the standard perft positions"""
+        from .chess_engine import Board
+        self.assertEqual(Board().perft(3), 8902)
+        kiwipete = Board('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+        self.assertEqual(kiwipete.perft(2), 2039)
+        endgame = Board('8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1')
+        self.assertEqual(endgame.perft(3), 2812)
+
+    def test_san_disambiguation_and_fen(self):
+        """SAN names the moving piece unambiguously and FEN round-trips"""
+        from .chess_engine import Board
+        board = Board('7k/8/8/8/N3N3/8/N7/K7 w - - 0 1')
+        self.assertEqual(board.san(board.parse_uci('a4c3')), 'Na4c3')
+        self.assertEqual(board.san(board.parse_uci('e4c3')), 'Nec3')
+        self.assertEqual(board.push_uci('a2b4'), 'Nb4')
+        self.assertEqual(board.fen(), '7k/8/8/8/NN2N3/8/8/K7 b - - 1 1')
+
+    def test_draw_detection(self):
+        """Stalemate, bare kings and threefold repetition end the game"""
+        from .chess_engine import Board, replay
+        self.assertEqual(Board('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1').outcome()['termination'], 'stalemate')
+        self.assertEqual(Board('8/8/8/8/8/8/8/K1k5 w - - 0 1').outcome()['termination'], 'insufficient_material')
+        board = replay(['g1f3', 'g8f6', 'f3g1', 'f6g8', 'g1f3', 'g8f6', 'f3g1', 'f6g8'])
+        self.assertEqual(board.outcome()['termination'], 'threefold_repetition')
+
+
+class RoundRobinScheduleTests(TestCase):
+    """Test the Berger round robin schedule"""
+    
+    def check_schedule(self, num_players):
+        from .tournament_helpers import generate_round_robin_schedule
+        schedule = generate_round_robin_schedule(list(range(num_players)))
+        
+        expected_rounds = num_players - 1 if num_players % 2 == 0 else num_players
+        self.assertEqual(len(schedule), expected_rounds)
+        
+        met = set()
+        colors = {p: '' for p in range(num_players)}
+        for pairings in schedule:
+            for white, black in pairings:
+                if black is None:
+                    continue
+                pair = frozenset((white, black))
+                self.assertNotIn(pair, met)
+                met.add(pair)
+                colors[white] += 'W'
+                colors[black] += 'B'
+        
+        self.assertEqual(len(met), num_players * (num_players - 1) // 2)
+        for history in colors.values():
+            self.assertLessEqual(abs(history.count('W') - history.count('B')), 1)
+            self.assertNotIn('WWW', history)
+            self.assertNotIn('BBB', history)
+    
+    def test_even_number_of_players(self):
+        """Every pair meets once with balanced colours"""
+        self.check_schedule(10)
+    
+    def test_odd_number_of_players(self):
+        """Odd fields get one bye per round"""
+        self.check_schedule(7)
+
+
+class StandingsTests(TestCase):
+    """Test incremental tournament standings"""
+    
+    def setUp(self):
+        self.role = Role.objects.create(role_name='player')
+        self.players = [
+            Player.objects.create_user(
+                username=f'stand{i}', email=f'stand{i}@example.com', password='pass', role=self.role
+            )
+            for i in range(3)
+        ]
+        self.tournament = TournamentActive.objects.create(
+            tournament_name='Standings Test',
+            created_by=self.players[0],
+            tournament_type='swiss',
+            start_date=timezone.now()
+        )
+        for player in self.players:
+            TournamentParticipant.objects.create(tournament=self.tournament, player=player)
+    
+    def play(self, white, black, result, round_number=1):
+        return Match.objects.create(
+            tournament=self.tournament,
+            white_player=white,
+            black_player=black,
+            round_number=round_number,
+            match_status='completed',
+            result=result
+        )
+    
+    def standing(self, player):
+        return TournamentParticipant.objects.get(tournament=self.tournament, player=player)
+    
+    def test_result_updates_points_colours_and_buchholz(self):
+        """Both players' rows and earlier opponents' Buchholz are updated"""
+        from .standings import record_match_result
+        a, b, c = self.players
+        record_match_result(self.play(a, b, 'white_win'))
+        record_match_result(self.play(c, a, 'draw', round_number=2))
+        
+        self.assertEqual(self.standing(a).points, 1.5)
+        self.assertEqual(self.standing(a).color_history, 'WB')
+        self.assertEqual(self.standing(a).opponents, [b.player_id, c.player_id])
+        self.assertEqual(self.standing(a).buchholz, 0.5)
+        # b's only opponent (a) now has 1.5 points
+        self.assertEqual(self.standing(b).buchholz, 1.5)
+        self.assertEqual(self.standing(c).buchholz, 1.5)
+    
+    def test_result_is_recorded_once(self):
+        """Completing the same match twice doesn't double count"""
+        from .standings import record_match_result
+        a, b, _ = self.players
+        match = self.play(a, b, 'black_win')
+        self.assertTrue(record_match_result(match))
+        self.assertFalse(record_match_result(match))
+        self.assertEqual(self.standing(b).points, 1)
+        self.assertEqual(self.standing(b).games_played, 1)
+
+
+class SwissPairingTests(TestCase):
+    """Test the Dutch-style Swiss pairing engine"""
+    
+    def test_everyone_is_paired_once(self):
+        """All players are paired, odd player count gives exactly one bye"""
+        from .swiss_pairing import SwissPlayer, pair_round
+        players = [SwissPlayer(i, score=i % 3, rating=1500 + i) for i in range(11)]
+        pairs, bye = pair_round(players)
+        
+        seen = [p.player_id for pair in pairs for p in pair] + [bye.player_id]
+        self.assertEqual(sorted(seen), list(range(11)))
+    
+    def test_no_repeat_pairings_and_bye_once(self):
+        """Previous opponents are avoided and a bye isn't given twice"""
+        from .swiss_pairing import SwissPlayer, pair_round
+        players = [
+            SwissPlayer(1, score=1, colors='W', opponents=[2]),
+            SwissPlayer(2, score=0, colors='B', opponents=[1]),
+            SwissPlayer(3, score=1, colors='W', opponents=[4]),
+            SwissPlayer(4, score=0, colors='B', opponents=[3]),
+            SwissPlayer(5, score=1, had_bye=True),
+        ]
+        pairs, bye = pair_round(players)
+        
+        self.assertNotEqual(bye.player_id, 5)
+        for white, black in pairs:
+            self.assertNotIn(black.player_id, white.opponents)
+    
+    def test_absolute_colour_preference_is_respected(self):
+        """A player who had white twice in a row gets black"""
+        from .swiss_pairing import SwissPlayer, pair_round
+        players = [
+            SwissPlayer(1, score=2, colors='WW'),
+            SwissPlayer(2, score=2, colors='BW'),
+        ]
+        pairs, bye = pair_round(players)
+        
+        self.assertIsNone(bye)
+        white, black = pairs[0]
+        self.assertEqual(white.player_id, 2)
+        self.assertEqual(black.player_id, 1)
+
+
+class TiebreakTests(TestCase):
+    """Test FIDE tiebreak computation"""
+    
+    GAMES = [
+        (1, 2, 1.0, 1), (3, 4, 0.5, 1),
+        (1, 3, 0.5, 2), (2, 4, 1.0, 2),
+        (1, 4, 1.0, 3), (2, 3, 0.0, 3),
+    ]
+    POINTS = [2.5, 1.0, 2.0, 0.5]
+    
+    def test_tiebreak_values(self):
+        """Buchholz, Median, Sonneborn-Berger, progressive and wins"""
+        from .tiebreaks import compute_tiebreaks
+        tiebreaks = compute_tiebreaks([1, 2, 3, 4], self.POINTS, self.GAMES)
+        
+        self.assertEqual(tiebreaks['buchholz'][0], 3.5)
+        self.assertEqual(tiebreaks['median_buchholz'][0], 1.0)
+        self.assertEqual(tiebreaks['sonneborn_berger'][0], 2.5)
+        self.assertEqual(tiebreaks['progressive'][0], 5.0)
+        self.assertEqual(tiebreaks['wins'], [2, 1, 1, 0])
+    
+    def test_numpy_and_python_agree(self):
+        """Both implementations give the same results"""
+        from .tiebreaks import compute_tiebreaks
+        ids = [1, 2, 3, 4]
+        self.assertEqual(
+            compute_tiebreaks(ids, self.POINTS, self.GAMES, use_numpy=False),
+            compute_tiebreaks(ids, self.POINTS, self.GAMES)
+        )
+    
+    def test_placements_assigned_on_completion(self):
+        """Final placements follow points, then tiebreaks"""
+        from .standings import record_match_result
+        from .tiebreaks import assign_placements
+        role = Role.objects.create(role_name='player')
+        players = [
+            Player.objects.create_user(
+                username=f'tb{i}', email=f'tb{i}@example.com', password='pass', role=role
+            )
+            for i in range(4)
+        ]
+        tournament = TournamentActive.objects.create(
+            tournament_name='Tiebreak Test',
+            created_by=players[0],
+            tournament_type='round_robin',
+            start_date=timezone.now()
+        )
+        for player in players:
+            TournamentParticipant.objects.create(tournament=tournament, player=player)
+        
+        a, b, c, d = players
+        # a and c both finish on 1.5 points; a scored earlier (progressive)
+        for white, black, result, round_number in [
+            (a, c, 'white_win', 1), (b, d, 'white_win', 1),
+            (c, d, 'white_win', 2), (a, b, 'black_win', 2),
+            (a, d, 'draw', 3), (b, c, 'draw', 3),
+        ]:
+            record_match_result(Match.objects.create(
+                tournament=tournament, white_player=white, black_player=black,
+                round_number=round_number, match_status='completed', result=result
+            ))
+        
+        assign_placements(tournament)
+        placements = dict(TournamentParticipant.objects.filter(
+            tournament=tournament
+        ).values_list('player_id', 'placement'))
+        
+        self.assertEqual(placements[b.player_id], 1)
+        self.assertEqual(placements[a.player_id], 2)
+        self.assertEqual(placements[c.player_id], 3)
+        self.assertEqual(placements[d.player_id], 4)
+
+
 # ============================================
 # FRIENDSHIP TESTS
 # ============================================
@@ -612,6 +1867,131 @@ class NotificationTests(TestCase):
         self.assertTrue(notification.is_read)
 
 
+class ChannelLayerTests(TestCase):
+    """Test the configured channel layer and batched WebSocket delivery"""
+    
+    def test_layer_uses_capacity_and_expiry_settings(self):
+        """The channel layer is built with the configured limits"""
+        from django.conf import settings
+        from channels.layers import get_channel_layer
+        layer = get_channel_layer()
+        self.assertEqual(layer.capacity, settings.CHANNEL_LAYER_CAPACITY)
+        self.assertEqual(layer.expiry, settings.CHANNEL_LAYER_EXPIRY)
+        self.assertEqual(layer.group_expiry, settings.CHANNEL_LAYER_GROUP_EXPIRY)
+    
+    def test_batched_messages_reach_group_members(self):
+        """Messages sent in one flush are delivered to every group"""
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from .consumers import send_websocket_messages
+        layer = get_channel_layer()
+        channels = {}
+        for group in ('user_1', 'user_2'):
+            channels[group] = async_to_sync(layer.new_channel)()
+            async_to_sync(layer.group_add)(group, channels[group])
+        
+        sent = send_websocket_messages([
+            ('user_1', 'new_round', {'round_number': 2}),
+            ('user_2', 'new_round', {'round_number': 2}),
+        ])
+        
+        self.assertEqual(sent, 2)
+        for group, channel in channels.items():
+            message = async_to_sync(layer.receive)(channel)
+            self.assertEqual(message['type'], 'new_round')
+            self.assertEqual(message['round_number'], 2)
+
+    def test_coalesce_keeps_latest_round_per_group(self):
+        """Superseded new_round messages are dropped, moves are kept"""
+        from .publisher import coalesce
+        batch = coalesce([
+            ('user_1', 'new_round', {'round_number': 2}),
+            ('game_5', 'game_move', {'move': 'e2e4'}),
+            ('user_1', 'new_round', {'round_number': 3}),
+            ('game_5', 'game_move', {'move': 'e7e5'}),
+        ])
+        self.assertEqual(batch, [
+            ('user_1', 'new_round', {'round_number': 3}),
+            ('game_5', 'game_move', {'move': 'e2e4'}),
+            ('game_5', 'game_move', {'move': 'e7e5'}),
+        ])
+
+    def test_coalesce_keeps_distinct_updates(self):
+        """game_update and tournament_update payloads are all delivered"""
+        from .publisher import coalesce
+        messages = [
+            ('game_5', 'game_update', {'status': 'in_progress'}),
+            ('game_5', 'game_update', {'white_offers_draw': True}),
+            ('tournament_1', 'tournament_update', {'status': 'started'}),
+            ('tournament_1', 'tournament_update', {'current_round': 2}),
+        ]
+        self.assertEqual(coalesce(messages), messages)
+
+    def test_coalesce_keeps_rounds_of_different_tournaments(self):
+        """A user in two tournaments gets the new round of both"""
+        from .publisher import coalesce
+        batch = coalesce([
+            ('user_1', 'new_round', {'tournament_id': 1, 'round_number': 2}),
+            ('user_1', 'new_round', {'tournament_id': 2, 'round_number': 4}),
+            ('user_1', 'new_round', {'tournament_id': 1, 'round_number': 3}),
+        ])
+        self.assertEqual(batch, [
+            ('user_1', 'new_round', {'tournament_id': 1, 'round_number': 3}),
+            ('user_1', 'new_round', {'tournament_id': 2, 'round_number': 4}),
+        ])
+
+    def test_group_messages_are_sent_in_order(self):
+        """A slow send never lets a later message to the same group overtake it"""
+        import asyncio
+        from asgiref.sync import async_to_sync
+        from .publisher import group_send_ordered
+        delivered = []
+
+        class SlowLayer:
+            async def group_send(self, group, event):
+                await asyncio.sleep(0.02 if event['type'] == 'game_move' else 0)
+                delivered.append((group, event['type']))
+
+        errors = async_to_sync(group_send_ordered)(SlowLayer(), [
+            ('game_5', 'game_move', {}),
+            ('game_5', 'game_end', {}),
+            ('tournament_1', 'board_update', {}),
+        ])
+
+        self.assertEqual(errors, [])
+        game = [message_type for group, message_type in delivered if group == 'game_5']
+        self.assertEqual(game, ['game_move', 'game_end'])
+        self.assertEqual(len(delivered), 3)
+
+    def test_background_publisher_delivers_and_reports_metrics(self):
+        """Queued messages are flushed by the sender thread"""
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from .publisher import WebSocketPublisher
+        layer = get_channel_layer()
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)('user_7', channel)
+
+        publisher = WebSocketPublisher(background=True, batch_window=0.05)
+        try:
+            accepted = publisher.publish_many([
+                ('user_7', 'new_round', {'round_number': 1}),
+                ('user_7', 'new_round', {'round_number': 2}),
+            ])
+            self.assertEqual(accepted, 2)
+            self.assertTrue(publisher.flush(timeout=5))
+        finally:
+            publisher.stop()
+
+        message = async_to_sync(layer.receive)(channel)
+        self.assertEqual(message['round_number'], 2)
+        metrics = publisher.get_metrics()
+        self.assertEqual(metrics['enqueued'], 2)
+        self.assertEqual(metrics['sent'], 1)
+        self.assertEqual(metrics['coalesced'], 1)
+        self.assertEqual(metrics['pending'], 0)
+
+
 # ============================================
 # INTEGRATION TESTS
 # ============================================
@@ -635,8 +2015,7 @@ class TournamentFlowTests(TestCase):
             password='adminpass',
             role=self.admin_role
         )
-        self.admin.auth_token = 'tadmin-token'
-        self.admin.save()
+        issue_token(self.admin, token='tadmin-token')
         
         # Create players
         self.players = []
@@ -647,8 +2026,7 @@ class TournamentFlowTests(TestCase):
                 password='pass',
                 role=self.player_role
             )
-            player.auth_token = f'tplayer{i}-token'
-            player.save()
+            issue_token(player, token=f'tplayer{i}-token')
             self.players.append(player)
     
     def test_full_tournament_creation_and_join_flow(self):
@@ -0,0 +1,190 @@
+"""
+Tiebreak Computation
+FIDE tiebreaks (Buchholz, Median Buchholz, Sonneborn-Berger, progressive
+score, wins) computed for all participants in a single pass over the
+tournament's games.
+
+NumPy is used when installed; otherwise an equivalent pure Python
+implementation is used.
+"""
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+TIEBREAK_FIELDS = ['buchholz', 'median_buchholz', 'sonneborn_berger', 'progressive', 'wins']
+
+WHITE_SCORES = {'white_win': 1.0, 'black_win': 0.0, 'draw': 0.5}
+
+
+def _game_entries(index, games):
+    """Expand games into one (player, opponent, score, round) entry per side"""
+    players, opponents, scores, rounds = [], [], [], []
+    for white_id, black_id, white_score, round_number in games:
+        if white_id not in index or black_id not in index:
+            continue
+        white, black = index[white_id], index[black_id]
+        players += [white, black]
+        opponents += [black, white]
+        scores += [white_score, 1.0 - white_score]
+        rounds += [round_number, round_number]
+    return players, opponents, scores, rounds
+
+
+def _compute_numpy(n, points, players, opponents, scores, rounds):
+    p = np.asarray(players, dtype=np.int64)
+    o = np.asarray(opponents, dtype=np.int64)
+    s = np.asarray(scores, dtype=np.float64)
+    r = np.asarray(rounds, dtype=np.float64)
+    pts = np.asarray(points, dtype=np.float64)
+
+    opponent_points = pts[o]
+    buchholz = np.bincount(p, weights=opponent_points, minlength=n)
+    games = np.bincount(p, minlength=n)
+
+    highest = np.zeros(n)
+    lowest = np.zeros(n)
+    if len(p):
+        highest = np.full(n, -np.inf)
+        lowest = np.full(n, np.inf)
+        np.maximum.at(highest, p, opponent_points)
+        np.minimum.at(lowest, p, opponent_points)
+    median = np.where(games >= 3, buchholz - highest - lowest, buchholz)
+
+    sonneborn_berger = np.bincount(p, weights=opponent_points * s, minlength=n)
+    last_round = r.max() if len(r) else 0
+    progressive = np.bincount(p, weights=(last_round - r + 1) * s, minlength=n)
+    wins = np.bincount(p, weights=(s == 1.0).astype(np.float64), minlength=n)
+
+    return {
+        'buchholz': buchholz.tolist(),
+        'median_buchholz': median.tolist(),
+        'sonneborn_berger': sonneborn_berger.tolist(),
+        'progressive': progressive.tolist(),
+        'wins': wins.astype(np.int64).tolist(),
+    }
+
+
+def _compute_python(n, points, players, opponents, scores, rounds):
+    buchholz = [0.0] * n
+    sonneborn_berger = [0.0] * n
+    progressive = [0.0] * n
+    wins = [0] * n
+    opponent_scores = [[] for _ in range(n)]
+    last_round = max(rounds) if rounds else 0
+
+    for p, o, s, r in zip(players, opponents, scores, rounds):
+        opponent_points = points[o]
+        buchholz[p] += opponent_points
+        sonneborn_berger[p] += opponent_points * s
+        progressive[p] += (last_round - r + 1) * s
+        if s == 1.0:
+            wins[p] += 1
+        opponent_scores[p].append(opponent_points)
+
+    median = [
+        buchholz[i] - max(opponent_scores[i]) - min(opponent_scores[i])
+        if len(opponent_scores[i]) >= 3 else buchholz[i]
+        for i in range(n)
+    ]
+
+    return {
+        'buchholz': buchholz,
+        'median_buchholz': median,
+        'sonneborn_berger': sonneborn_berger,
+        'progressive': progressive,
+        'wins': wins,
+    }
+
+
+def compute_tiebreaks(player_ids, points, games, use_numpy=True):
+    """
+    Compute tiebreaks for every player in one pass
+
+    Args:
+        player_ids: List of player IDs
+        points: List of final scores aligned with player_ids (byes included)
+        games: Iterable of (white_id, black_id, white_score, round_number)
+        use_numpy: Use the vectorized implementation when numpy is available
+
+    Returns:
+        dict: Tiebreak name -> list of values aligned with player_ids
+    """
+    n = len(player_ids)
+    index = {player_id: i for i, player_id in enumerate(player_ids)}
+    players, opponents, scores, rounds = _game_entries(index, games)
+
+    if use_numpy and np is not None:
+        return _compute_numpy(n, points, players, opponents, scores, rounds)
+    return _compute_python(n, points, players, opponents, scores, rounds)
+
+
+def rank_order(points, ratings, tiebreaks):
+    """
+    Order players by score, then tiebreaks, then rating
+
+    Returns:
+        list: Indices into the input lists, best player first
+    """
+    keys = [points] + [tiebreaks[name] for name in TIEBREAK_FIELDS] + [ratings]
+    return sorted(range(len(points)), key=lambda i: tuple(-key[i] for key in keys))
+
+
+def tournament_tiebreaks(tournament):
+    """
+    Live standings with tiebreaks for a tournament
+
+    Uses two queries: the standings rows and the completed games.
+
+    Args:
+        tournament: TournamentActive instance
+
+    Returns:
+        list: Dicts with participant, rank, points and tiebreaks, best first
+    """
+    from .models import Match
+    from .standings import get_standings
+
+    standings = list(get_standings(tournament))
+    games = [
+        (white_id, black_id, WHITE_SCORES[result], round_number)
+        for white_id, black_id, result, round_number in Match.objects.filter(
+            tournament=tournament,
+            match_status='completed',
+            result__in=list(WHITE_SCORES)
+        ).values_list('white_player_id', 'black_player_id', 'result', 'round_number')
+    ]
+
+    player_ids = [tp.player_id for tp in standings]
+    points = [tp.points for tp in standings]
+    ratings = [tp.player.elo_rating for tp in standings]
+    tiebreaks = compute_tiebreaks(player_ids, points, games)
+
+    rows = []
+    for rank, i in enumerate(rank_order(points, ratings, tiebreaks), start=1):
+        row = {'rank': rank, 'participant': standings[i], 'points': points[i]}
+        for name in TIEBREAK_FIELDS:
+            row[name] = tiebreaks[name][i]
+        rows.append(row)
+    return rows
+
+
+def assign_placements(tournament):
+    """
+    Store final placements on TournamentParticipant from score and tiebreaks
+
+    Args:
+        tournament: TournamentActive instance
+
+    Returns:
+        list: Tiebreak rows as returned by tournament_tiebreaks
+    """
+    from .models import TournamentParticipant
+
+    rows = tournament_tiebreaks(tournament)
+    participants = []
+    for row in rows:
+        row['participant'].placement = row['rank']
+        participants.append(row['participant'])
+    TournamentParticipant.objects.bulk_update(participants, ['placement'])
+    return rows
@@ -146,7 +146,12 @@ def generate_rating_based_pairings(participants, time_control_type):
 
 def generate_swiss_pairings(participants, round_number, previous_matches):
     """
-    Generate Swiss system pairings
+    Generate Swiss system pairings (Dutch system)
+    
+    Players are paired inside score groups with backtracking, floating
+    players down when a group can't be completed. Colour preferences are
+    respected and nobody receives a second bye while someone else is
+    still eligible. See swiss_pairing.py for the engine itself.
     
     Args:
         participants: List of Player objects
@@ -154,62 +159,156 @@ def generate_swiss_pairings(participants, round_number, previous_matches):
         previous_matches: List of previous Match objects
         
     Returns:
-        list: List of tuples (player1, player2)
+        list: List of tuples (white_player, black_player), bye as (player, None)
     """
-    # Calculate scores for each player
+    from .swiss_pairing import SwissPlayer
+    
     scores = {}
+    colors = {}
     played_against = {}
+    games_played = {}
     
     for participant in participants:
         scores[participant.player_id] = 0
+        colors[participant.player_id] = []
         played_against[participant.player_id] = set()
-    
-    # Count wins/draws
-    for match in previous_matches:
+        games_played[participant.player_id] = 0
+    
+    # Replay results in round order so colour histories are chronological
+    ordered_matches = sorted(previous_matches, key=lambda m: (m.round_number, m.match_id))
+    for match in ordered_matches:
+        white_id = match.white_player_id
+        black_id = match.black_player_id
+        if white_id not in scores or black_id not in scores:
+            continue
+        
         if match.result == 'white_win':
-            scores[match.white_player.player_id] += 1
+            scores[white_id] += 1
         elif match.result == 'black_win':
-            scores[match.black_player.player_id] += 1
+            scores[black_id] += 1
         elif match.result == 'draw':
-            scores[match.white_player.player_id] += 0.5
-            scores[match.black_player.player_id] += 0.5
+            scores[white_id] += 0.5
+            scores[black_id] += 0.5
         
-        played_against[match.white_player.player_id].add(match.black_player.player_id)
-        played_against[match.black_player.player_id].add(match.white_player.player_id)
+        colors[white_id].append('W')
+        colors[black_id].append('B')
+        played_against[white_id].add(black_id)
+        played_against[black_id].add(white_id)
+        games_played[white_id] += 1
+        games_played[black_id] += 1
+    
+    # Byes aren't stored as matches - a player with fewer games than
+    # completed rounds must have sat one out
+    swiss_players = [
+        SwissPlayer(
+            player_id=p.player_id,
+            score=scores[p.player_id],
+            rating=p.elo_rating,
+            colors=colors[p.player_id],
+            opponents=played_against[p.player_id],
+            had_bye=games_played[p.player_id] < round_number - 1
+        )
+        for p in participants
+    ]
+    players_by_id = {p.player_id: p for p in participants}
+    
+    return _pair_swiss_players(swiss_players, players_by_id)
+
+
+def generate_swiss_pairings_from_standings(standings):
+    """
+    Generate Swiss system pairings from persisted standings
     
-    # Sort by score (highest first)
-    sorted_players = sorted(
-        participants,
-        key=lambda p: scores[p.player_id],
-        reverse=True
-    )
+    Reads scores, colours, opponents and byes straight from the
+    TournamentParticipant rows instead of replaying match history.
     
-    pairings = []
-    paired = set()
-    
-    for player in sorted_players:
-        if player.player_id in paired:
-            continue
+    Args:
+        standings: TournamentParticipant objects with player loaded
         
-        # Find opponent with similar score who hasn't played yet
-        for opponent in sorted_players:
-            if (opponent.player_id != player.player_id and 
-                opponent.player_id not in paired and
-                opponent.player_id not in played_against[player.player_id]):
-                
-                pairings.append((player, opponent))
-                paired.add(player.player_id)
-                paired.add(opponent.player_id)
-                break
+    Returns:
+        list: List of tuples (white_player, black_player), bye as (player, None)
+    """
+    from .swiss_pairing import SwissPlayer
+    
+    swiss_players = [
+        SwissPlayer(
+            player_id=tp.player_id,
+            score=tp.points,
+            rating=tp.player.elo_rating,
+            colors=tp.color_history,
+            opponents=tp.opponents,
+            had_bye=tp.had_bye
+        )
+        for tp in standings
+    ]
+    players_by_id = {tp.player_id: tp.player for tp in standings}
+    
+    return _pair_swiss_players(swiss_players, players_by_id)
+
+
+def _pair_swiss_players(swiss_players, players_by_id):
+    """Run the pairing engine and map the result back to Player objects"""
+    from .swiss_pairing import pair_round
+    
+    pairs, bye = pair_round(swiss_players)
     
-    # Handle unpaired player (bye)
-    unpaired = [p for p in sorted_players if p.player_id not in paired]
-    if unpaired:
-        pairings.append((unpaired[0], None))
+    pairings = [
+        (players_by_id[white.player_id], players_by_id[black.player_id])
+        for white, black in pairs
+    ]
+    if bye:
+        pairings.append((players_by_id[bye.player_id], None))
     
     return pairings
 
 
+def generate_round_robin_schedule(participants):
+    """
+    Generate a complete round robin schedule using the circle (Berger) method
+    
+    The last seat stays fixed while everyone else rotates, so every pair
+    meets exactly once. Colours alternate so no player is more than one
+    game off balance or gets the same colour more than twice in a row.
+    With an odd number of players the fixed seat is a bye.
+    
+    Args:
+        participants: List of Player objects in seed order
+        
+    Returns:
+        list: One list per round of tuples (white_player, black_player),
+              bye as (player, None)
+    """
+    players = list(participants)
+    if len(players) % 2 == 1:
+        players.append(None)  # None = bye
+    
+    n = len(players)
+    rotating = n - 1
+    fixed = players[-1]
+    
+    schedule = []
+    for round_index in range(rotating):
+        rotating_player = players[round_index]
+        if fixed is None:
+            pairings = [(rotating_player, None)]
+        elif round_index % 2 == 0:
+            pairings = [(rotating_player, fixed)]
+        else:
+            pairings = [(fixed, rotating_player)]
+        
+        for offset in range(1, n // 2):
+            first = players[(round_index + offset) % rotating]
+            second = players[(round_index - offset) % rotating]
+            if offset % 2 == 1:
+                pairings.append((first, second))
+            else:
+                pairings.append((second, first))
+        
+        schedule.append(pairings)
+    
+    return schedule
+
+
 def format_time_control_display(time_type, minutes, increment=0):
     """
     Format time control for display
@@ -228,6 +327,104 @@ def format_time_control_display(time_type, minutes, increment=0):
     return f"{minutes}+{increment} {time_type.capitalize()}"
 
 
+def create_round_matches(tournament, pairings, notification_title='🎮 Turnir je započeo!', batch_size=500):
+    """
+    Create Match, Game and Notification rows for a batch of pairings using
+    bulk inserts inside a single transaction.
+
+    Rows are built in memory first so the number of database round-trips
+    stays constant regardless of how many pairings are created.
+
+    Args:
+        tournament: TournamentActive instance
+        pairings: List of tuples (white_player, black_player, round_number)
+        notification_title: Title used for the pairing notifications
+        batch_size: Maximum number of rows per INSERT statement
+
+    Returns:
+        tuple: (list of created Match objects, list of created Game objects)
+    """
+    from .models import Match, Game, Notification
+    from django.db import connection, transaction
+    from django.db.models import Max
+
+    if not pairings:
+        return [], []
+
+    time_control_minutes = tournament.time_control_minutes or 10
+    time_increment_seconds = tournament.time_increment_seconds or 0
+    time_control = f"{time_control_minutes}+{time_increment_seconds}"
+
+    matches = [
+        Match(
+            tournament=tournament,
+            white_player=white,
+            black_player=black,
+            match_status='scheduled',
+            round_number=round_number,
+            time_control=time_control,
+            white_elo_before=white.elo_rating,
+            black_elo_before=black.elo_rating
+        )
+        for white, black, round_number in pairings
+    ]
+
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Match.objects.bulk_create(matches, batch_size=batch_size)
+        else:
+            # Backends like MySQL don't return primary keys from bulk inserts.
+            # Auto-increment ids are ascending within this transaction, so the
+            # new rows can be read back in insertion order with one query.
+            last_id = Match.objects.aggregate(last_id=Max('match_id'))['last_id'] or 0
+            Match.objects.bulk_create(matches, batch_size=batch_size)
+            match_ids = list(Match.objects.filter(
+                tournament=tournament,
+                match_id__gt=last_id
+            ).order_by('match_id').values_list('match_id', flat=True))
+            for match, match_id in zip(matches, match_ids):
+                match.match_id = match_id
+
+        games = [
+            Game(
+                tournament=tournament,
+                match=match,
+                white_player=match.white_player,
+                black_player=match.black_player,
+                status='waiting',
+                time_control_minutes=time_control_minutes,
+                time_increment_seconds=time_increment_seconds,
+                white_time_remaining=time_control_minutes * 60,
+                black_time_remaining=time_control_minutes * 60
+            )
+            for match in matches
+        ]
+        Game.objects.bulk_create(games, batch_size=batch_size)
+
+        # Notify both players with their opponent and colour
+        notifications = []
+        for match in matches:
+            notifications.append(Notification(
+                player=match.white_player,
+                notification_type='pairing_update',
+                title=notification_title,
+                message=f'Tvoj protivnik je {match.black_player.username}. Igraš bijelim figurama! Klikni za početak igre.',
+                related_tournament=tournament,
+                related_match=match
+            ))
+            notifications.append(Notification(
+                player=match.black_player,
+                notification_type='pairing_update',
+                title=notification_title,
+                message=f'Tvoj protivnik je {match.white_player.username}. Igraš crnim figurama! Klikni za početak igre.',
+                related_tournament=tournament,
+                related_match=match
+            ))
+        Notification.objects.bulk_create(notifications, batch_size=batch_size)
+
+    return matches, games
+
+
 def check_round_complete_and_advance(tournament, match):
     """
     Check if current round is complete and advance to next round if needed.
@@ -235,6 +432,9 @@ def check_round_complete_and_advance(tournament, match):
     For round_robin, checks if all rounds are done.
     For swiss, generates new pairings.
     
+    Advancement runs with the tournament row locked and is recorded on
+    TournamentRound, so concurrent completions advance a round only once.
+    
     Args:
         tournament: TournamentActive instance
         match: Match that just completed
@@ -242,8 +442,9 @@ def check_round_complete_and_advance(tournament, match):
     Returns:
         dict: Status info about round advancement
     """
-    from .models import Match, TournamentParticipant, TournamentRound
-    import math
+    from .models import Match, TournamentActive, TournamentRound
+    from django.db import transaction
+    from django.db.models import Count, Q
     from django.utils import timezone
     import logging
     
@@ -260,15 +461,16 @@ def check_round_complete_and_advance(tournament, match):
         round_number=current_round
     )
     
-    total_matches = current_round_matches.count()
-    completed_matches = current_round_matches.filter(match_status='completed').count()
+    # Total and completed counts in a single round-trip
+    counts = current_round_matches.aggregate(
+        total=Count('match_id'),
+        completed=Count('match_id', filter=Q(match_status='completed'))
+    )
+    total_matches = counts['total']
+    completed_matches = counts['completed']
     
     logger.info(f"[ROUND_CHECK] Round {current_round}: {completed_matches}/{total_matches} matches completed")
     
-    # Debug: log each match status
-    for m in current_round_matches:
-        logger.info(f"  Match {m.match_id}: {m.white_player.username} vs {m.black_player.username if m.black_player else 'BYE'}, status={m.match_status}, winner={m.winner}")
-    
     # If not all matches in current round are done, don't advance
     if completed_matches < total_matches:
         return {
@@ -278,14 +480,78 @@ def check_round_complete_and_advance(tournament, match):
             'message': f'Runda {current_round}: {completed_matches}/{total_matches} mečeva završeno'
         }
     
-    # All matches in current round are complete!
-    logger.info(f"[ROUND_CHECK] Round {current_round} COMPLETE! Advancing tournament...")
+    # All matches in current round are complete - advance under a row lock
+    # so simultaneous game completions create the next round only once
+    with transaction.atomic():
+        locked = TournamentActive.objects.select_for_update().get(pk=tournament.pk)
+        already_advanced = {
+            'round_complete': True,
+            'tournament_complete': locked.tournament_status == 'completed',
+            'already_advanced': True,
+            'message': f'Runda {current_round} je već završena'
+        }
+        if locked.tournament_status != 'in_progress' or locked.current_round != current_round:
+            logger.info(f"[ROUND_CHECK] Round {current_round} already advanced, skipping")
+            result = already_advanced
+        else:
+            # Idempotency guard keyed on (tournament, round)
+            round_row, _ = TournamentRound.objects.get_or_create(
+                tournament=locked,
+                round_number=current_round,
+                defaults={'round_status': 'in_progress'}
+            )
+            if round_row.round_status == 'completed':
+                logger.info(f"[ROUND_CHECK] Round {current_round} already marked completed, skipping")
+                result = already_advanced
+            else:
+                round_row.round_status = 'completed'
+                round_row.end_time = timezone.now()
+                round_row.save(update_fields=['round_status', 'end_time', 'updated_at'])
+                
+                logger.info(f"[ROUND_CHECK] Round {current_round} COMPLETE! Advancing tournament...")
+                result = _advance_round(locked, current_round, current_round_matches)
+                
+                if result.get('next_round'):
+                    TournamentRound.objects.get_or_create(
+                        tournament=locked,
+                        round_number=result['next_round'],
+                        defaults={'round_status': 'in_progress', 'start_time': timezone.now()}
+                    )
+    
+    # Keep the caller's instance in sync with the locked row
+    tournament.current_round = locked.current_round
+    tournament.tournament_status = locked.tournament_status
+    tournament.end_date = locked.end_date
+    return result
+
+
+def _advance_round(tournament, current_round, current_round_matches):
+    """
+    Create the next round or complete the tournament once a round is done.
+    Must be called with the tournament row locked.
+    
+    Args:
+        tournament: Locked TournamentActive instance
+        current_round: Round number that just completed
+        current_round_matches: QuerySet of the completed round's matches
+        
+    Returns:
+        dict: Status info about round advancement
+    """
+    from .models import Match, TournamentParticipant
+    from .tiebreaks import assign_placements
+    import math
+    from django.utils import timezone
+    import logging
+    
+    logger = logging.getLogger(__name__)
+    tournament_type = tournament.tournament_type
     
     # ELIMINATION TOURNAMENT
     if tournament_type == 'elimination':
         # Get winners from current round
         winners = []
-        for m in current_round_matches:
+        for m in current_round_matches.select_related('winner'):
             if m.winner:
                 winners.append(m.winner)
         
@@ -318,7 +584,7 @@ def check_round_complete_and_advance(tournament, match):
             p1 = winners[i]
             p2 = winners[len(winners) - 1 - i]
             
-            new_match = Match.objects.create(
+            new_matches.append(Match(
                 tournament=tournament,
                 white_player=p1,
                 black_player=p2,
@@ -326,9 +592,8 @@ def check_round_complete_and_advance(tournament, match):
                 match_status='scheduled',
                 white_elo_before=p1.elo_rating,
                 black_elo_before=p2.elo_rating
-            )
-            new_matches.append(new_match)
-            logger.info(f"[ROUND_CHECK] Created match: {p1.username} vs {p2.username}")
+            ))
+        Match.objects.bulk_create(new_matches)
         
         # If odd number, one gets a bye to next round
         if len(winners) % 2 == 1:
@@ -338,56 +603,28 @@ def check_round_complete_and_advance(tournament, match):
         
         logger.info(f"[ROUND_CHECK] Round {next_round} created with {len(new_matches)} matches")
         
-        # Create notifications for all participants
+        # Notify all participants: bulk notifications and one WebSocket flush
         try:
-            from .models import TournamentParticipant, Notification
+            from .notifications import notify_players, announce_round
             
-            participants = TournamentParticipant.objects.filter(tournament=tournament)
-            for participant in participants:
-                Notification.objects.create(
-                    player=participant.player,
-                    notification_type='tournament_start',
-                    title=f'Nova runda u turniru {tournament.tournament_name}',
-                    message=f'Runda {next_round} je kreirana! Provjerite svoje parove.',
-                    related_tournament=tournament
-                )
-            logger.info(f"[ROUND_CHECK] Created {participants.count()} notifications for new round")
-        except Exception as e:
-            logger.error(f"[ROUND_CHECK] Error creating notifications: {e}")
-        
-        # Send WebSocket notification to all tournament participants
-        try:
-            from .consumers import send_websocket_message
-            from .models import TournamentParticipant
-            
-            # Notify tournament group
-            send_websocket_message(
-                f'tournament_{tournament.tournament_id}',
-                'tournament_round_update',
-                {
-                    'tournament_id': tournament.tournament_id,
-                    'round_number': next_round,
-                    'message': f'Nova runda {next_round} je kreirana!',
-                    'matches': [{'player1': m.white_player.username, 'player2': m.black_player.username} for m in new_matches]
-                }
+            participant_ids = list(TournamentParticipant.objects.filter(
+                tournament=tournament
+            ).values_list('player_id', flat=True))
+            notify_players(
+                participant_ids,
+                'tournament_start',
+                f'Nova runda u turniru {tournament.tournament_name}',
+                f'Runda {next_round} je kreirana! Provjerite svoje parove.',
+                related_tournament=tournament
             )
-            
-            # Notify each participant individually
-            participants = TournamentParticipant.objects.filter(tournament=tournament)
-            for participant in participants:
-                send_websocket_message(
-                    f'user_{participant.player.player_id}',
-                    'new_round',
-                    {
-                        'tournament_id': tournament.tournament_id,
-                        'round_number': next_round,
-                        'message': f'Nova runda {next_round} u turniru {tournament.tournament_name}!'
-                    }
-                )
-            
-            logger.info(f"[ROUND_CHECK] WebSocket notifications sent for new round {next_round}")
+            announce_round(
+                tournament, next_round, participant_ids,
+                f'Nova runda {next_round} je kreirana!',
+                matches=new_matches
+            )
+            logger.info(f"[ROUND_CHECK] Notified {len(participant_ids)} participants about round {next_round}")
         except Exception as e:
-            logger.error(f"[ROUND_CHECK] Error sending WebSocket notification: {e}")
+            logger.error(f"[ROUND_CHECK] Error notifying participants: {e}")
         
         return {
             'round_complete': True,
@@ -400,28 +637,56 @@ def check_round_complete_and_advance(tournament, match):
     # ROUND ROBIN TOURNAMENT
     elif tournament_type == 'round_robin':
         # Check if there are more rounds scheduled
-        total_participants = TournamentParticipant.objects.filter(tournament=tournament).count()
+        participants = [tp.player for tp in TournamentParticipant.objects.filter(
+            tournament=tournament
+        ).select_related('player').order_by('seed_number', 'participant_id')]
+        total_participants = len(participants)
         total_rounds = total_participants - 1 if total_participants % 2 == 0 else total_participants
         
-        if current_round >= total_rounds:
+        # Tournaments started before the Berger schedule have every game
+        # in round 1 - once those are done there is nothing left to play
+        total_games = total_participants * (total_participants - 1) // 2
+        all_games_created = Match.objects.filter(tournament=tournament).count() >= total_games
+        
+        if current_round >= total_rounds or all_games_created:
             tournament.tournament_status = 'completed'
             tournament.end_date = timezone.now()
             tournament.save()
+            assign_placements(tournament)
             return {
                 'round_complete': True,
                 'tournament_complete': True,
                 'message': 'Round Robin turnir završen!'
             }
         
-        # Advance to next round (matches should already be pre-generated)
-        tournament.current_round = current_round + 1
+        # Advance to next round and create its games from the Berger schedule
+        next_round = current_round + 1
+        tournament.current_round = next_round
         tournament.save()
         
+        schedule = generate_round_robin_schedule(participants)
+        pairings = [
+            (white, black, next_round)
+            for white, black in schedule[next_round - 1]
+            if black is not None
+        ]
+        new_matches, _ = create_round_matches(
+            tournament, pairings,
+            notification_title=f'Runda {next_round} - {tournament.tournament_name}'
+        )
+        
+        from .notifications import announce_round
+        announce_round(
+            tournament, next_round, [p.player_id for p in participants],
+            f'Nova runda {next_round} je kreirana!', matches=new_matches
+        )
+        
         return {
             'round_complete': True,
             'tournament_complete': False,
-            'next_round': current_round + 1,
-            'message': f'Runda {current_round} završena! Sljedeća runda: {current_round + 1}'
+            'next_round': next_round,
+            'matches_created': len(new_matches),
+            'message': f'Runda {current_round} završena! Sljedeća runda: {next_round}'
         }
     
     # SWISS TOURNAMENT
@@ -435,6 +700,7 @@ def check_round_complete_and_advance(tournament, match):
             tournament.tournament_status = 'completed'
             tournament.end_date = timezone.now()
             tournament.save()
+            assign_placements(tournament)
             return {
                 'round_complete': True,
                 'tournament_complete': True,
@@ -446,17 +712,20 @@ def check_round_complete_and_advance(tournament, match):
         tournament.current_round = next_round
         tournament.save()
         
-        participants = [tp.player for tp in TournamentParticipant.objects.filter(
+        from .standings import record_bye
+        
+        standings = list(TournamentParticipant.objects.filter(
             tournament=tournament, is_eliminated=False
-        )]
-        previous_matches = Match.objects.filter(tournament=tournament)
+        ).select_related('player'))
         
-        pairings = generate_swiss_pairings(participants, next_round, previous_matches)
+        pairings = generate_swiss_pairings_from_standings(standings)
         
         new_matches = []
         for p1, p2 in pairings:
-            if p2:  # Not a bye
-                new_match = Match.objects.create(
+            if not p2:
+                record_bye(tournament, p1)
+            else:
+                new_matches.append(Match(
                     tournament=tournament,
                     white_player=p1,
                     black_player=p2,
@@ -464,8 +733,14 @@ def check_round_complete_and_advance(tournament, match):
                     match_status='scheduled',
                     white_elo_before=p1.elo_rating,
                     black_elo_before=p2.elo_rating
-                )
-                new_matches.append(new_match)
+                ))
+        Match.objects.bulk_create(new_matches)
+        
+        from .notifications import announce_round
+        announce_round(
+            tournament, next_round, [tp.player_id for tp in standings],
+            f'Nova runda {next_round} je kreirana!', matches=new_matches
+        )
         
         return {
             'round_complete': True,
@@ -63,6 +63,7 @@ urlpatterns = [
     path('api/register/', api_views.api_register, name='api_register'),
     path('api/login/', api_views.api_login, name='api_login'),
     path('api/logout/', api_views.api_logout, name='api_logout'),
+    path('api/token/refresh/', api_views.api_refresh_token, name='api_refresh_token'),
     path('api/delete-account/', api_views.api_delete_account, name='api_delete_account'),
     path('api/google-login/', api_views.api_google_login, name='api_google_login'),
     path('api/chesscom-login/', api_views.api_chesscom_login, name='api_chesscom_login'),
@@ -76,6 +77,7 @@ urlpatterns = [
     path('api/profile/picture-source/', api_views.api_set_profile_picture_source, name='api_set_profile_picture_source'),
     path('api/profile/picture-sources/', api_views.api_get_available_picture_sources, name='api_get_available_picture_sources'),
     path('api/leaderboard/', api_views.api_leaderboard, name='api_leaderboard'),
+    path('api/leaderboard/me/', api_views.api_leaderboard_my_rank, name='api_leaderboard_my_rank'),
     
     # Tournaments
     path('api/tournaments/', api_views.api_all_tournaments, name='api_all_tournaments'),
@@ -87,6 +89,7 @@ urlpatterns = [
     path('api/tournaments/delete/', api_views.api_delete_tournament, name='api_delete_tournament'),
     path('api/tournaments/code/<str:tournament_code>/', api_views.api_tournament_by_code, name='api_tournament_by_code'),
     path('api/tournaments/<int:tournament_id>/', api_views.api_tournament_detail, name='api_tournament_detail'),
+    path('api/tournaments/<int:tournament_id>/standings/', api_views.api_tournament_standings, name='api_tournament_standings'),
     
     # Matches
     path('api/matches/my/', api_views.api_my_matches, name='api_my_matches'),
@@ -95,6 +98,7 @@ urlpatterns = [
     path('api/game/create/', game_views.api_create_game, name='api_create_game'),
     path('api/game/<int:game_id>/', game_views.api_game_detail, name='api_game_detail'),
     path('api/game/<int:game_id>/spectate/', game_views.api_game_spectate, name='api_game_spectate'),
+    path('api/game/<int:game_id>/pgn/', game_views.api_game_pgn, name='api_game_pgn'),
     path('api/game/<int:game_id>/join/', game_views.api_game_join, name='api_game_join'),
     path('api/game/<int:game_id>/move/', game_views.api_game_move, name='api_game_move'),
     path('api/game/<int:game_id>/resign/', game_views.api_game_resign, name='api_game_resign'),
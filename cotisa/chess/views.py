@@ -5,13 +5,13 @@ Serves existing HTML templates with Django authentication
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_protect
 from django.contrib import messages
 from django.utils import timezone
 import json
 
+from .json_encoding import JsonResponse
 from .models import (
     Player, TournamentActive, Match, Notification,
     TournamentRegistration, PlayerTitle, Title, Achievement
@@ -283,7 +283,7 @@ def api_notifications(request):
         'title': n.title,
         'message': n.message,
         'is_read': n.is_read,
-        'created_at': n.created_at.isoformat(),
+        'created_at': n.created_at,
     } for n in notifications]
     
     return JsonResponse({'notifications': data})
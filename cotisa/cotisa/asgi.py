@@ -22,3 +22,11 @@ application = ProtocolTypeRouter({
         URLRouter(websocket_urlpatterns)
     ),
 })
+
+# Rank indexes are built off the request path (chess/leaderboard.py)
+from chess.leaderboard import warm_in_background  # noqa: E402
+warm_in_background()
+
+# Flag-fall timers for every game this process accepts moves for (chess/clock_scheduler.py)
+from chess.clock_scheduler import start_in_background  # noqa: E402
+start_in_background()
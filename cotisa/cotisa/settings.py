@@ -40,10 +40,149 @@ INSTALLED_APPS = [
 
 # Channels configuration
 ASGI_APPLICATION = 'cotisa.asgi.application'
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+
+# Channel layer backend:
+#   'memory'       - in-process layer, for development/tests and single-worker deployments
+#   'redis'        - channels_redis, required once more than one ASGI worker runs
+#   'redis_pubsub' - channels_redis Pub/Sub layer (lower latency, no per-channel queues)
+# Multiple Redis hosts shard channels and group membership by consistent hashing.
+CHANNEL_LAYER_BACKEND = config('CHANNEL_LAYER_BACKEND', default='memory')
+CHANNEL_REDIS_HOSTS = config('CHANNEL_REDIS_HOSTS', default='redis://localhost:6379/0', cast=Csv())
+CHANNEL_LAYER_PREFIX = config('CHANNEL_LAYER_PREFIX', default='cotisa')
+CHANNEL_LAYER_CAPACITY = config('CHANNEL_LAYER_CAPACITY', default=1000, cast=int)  # messages per channel
+CHANNEL_LAYER_EXPIRY = config('CHANNEL_LAYER_EXPIRY', default=60, cast=int)  # seconds until an unread message is dropped
+CHANNEL_LAYER_GROUP_EXPIRY = config('CHANNEL_LAYER_GROUP_EXPIRY', default=86400, cast=int)  # seconds a group membership lives
+
+if CHANNEL_LAYER_BACKEND == 'redis':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': CHANNEL_REDIS_HOSTS,
+                'prefix': CHANNEL_LAYER_PREFIX,
+                'capacity': CHANNEL_LAYER_CAPACITY,
+                'expiry': CHANNEL_LAYER_EXPIRY,
+                'group_expiry': CHANNEL_LAYER_GROUP_EXPIRY,
+            },
+        }
+    }
+elif CHANNEL_LAYER_BACKEND == 'redis_pubsub':
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.pubsub.RedisPubSubChannelLayer',
+            'CONFIG': {
+                'hosts': CHANNEL_REDIS_HOSTS,
+                'prefix': CHANNEL_LAYER_PREFIX,
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+            'CONFIG': {
+                'capacity': CHANNEL_LAYER_CAPACITY,
+                'expiry': CHANNEL_LAYER_EXPIRY,
+                'group_expiry': CHANNEL_LAYER_GROUP_EXPIRY,
+            },
+        }
+    }
+
+# WebSocket publisher (chess/publisher.py)
+# In background mode views only enqueue; a sender thread coalesces and flushes to the
+# channel layer. The in-memory layer is bound to the server's event loop, so it defaults
+# to inline flushing.
+WEBSOCKET_PUBLISH_BACKGROUND = config('WEBSOCKET_PUBLISH_BACKGROUND', default=CHANNEL_LAYER_BACKEND != 'memory', cast=bool)
+WEBSOCKET_PUBLISH_BATCH_WINDOW = config('WEBSOCKET_PUBLISH_BATCH_WINDOW', default=0.01, cast=float)  # seconds to gather a burst
+WEBSOCKET_PUBLISH_MAX_BATCH = config('WEBSOCKET_PUBLISH_MAX_BATCH', default=500, cast=int)  # messages per flush
+WEBSOCKET_PUBLISH_QUEUE_SIZE = config('WEBSOCKET_PUBLISH_QUEUE_SIZE', default=10000, cast=int)  # pending messages before dropping
+
+# Active-game state cache (chess/game_state.py):
+#   'locmem' - per-process cache, for development/tests and single-worker deployments
+#   'redis'  - shared by all workers; required once more than one process serves games
+GAME_STATE_CACHE_BACKEND = config('GAME_STATE_CACHE_BACKEND', default='locmem')
+GAME_STATE_CACHE_URL = config('GAME_STATE_CACHE_URL', default=CHANNEL_REDIS_HOSTS[0])
+GAME_STATE_CACHE_TIMEOUT = config('GAME_STATE_CACHE_TIMEOUT', default=1800, cast=int)  # seconds an idle game stays cached
+FLAG_SCHEDULER_ON_STARTUP = config('FLAG_SCHEDULER_ON_STARTUP', default=True, cast=bool)  # run flag-fall timers when a server starts
+
+if GAME_STATE_CACHE_BACKEND == 'redis':
+    GAME_STATE_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': GAME_STATE_CACHE_URL,
+        'KEY_PREFIX': CHANNEL_LAYER_PREFIX,
+        'TIMEOUT': GAME_STATE_CACHE_TIMEOUT,
+    }
+else:
+    GAME_STATE_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cotisa-game-state',
+        'TIMEOUT': GAME_STATE_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+# API session tokens (chess.AuthToken). Only an HMAC of each token is stored; changing
+# AUTH_TOKEN_HASH_KEY logs everybody out.
+AUTH_TOKEN_HASH_KEY = config('AUTH_TOKEN_HASH_KEY', default=SECRET_KEY)
+AUTH_TOKEN_TTL = config('AUTH_TOKEN_TTL', default=30 * 24 * 3600, cast=int)  # seconds
+AUTH_TOKEN_MAX_SESSIONS = config('AUTH_TOKEN_MAX_SESSIONS', default=10, cast=int)  # per player
+AUTH_LAST_USED_FLUSH_SECONDS = config('AUTH_LAST_USED_FLUSH_SECONDS', default=60, cast=int)
+
+# Token authentication cache (chess/decorators.py), keyed by token hash. Entries are
+# dropped when the player or a role changes; the timeout bounds staleness for writes
+# that bypass model signals. Use 'redis' with several workers so logout reaches all of them.
+AUTH_CACHE_BACKEND = config('AUTH_CACHE_BACKEND', default=GAME_STATE_CACHE_BACKEND)
+AUTH_CACHE_TIMEOUT = config('AUTH_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+
+if AUTH_CACHE_BACKEND == 'redis':
+    AUTH_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': GAME_STATE_CACHE_URL,
+        'KEY_PREFIX': f'{CHANNEL_LAYER_PREFIX}-auth',
+        'TIMEOUT': AUTH_CACHE_TIMEOUT,
     }
+else:
+    AUTH_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cotisa-auth',
+        'TIMEOUT': AUTH_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+
+# Leaderboard (chess/leaderboard.py). Every process keeps its own rank indexes and
+# replays a change journal kept in this cache; use 'redis' with several workers so
+# rating changes reach all of them.
+LEADERBOARD_CACHE_BACKEND = config('LEADERBOARD_CACHE_BACKEND', default=GAME_STATE_CACHE_BACKEND)
+LEADERBOARD_PAGE_TIMEOUT = config('LEADERBOARD_PAGE_TIMEOUT', default=60, cast=int)  # seconds a rendered page is reused
+LEADERBOARD_JOURNAL_TIMEOUT = config('LEADERBOARD_JOURNAL_TIMEOUT', default=3600, cast=int)  # seconds a change stays replayable
+LEADERBOARD_JOURNAL_REPLAY = config('LEADERBOARD_JOURNAL_REPLAY', default=5000, cast=int)  # more pending changes -> rebuild
+LEADERBOARD_WARM_ON_STARTUP = config('LEADERBOARD_WARM_ON_STARTUP', default=True, cast=bool)  # build indexes when a server starts
+
+if LEADERBOARD_CACHE_BACKEND == 'redis':
+    LEADERBOARD_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': GAME_STATE_CACHE_URL,
+        'KEY_PREFIX': f'{CHANNEL_LAYER_PREFIX}-leaderboard',
+        'TIMEOUT': LEADERBOARD_PAGE_TIMEOUT,
+    }
+else:
+    LEADERBOARD_CACHE = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cotisa-leaderboard',
+        'TIMEOUT': LEADERBOARD_PAGE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+
+# JSON encoding of API responses and WebSocket events (chess/json_encoding.py):
+# 'auto' uses orjson when it is installed (pip install orjson), else the stdlib.
+JSON_ENCODER_BACKEND = config('JSON_ENCODER_BACKEND', default='auto')  # auto, orjson or stdlib
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'game_state': GAME_STATE_CACHE,
+    'auth': AUTH_CACHE,
+    'leaderboard': LEADERBOARD_CACHE,
 }
 
 MIDDLEWARE = [
@@ -9,6 +9,7 @@ import { showToast } from '../utils.js';
 import ChessEngine from '../chess/ChessEngine.js';
 import ChessBoard from '../chess/ChessBoard.js';
 import { getApiUrl, getMediaUrl } from '../api.js';
+import wsManager from '../websocket.js';
 
 // Default chess piece avatar
 function getDefaultAvatar(color = '#667eea') {
@@ -20,9 +21,10 @@ let gameData = null;
 let chessBoard = null;
 let pollInterval = null;
 let timerInterval = null;
+let streamHandlers = null;
 let whiteTimeRemaining = 0;
 let blackTimeRemaining = 0;
-let lastMoveTime = null;
+let clockSync = null; // Zadnji sat sa servera: {white_ms, black_ms, turn, running, server_time, at}
 let gameEnded = false; // Prevent multiple endGame calls
 
 export async function renderGameView(gameId) {
@@ -227,6 +229,8 @@ async function loadGame(gameId) {
         // Postavi tajmere iz servera
         whiteTimeRemaining = gameData.white_time_remaining || 600;
         blackTimeRemaining = gameData.black_time_remaining || 600;
+        clockSync = null;
+        applyServerClock(gameData);
         updateTimerDisplay();
         
         // Inicijaliziraj ploču sa FEN pozicijom
@@ -242,6 +246,9 @@ async function loadGame(gameId) {
             return;
         }
         
+        // Pretplati se na poteze prije REST joina da ne propustimo početak igre
+        subscribe(gameId);
+        
         // Join the game (označi kao spreman) - samo ako nije završena
         await joinGame(gameId);
         
@@ -491,32 +498,19 @@ async function handleMove(move) {
     
     // Pošalji potez na server
     try {
-        const token = auth.getAuthToken();
-        const response = await fetch(getApiUrl(`/game/${gameData.game_id}/move/`), {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-                'X-Auth-Token': token
-            },
-            body: JSON.stringify({
-                from: move.from,
-                to: move.to,
-                promotion: move.piece?.toLowerCase() === 'p' ? 'q' : undefined,
-                san: move.san,
-                fen: chessBoard.getPosition()
-            })
-        });
-
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.error || 'Greška pri slanju poteza');
-        }
-        
-        const data = await response.json();
+        const payload = {
+            from: move.from,
+            to: move.to,
+            promotion: move.piece?.toLowerCase() === 'p' ? 'q' : undefined,
+            san: move.san,
+            fen: chessBoard.getPosition()
+        };
+        const data = await submitMove(payload);
         
         // Ažuriraj lokalno stanje igre
-        gameData.fen = chessBoard.getPosition();
+        gameData.fen = data.fen || chessBoard.getPosition();
         gameData.current_turn = data.current_turn;
+        gameData.move_count = Math.max(gameData.move_count || 0, data.move_count || 0);
         
         // Ažuriraj move_history lokalno
         let moveHistory = [];
@@ -530,10 +524,20 @@ async function handleMove(move) {
         updateMovesList();
         
         // Ažuriraj vrijeme sa servera
-        if (data.white_time_remaining !== undefined) {
-            whiteTimeRemaining = data.white_time_remaining;
-            blackTimeRemaining = data.black_time_remaining;
-            updateTimerDisplay();
+        if (data.clock) {
+            applyClock(data.clock);
+        }
+        
+        // Server je završio igru ovim potezom (mat, pat, remi)
+        if (data.outcome) {
+            if (data.replay_required) {
+                gameEnded = true;
+                cleanup();
+                showReplayModal('Remi u eliminacijskom turniru - partija se ponavlja.');
+            } else {
+                applyGameEnd(data.outcome);
+            }
+            return;
         }
         
     } catch (error) {
@@ -549,6 +553,40 @@ async function handleMove(move) {
     }
 }
 
+/**
+ * Pošalji potez preko WebSocketa (move_accepted / move_rejected),
+ * a preko HTTP-a ako socket nije spojen ili još nije autentificiran.
+ * Nakon isteka vremena ili prekida veze potez se ne šalje ponovno jer je
+ * možda već primijenjen - polling vraća stanje sa servera.
+ */
+async function submitMove(payload) {
+    if (wsManager.isConnected()) {
+        try {
+            return await wsManager.submitMove(gameData.game_id, payload);
+        } catch (error) {
+            if (error.status !== 401) {
+                throw error;
+            }
+            console.warn('[submitMove] WebSocket nije autentificiran, šaljem preko HTTP-a');
+        }
+    }
+    
+    const response = await fetch(getApiUrl(`/game/${gameData.game_id}/move/`), {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-Auth-Token': auth.getAuthToken()
+        },
+        body: JSON.stringify(payload)
+    });
+    
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Greška pri slanju poteza');
+    }
+    return response.json();
+}
+
 function handleGameEnd(result) {
     console.log('[handleGameEnd] Igra završena:', result);
     if (gameEnded) {
@@ -679,184 +717,282 @@ function formatTime(seconds) {
     return `${mins.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
 }
 
+/**
+ * Sat samo prikazuje stanje sa servera: između clock_update poruka
+ * odbrojava od zadnjeg snimka. Istek vremena (flag-fall) odlučuje
+ * server i javlja ga kao game_end.
+ */
 function startTimer(playerColor) {
     if (timerInterval) {
         clearInterval(timerInterval);
     }
     
-    lastMoveTime = Date.now();
-    
     timerInterval = setInterval(() => {
-        const engine = chessBoard?.engine;
-        if (!engine || engine.isGameOver() || gameData.status !== 'in_progress') {
+        if (gameEnded || gameData.status !== 'in_progress') {
             clearInterval(timerInterval);
             timerInterval = null;
             return;
         }
-        
-        const currentTurn = engine.getCurrentTurn(); // 'w' ili 'b'
-        
-        // Oduzmi samo jednu sekundu od trenutnog igrača
-        if (currentTurn === 'w') {
-            whiteTimeRemaining = Math.max(0, whiteTimeRemaining - 1);
-            if (whiteTimeRemaining <= 0) {
-                handleTimeout('w');
-                return;
-            }
-        } else {
-            blackTimeRemaining = Math.max(0, blackTimeRemaining - 1);
-            if (blackTimeRemaining <= 0) {
-                handleTimeout('b');
-                return;
-            }
+        renderClock();
+    }, 250);
+}
+
+/**
+ * Primijeni sat sa servera (clock_update, ili clock iz poteza)
+ * @param {object} clock - {white_ms, black_ms, turn, running, server_time}
+ */
+function applyClock(clock) {
+    if (clock.white_ms === null || clock.white_ms === undefined) return;
+    // Poruke mogu stići izvan redoslijeda - stariji snimak ne pregazi noviji
+    if (clockSync?.server_time && clock.server_time && clock.server_time < clockSync.server_time) return;
+    // Odbrojava se od trenutka primitka, pa pomak sata klijenta ne utječe na prikaz
+    clockSync = { ...clock, at: Date.now() };
+    renderClock();
+}
+
+/**
+ * Sat iz REST odgovora igre (početno stanje i polling dok socket nije spojen)
+ */
+function applyServerClock(data) {
+    applyClock({
+        white_ms: data.white_clock_ms,
+        black_ms: data.black_clock_ms,
+        turn: data.current_turn,
+        running: data.status === 'in_progress'
+    });
+}
+
+function renderClock() {
+    if (!clockSync) return;
+    
+    // Samo igrač na potezu gubi vrijeme između poruka sa servera
+    const elapsed = clockSync.running ? Date.now() - clockSync.at : 0;
+    let whiteMs = clockSync.white_ms;
+    let blackMs = clockSync.black_ms;
+    if (clockSync.turn === 'white') {
+        whiteMs = Math.max(0, whiteMs - elapsed);
+    } else {
+        blackMs = Math.max(0, blackMs - elapsed);
+    }
+    
+    whiteTimeRemaining = Math.floor(whiteMs / 1000);
+    blackTimeRemaining = Math.floor(blackMs / 1000);
+    updateTimerDisplay();
+}
+
+/**
+ * Pretplati se na game_{id} grupu: protivnikovi potezi, početak igre,
+ * ponude remija i kraj igre dolaze preko WebSocketa
+ */
+function subscribe(gameId) {
+    if (streamHandlers) return;
+    console.log('[subscribe] Pretplata na igru', gameId);
+    
+    streamHandlers = {
+        'game:move': (data) => {
+            if (data.game_id === gameData.game_id) applyRemoteMove(data);
+        },
+        'game:update': (data) => {
+            if (data.game_id === gameData.game_id) applyGameUpdate(data.data || {});
+        },
+        'game:clock': (data) => {
+            if (data.game_id === gameData.game_id) applyClock(data);
+        },
+        'game:end': (data) => {
+            if (data.game_id === gameData.game_id) applyGameEnd(data);
+        },
+        // Nakon ponovnog spajanja: ponovno se pridruži grupi i dohvati propušteno
+        'connection_established': () => {
+            wsManager.joinGame(gameId);
+            pollGame(gameId);
         }
-        
-        updateTimerDisplay();
-    }, 1000);
+    };
+    Object.entries(streamHandlers).forEach(([event, handler]) => wsManager.on(event, handler));
+    wsManager.joinGame(gameId);
 }
 
-function handleTimeout(loserColor) {
-    console.log('[handleTimeout] Pozvan za boju:', loserColor);
-    cleanup();
+function myColor() {
+    return gameData.white_player.id === auth.getUser().id ? 'white' : 'black';
+}
+
+function applyRemoteMove(data) {
+    if (gameEnded || !data.move_count || data.move_count <= (gameData.move_count || 0)) {
+        return; // Već primijenjen
+    }
+    gameData.move_count = data.move_count;
+    if (data.player === myColor()) {
+        return; // Naš potez - handleMove ga je već prikazao
+    }
     
-    const result = loserColor === 'w' ? 'black_win' : 'white_win';
-    console.log('[handleTimeout] Završavam igru sa rezultatom:', result);
-    endGame(result, 'timeout');
+    let history = [];
+    try {
+        history = typeof gameData.move_history === 'string' ? JSON.parse(gameData.move_history) : (gameData.move_history || []);
+    } catch (e) {
+        history = [];
+    }
+    history.push(data.move);
+    
+    gameData.move_history = history;
+    gameData.fen = data.fen;
+    gameData.current_turn = data.current_turn;
+    if (data.clock) {
+        applyClock(data.clock);
+    }
+    
+    chessBoard?.updateFromFEN(data.fen);
+    updateMovesList();
+    updateGameStatus();
+    playMoveSound();
 }
 
-function startPolling(gameId) {
-    const currentUser = auth.getUser();
-    const playerColor = gameData.white_player.id === currentUser.id ? 'white' : 'black';
+function applyGameUpdate(update) {
+    if (gameEnded) return;
     
+    if (update.status === 'in_progress' && gameData.status === 'waiting') {
+        console.log('[game:update] Igra počinje! Oba igrača su se priključila.');
+        gameData.status = 'in_progress';
+        hideWaitingScreen(myColor());
+    }
+    
+    const opponentFlag = myColor() === 'white' ? 'black_offers_draw' : 'white_offers_draw';
+    if (update[opponentFlag] && !gameData.opponentDrawOfferShown) {
+        gameData.opponentDrawOfferShown = true;
+        showDrawOfferModal();
+    }
+}
+
+function applyGameEnd(outcome) {
+    if (gameEnded) return;
+    console.log('[game:end] Server je završio igru:', outcome);
+    gameEnded = true;
+    cleanup();
+    gameData.status = 'completed';
+    gameData.result = outcome.result;
+    chessBoard?.setDraggable(false);
+    showGameOver(outcome.result, outcome.termination);
+}
+
+function playMoveSound() {
+    try {
+        const audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+        const oscillator = audioCtx.createOscillator();
+        const gainNode = audioCtx.createGain();
+        oscillator.connect(gainNode);
+        gainNode.connect(audioCtx.destination);
+        oscillator.frequency.value = 440;
+        gainNode.gain.setValueAtTime(0.1, audioCtx.currentTime);
+        gainNode.gain.exponentialRampToValueAtTime(0.01, audioCtx.currentTime + 0.1);
+        oscillator.start();
+        oscillator.stop(audioCtx.currentTime + 0.1);
+    } catch (e) {}
+}
+
+function startPolling(gameId) {
     console.log('[startPolling] Započinjem polling za igru', gameId, 'status:', gameData.status);
     
-    // Polling interval - check server every 3 seconds but don't override time aggressively
-    pollInterval = setInterval(async () => {
-        try {
-            const token = auth.getAuthToken();
-            const response = await fetch(getApiUrl(`/game/${gameId}/`), {
-                headers: {
-                    'X-Auth-Token': token
-                }
-            });
-            
-            if (!response.ok) return;
-            
-            // Skip if game already ended
-            if (gameEnded) {
-                console.log('[polling] Game already ended, stopping poll');
+    // Samo dok WebSocket nije spojen; inače sve stiže preko game_{id} grupe
+    pollInterval = setInterval(() => {
+        if (!wsManager.isConnected()) pollGame(gameId);
+    }, 3000); // Poll every 3 seconds
+}
+
+async function pollGame(gameId) {
+    const playerColor = myColor();
+    
+    try {
+        const token = auth.getAuthToken();
+        const response = await fetch(getApiUrl(`/game/${gameId}/`), {
+            headers: {
+                'X-Auth-Token': token
+            }
+        });
+        
+        if (!response.ok) return;
+        
+        // Skip if game already ended
+        if (gameEnded) {
+            console.log('[polling] Game already ended, stopping poll');
+            cleanup();
+            return;
+        }
+        
+        const data = await response.json();
+        
+        // Provjeri je li igra završena - MORA BITI PRVO!
+        if (data.status === 'completed') {
+            console.log('[polling] Igra završena! Result:', data.result);
+            if (!gameEnded) {
+                gameEnded = true;
                 cleanup();
-                return;
+                showGameOver(data.result);
             }
+            return; // Izađi iz pollinga
+        }
+        if (gameData.status === 'waiting' && data.status === 'in_progress') {
+            console.log('[polling] Igra počinje! Oba igrača su se priključila.');
+            gameData.status = data.status;
+            gameData.white_joined = data.white_joined;
+            gameData.black_joined = data.black_joined;
+            hideWaitingScreen(playerColor);
+        }
+        
+        // Procesuiraj samo ako je igra u tijeku
+        if (data.status === 'in_progress') {
+            const fenChanged = data.fen && data.fen !== chessBoard?.getPosition();
             
-            const data = await response.json();
-            
-            // Provjeri je li igra završena - MORA BITI PRVO!
-            if (data.status === 'completed') {
-                console.log('[polling] Igra završena! Result:', data.result);
-                if (!gameEnded) {
-                    gameEnded = true;
-                    cleanup();
-                    showGameOver(data.result);
-                }
-                return; // Izađi iz pollinga
-            }
-            if (gameData.status === 'waiting' && data.status === 'in_progress') {
-                console.log('[polling] Igra počinje! Oba igrača su se priključila.');
-                gameData.status = data.status;
-                gameData.white_joined = data.white_joined;
-                gameData.black_joined = data.black_joined;
-                hideWaitingScreen(playerColor);
-            }
+            // Sat sa servera (autoritativan)
+            applyServerClock(data);
             
-            // Procesuiraj samo ako je igra u tijeku
-            if (data.status === 'in_progress') {
-                // Sync time from server only when FEN changes (new move) or significant drift
-                // This prevents constant time reset while allowing server to be authoritative
-                const fenChanged = data.fen && data.fen !== chessBoard?.getPosition();
+            if (fenChanged) {
+                gameData.fen = data.fen;
+                gameData.current_turn = data.current_turn;
+                gameData.move_count = data.move_count;
+                gameData.move_history = data.move_history;
+                chessBoard?.updateFromFEN(data.fen);
+                updateMovesList();
+                updateGameStatus();
                 
-                if (fenChanged) {
-                    // New move detected - sync time from server
-                    if (data.white_time_remaining !== undefined && data.black_time_remaining !== undefined) {
-                        whiteTimeRemaining = data.white_time_remaining;
-                        blackTimeRemaining = data.black_time_remaining;
-                        updateTimerDisplay();
-                    }
-                    
-                    gameData.fen = data.fen;
-                    gameData.current_turn = data.current_turn;
-                    gameData.move_history = data.move_history;
-                    chessBoard?.updateFromFEN(data.fen);
-                    updateMovesList();
-                    updateGameStatus();
-                    
-                    // Provjeri je li igra završena (mat, pat, itd)
-                    if (chessBoard?.engine?.isGameOver()) {
-                        const result = chessBoard.engine.getGameResult();
-                        console.log('[polling] Engine detektirao kraj igre:', result);
-                        cleanup();
-                        endGame(result);
-                        return; // Izađi iz pollinga
-                    }
-                    
-                    // Reproduciraj zvuk
-                    try {
-                        const audioCtx = new (window.AudioContext || window.webkitAudioContext)();
-                        const oscillator = audioCtx.createOscillator();
-                        const gainNode = audioCtx.createGain();
-                        oscillator.connect(gainNode);
-                        gainNode.connect(audioCtx.destination);
-                        oscillator.frequency.value = 440;
-                        gainNode.gain.setValueAtTime(0.1, audioCtx.currentTime);
-                        gainNode.gain.exponentialRampToValueAtTime(0.01, audioCtx.currentTime + 0.1);
-                        oscillator.start();
-                        oscillator.stop(audioCtx.currentTime + 0.1);
-                    } catch (e) {}
-                }
-            }
-            
-            // Provjeri je li igra završena
-            if (data.status === 'completed') {
-                console.log('[polling] Igra završena (second check)! Result:', data.result);
-                if (!gameEnded) {
-                    gameEnded = true;
+                // Provjeri je li igra završena (mat, pat, itd)
+                if (chessBoard?.engine?.isGameOver()) {
+                    const result = chessBoard.engine.getGameResult();
+                    console.log('[polling] Engine detektirao kraj igre:', result);
                     cleanup();
-                    showGameOver(data.result);
+                    endGame(result);
+                    return; // Izađi iz pollinga
                 }
-                return; // Izađi iz pollinga
-            }
-            
-            // Provjeri draw offer od protivnika
-            if (data.status === 'in_progress') {
-                const user = auth.getUser();
-                const isWhite = gameData.white_player.id === user.id;
-                const opponentOffersDraw = isWhite ? data.black_offers_draw : data.white_offers_draw;
                 
-                // Ako protivnik nudi remi i mi još nismo vidjeli to
-                if (opponentOffersDraw && !gameData.opponentDrawOfferShown) {
-                    gameData.opponentDrawOfferShown = true;
-                    showDrawOfferModal();
-                }
+                // Reproduciraj zvuk
+                playMoveSound();
             }
-            
-            // Provjeri timeout na serveru
-            if (data.status === 'in_progress') {
-                if (data.white_time_remaining !== undefined && data.white_time_remaining <= 0) {
-                    console.log('[polling] Bijeli je izgubio na vrijeme!');
-                    endGame('black_win', 'timeout');
-                    return;
-                }
-                if (data.black_time_remaining !== undefined && data.black_time_remaining <= 0) {
-                    console.log('[polling] Crni je izgubio na vrijeme!');
-                    endGame('white_win', 'timeout');
-                    return;
-                }
+        }
+        
+        // Provjeri je li igra završena
+        if (data.status === 'completed') {
+            console.log('[polling] Igra završena (second check)! Result:', data.result);
+            if (!gameEnded) {
+                gameEnded = true;
+                cleanup();
+                showGameOver(data.result);
             }
+            return; // Izađi iz pollinga
+        }
+        
+        // Provjeri draw offer od protivnika
+        if (data.status === 'in_progress') {
+            const user = auth.getUser();
+            const isWhite = gameData.white_player.id === user.id;
+            const opponentOffersDraw = isWhite ? data.black_offers_draw : data.white_offers_draw;
             
-        } catch (error) {
-            console.error('Greška pri pollingu:', error);
+            // Ako protivnik nudi remi i mi još nismo vidjeli to
+            if (opponentOffersDraw && !gameData.opponentDrawOfferShown) {
+                gameData.opponentDrawOfferShown = true;
+                showDrawOfferModal();
+            }
         }
-    }, 3000); // Poll every 3 seconds
+        
+    } catch (error) {
+        console.error('Greška pri pollingu:', error);
+    }
 }
 
 async function handleResign() {
@@ -1384,6 +1520,13 @@ function cleanup() {
         clearInterval(timerInterval);
         timerInterval = null;
     }
+    if (streamHandlers) {
+        Object.entries(streamHandlers).forEach(([event, handler]) => wsManager.off(event, handler));
+        streamHandlers = null;
+        if (gameData?.game_id) {
+            wsManager.leaveGame(gameData.game_id);
+        }
+    }
 }
 
 // Clean up on page leave
@@ -8,6 +8,7 @@ import router from '../router.js';
 import { showToast } from '../utils.js';
 import ChessBoard from '../chess/ChessBoard.js';
 import { getApiUrl, getMediaUrl } from '../api.js';
+import wsManager from '../websocket.js';
 
 // Default chess piece avatar
 function getDefaultAvatar(color = '#667eea') {
@@ -18,6 +19,9 @@ function getDefaultAvatar(color = '#667eea') {
 let gameData = null;
 let chessBoard = null;
 let pollInterval = null;
+let clockInterval = null;
+let streamHandlers = null;
+let clockSync = null; // Last server clock: {white_ms, black_ms, turn, running, at}
 let whiteTimeRemaining = 0;
 let blackTimeRemaining = 0;
 
@@ -186,8 +190,8 @@ async function loadGame(gameId) {
         // Update status
         updateGameStatus();
         
-        // Start polling for updates
-        startPolling(gameId);
+        // Subscribe to pushed moves and clocks
+        subscribe(gameId);
         
     } catch (error) {
         console.error('Error loading game:', error);
@@ -334,10 +338,106 @@ function formatTime(seconds) {
     return `${mins}:${secs.toString().padStart(2, '0')}`;
 }
 
-function startPolling(gameId) {
-    console.log('[Spectator] Starting polling for game', gameId);
+function subscribe(gameId) {
+    console.log('[Spectator] Subscribing to game', gameId);
+    
+    streamHandlers = {
+        'game:move': (data) => {
+            if (data.game_id === gameId) applyMove(data);
+        },
+        'game:clock': (data) => {
+            if (data.game_id === gameId) applyClock(data);
+        },
+        'game:end': (data) => {
+            if (data.game_id === gameId) endGame(data.result);
+        },
+        // Rejoin the game group after a reconnect
+        'connection_established': () => wsManager.joinGame(gameId)
+    };
+    Object.entries(streamHandlers).forEach(([event, handler]) => wsManager.on(event, handler));
+    wsManager.joinGame(gameId);
+    
+    clockInterval = setInterval(renderClock, 250);
+    
+    // Fallback while the socket is down
+    startPolling(gameId);
+}
+
+function applyMove(data) {
+    let history = [];
+    try {
+        history = typeof gameData.move_history === 'string' ? JSON.parse(gameData.move_history) : (gameData.move_history || []);
+    } catch (e) {
+        history = [];
+    }
+    history.push(data.move);
+    
+    gameData.move_history = history;
+    gameData.fen = data.fen;
+    gameData.current_turn = data.current_turn;
+    if (data.clock) {
+        applyClock(data.clock);
+    }
+    
+    chessBoard?.updateFromFEN(data.fen);
+    updateMovesList();
+    updateGameStatus();
+    playMoveSound();
+}
+
+function applyClock(clock) {
+    if (clock.white_ms === null || clock.white_ms === undefined) return;
+    clockSync = { ...clock, at: Date.now() };
+    renderClock();
+}
+
+function renderClock() {
+    if (!clockSync) return;
     
+    // Only the side to move loses time between server updates
+    const elapsed = clockSync.running ? Date.now() - clockSync.at : 0;
+    let whiteMs = clockSync.white_ms;
+    let blackMs = clockSync.black_ms;
+    if (clockSync.turn === 'white') {
+        whiteMs = Math.max(0, whiteMs - elapsed);
+    } else {
+        blackMs = Math.max(0, blackMs - elapsed);
+    }
+    
+    whiteTimeRemaining = Math.floor(whiteMs / 1000);
+    blackTimeRemaining = Math.floor(blackMs / 1000);
+    updateTimerDisplay();
+}
+
+function endGame(result) {
+    console.log('[Spectator] Game ended:', result);
+    cleanup();
+    gameData.status = 'completed';
+    gameData.result = result;
+    updateGameStatus();
+    showGameOver(result);
+}
+
+function playMoveSound() {
+    try {
+        const audioCtx = new (window.AudioContext || window.webkitAudioContext)();
+        const oscillator = audioCtx.createOscillator();
+        const gainNode = audioCtx.createGain();
+        oscillator.connect(gainNode);
+        gainNode.connect(audioCtx.destination);
+        oscillator.frequency.value = 440;
+        gainNode.gain.setValueAtTime(0.05, audioCtx.currentTime);
+        gainNode.gain.exponentialRampToValueAtTime(0.01, audioCtx.currentTime + 0.1);
+        oscillator.start();
+        oscillator.stop(audioCtx.currentTime + 0.1);
+    } catch (e) {}
+}
+
+function startPolling(gameId) {
     pollInterval = setInterval(async () => {
+        // Moves and clocks are pushed while the socket is up
+        if (wsManager.isConnected()) return;
+        
         try {
             const token = auth.getAuthToken();
             const response = await fetch(getApiUrl(`/game/${gameId}/spectate/`), {
@@ -351,6 +451,7 @@ function startPolling(gameId) {
             const data = await response.json();
             
             // Update time
+            clockSync = null;
             if (data.white_time_remaining !== undefined) {
                 whiteTimeRemaining = data.white_time_remaining;
             }
@@ -377,20 +478,7 @@ function startPolling(gameId) {
                 chessBoard?.updateFromFEN(data.fen);
                 updateMovesList();
                 updateGameStatus();
-                
-                // Play sound for new move
-                try {
-                    const audioCtx = new (window.AudioContext || window.webkitAudioContext)();
-                    const oscillator = audioCtx.createOscillator();
-                    const gainNode = audioCtx.createGain();
-                    oscillator.connect(gainNode);
-                    gainNode.connect(audioCtx.destination);
-                    oscillator.frequency.value = 440;
-                    gainNode.gain.setValueAtTime(0.05, audioCtx.currentTime);
-                    gainNode.gain.exponentialRampToValueAtTime(0.01, audioCtx.currentTime + 0.1);
-                    oscillator.start();
-                    oscillator.stop(audioCtx.currentTime + 0.1);
-                } catch (e) {}
+                playMoveSound();
             }
             
         } catch (error) {
@@ -435,6 +523,17 @@ function cleanup() {
         clearInterval(pollInterval);
         pollInterval = null;
     }
+    if (clockInterval) {
+        clearInterval(clockInterval);
+        clockInterval = null;
+    }
+    if (streamHandlers) {
+        Object.entries(streamHandlers).forEach(([event, handler]) => wsManager.off(event, handler));
+        streamHandlers = null;
+        if (gameData?.game_id) {
+            wsManager.leaveGame(gameData.game_id);
+        }
+    }
 }
 
 // Clean up on page leave
@@ -56,7 +56,7 @@ export async function renderTournamentDetails(tournamentId) {
         let ongoingGames = [];
         try {
             const token = auth.getAuthToken();
-            const gamesResponse = await fetch(getApiUrl(`/tournaments/${tournamentId}/games/`), {
+            const gamesResponse = await fetch(getApiUrl(`/tournaments/${tournamentId}/games/?status=in_progress`), {
                 headers: { 'X-Auth-Token': token }
             });
             if (gamesResponse.ok) {
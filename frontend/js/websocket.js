@@ -13,6 +13,8 @@ class WebSocketManager {
         this.connected = false;
         this.userId = null;
         this.pingInterval = null;
+        this.pendingMoves = new Map();
+        this.moveTimeout = 10000;
     }
 
     /**
@@ -42,6 +44,7 @@ class WebSocketManager {
                 this.connected = true;
                 this.reconnectAttempts = 0;
                 this.startPing();
+                this.authenticate();
                 this.emit('connected', { userId });
             };
             
@@ -49,6 +52,7 @@ class WebSocketManager {
                 console.log('WebSocket: Disconnected', event.code, event.reason);
                 this.connected = false;
                 this.stopPing();
+                this.rejectPendingMoves('Veza sa serverom je prekinuta');
                 this.emit('disconnected', { code: event.code });
                 
                 // Attempt to reconnect
@@ -133,6 +137,11 @@ class WebSocketManager {
                 this.emit('game:update', data);
                 break;
                 
+            case 'clock_update':
+                // Authoritative clock from the server (milliseconds left at server_time)
+                this.emit('game:clock', data);
+                break;
+                
             case 'game_end':
                 // Game ended
                 this.emit('game:end', data);
@@ -148,6 +157,16 @@ class WebSocketManager {
                 this.emit('tournament:new_round', data);
                 break;
             
+            case 'tournament_boards':
+                // Snapshot of every running board, sent on join_tournament
+                this.emit('tournament:boards', data);
+                break;
+            
+            case 'board_update':
+                // Compact delta (move, clock or result) for one board
+                this.emit('tournament:board', data);
+                break;
+            
             case 'new_round':
                 // New round notification
                 this.emit('tournament:round_notification', data);
@@ -162,6 +181,45 @@ class WebSocketManager {
                 // Match updated
                 this.emit('match:update', data);
                 break;
+                
+            case 'move_accepted':
+                // Our make_move was applied; carries the same fields as game_move
+                this.settleMove(data.move_id, pending => pending.resolve(data));
+                break;
+                
+            case 'move_rejected':
+                // Our make_move was refused (illegal, out of turn, stale state...)
+                this.settleMove(data.move_id, pending => {
+                    const error = new Error(data.error || 'Potez odbijen');
+                    error.status = data.status;
+                    pending.reject(error);
+                });
+                break;
+        }
+    }
+
+    /**
+     * Resolve or reject the pending submitMove promise for a move_id
+     * @param {string} moveId - move_id from the server reply
+     * @param {function} settle - Called with {resolve, reject}
+     */
+    settleMove(moveId, settle) {
+        const pending = this.pendingMoves.get(moveId);
+        if (!pending) {
+            return;
+        }
+        this.pendingMoves.delete(moveId);
+        clearTimeout(pending.timer);
+        settle(pending);
+    }
+
+    /**
+     * Fail every move still waiting for a reply (e.g. the socket closed)
+     * @param {string} reason - Error message
+     */
+    rejectPendingMoves(reason) {
+        for (const moveId of [...this.pendingMoves.keys()]) {
+            this.settleMove(moveId, pending => pending.reject(new Error(reason)));
         }
     }
 
@@ -185,6 +243,38 @@ class WebSocketManager {
         }
     }
 
+    /**
+     * Authenticate the socket with the stored auth token (required for moves)
+     */
+    authenticate() {
+        const token = localStorage.getItem('cotisa_auth_token');
+        if (token) {
+            this.send('authenticate', { token });
+        }
+    }
+
+    /**
+     * Submit a move over the socket; the server replies with
+     * 'move_accepted' or 'move_rejected' carrying the same move_id
+     * @param {number} gameId - Game ID
+     * @param {object} move - {from, to, promotion, san, fen}
+     * @returns {Promise<object>} Resolves with the move_accepted message,
+     *     rejects with an Error (status set for move_rejected)
+     */
+    submitMove(gameId, move) {
+        if (!this.socket || this.socket.readyState !== WebSocket.OPEN) {
+            return Promise.reject(new Error('WebSocket nije spojen'));
+        }
+        const moveId = `${gameId}-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.settleMove(moveId, pending => pending.reject(new Error('Server nije potvrdio potez')));
+            }, this.moveTimeout);
+            this.pendingMoves.set(moveId, { resolve, reject, timer });
+            this.send('make_move', { game_id: gameId, move, move_id: moveId });
+        });
+    }
+
     /**
      * Join a game room for real-time updates
      * @param {number} gameId - Game ID